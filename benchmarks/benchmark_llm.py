@@ -0,0 +1,279 @@
+"""
+Benchmark du LLM local sur CPU : débit (tokens/s) et mémoire selon la précision
+
+Chaque précision est mesurée dans un processus séparé (RSS non pollué
+par les modèles précédents) sur le même prompt pédagogique : temps de
+chargement, taille des poids, RSS après chargement et pic, durée du
+préremplissage du prompt et débit du décodage. Les réponses gloutonnes
+sont comparées à celles du modèle fp32 (part de tokens identiques).
+
+Exemples :
+    python benchmarks/benchmark_llm.py --model gpt2 --precisions fp32 bf16 int8
+    python benchmarks/benchmark_llm.py --precisions int8 gguf --gguf models/qwen2.5-1.5b-instruct-q4_k_m.gguf
+    python benchmarks/benchmark_llm.py --precisions int8 --intra-op 4 8 16 --numa-node 0
+"""
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+sys.path.append(str(Path(__file__).parent))
+
+from datetime import datetime
+from typing import Dict, List
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import time
+
+from synthetic import SyntheticCorpus
+
+QUESTION = "Explique le principe de la descente de gradient et son rôle dans l'apprentissage"
+
+def build_prompt(context_words: int, seed: int) -> str:
+    """Prompt du niveau intermédiaire avec un contexte synthétique"""
+    from modules.learning_config import learning_config
+    
+    context = SyntheticCorpus(seed=seed).text(context_words)
+    template = learning_config.LEARNING_PROMPTS['intermediate']
+    return template.format(context=f"[Source 1 - cours.txt]\n{context}", question=QUESTION)
+
+def rss_mb() -> float:
+    from modules.profiling import process_rss
+    return (process_rss() or 0) / 2**20
+
+def peak_rss_mb() -> float:
+    # ru_maxrss est en kilo-octets sous Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+# =========================
+# Mesure d'une précision (processus dédié)
+# =========================
+
+def bench_transformers(args, prompt: str) -> Dict:
+    import torch
+    from transformers import AutoTokenizer
+    from modules.cpu_inference import load_causal_lm, model_size_bytes
+    
+    start = time.perf_counter()
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    model = load_causal_lm(args.model, args.precision)
+    load_seconds = time.perf_counter() - start
+    result = {
+        'model': args.model,
+        'load_seconds': load_seconds,
+        'weights_mb': model_size_bytes(model) / 2**20,
+        'rss_loaded_mb': rss_mb()
+    }
+    
+    input_ids = torch.tensor([tokenizer.encode(prompt)])
+    decoding = {
+        'max_new_tokens': args.new_tokens,
+        'min_new_tokens': args.new_tokens,
+        'do_sample': False,
+        'pad_token_id': tokenizer.eos_token_id
+    }
+    with torch.no_grad():
+        # Chauffe : allocation des buffers et choix des noyaux
+        model.generate(input_ids, **dict(decoding, max_new_tokens=4, min_new_tokens=4))
+        
+        prefill, decode, tokens = [], [], None
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            model(input_ids)
+            prefill.append(time.perf_counter() - start)
+            
+            start = time.perf_counter()
+            output = model.generate(input_ids, **decoding)
+            elapsed = time.perf_counter() - start
+            generated = output[0, input_ids.shape[1]:]
+            # Le décodage est le temps total moins un préremplissage
+            decode.append(len(generated) / max(elapsed - prefill[-1], 1e-9))
+            tokens = generated.tolist()
+            
+    result.update({
+        'prompt_tokens': input_ids.shape[1],
+        'new_tokens': len(tokens),
+        'prefill_ms': min(prefill) * 1000,
+        'prefill_tokens_per_second': input_ids.shape[1] / min(prefill),
+        'decode_tokens_per_second': max(decode),
+        'tokens': tokens,
+        'sample': tokenizer.decode(tokens, skip_special_tokens=True)[:200]
+    })
+    return result
+
+def bench_gguf(args, prompt: str) -> Dict:
+    import torch
+    from modules.cpu_inference import load_gguf
+    
+    start = time.perf_counter()
+    llama = load_gguf(args.gguf, torch.get_num_threads(), numa=args.numa_node is not None)
+    load_seconds = time.perf_counter() - start
+    result = {
+        'model': Path(args.gguf).name,
+        'load_seconds': load_seconds,
+        'weights_mb': Path(args.gguf).stat().st_size / 2**20,
+        'rss_loaded_mb': rss_mb()
+    }
+    
+    prompt_tokens = len(llama.tokenize(prompt.encode('utf-8')))
+    llama.create_completion(prompt, max_tokens=4, temperature=0)
+    
+    prefill, decode, text = [], [], ""
+    for _ in range(args.runs):
+        # Sans cache : le prompt est recalculé à chaque essai
+        llama.reset()
+        start = time.perf_counter()
+        first, pieces = None, []
+        for chunk in llama.create_completion(prompt, max_tokens=args.new_tokens, temperature=0, stream=True):
+            if first is None:
+                first = time.perf_counter()
+            pieces.append(chunk['choices'][0]['text'])
+        end = time.perf_counter()
+        prefill.append(first - start)
+        decode.append((len(pieces) - 1) / max(end - first, 1e-9))
+        text = "".join(pieces)
+        
+    result.update({
+        'prompt_tokens': prompt_tokens,
+        'new_tokens': len(pieces),
+        'prefill_ms': min(prefill) * 1000,
+        'prefill_tokens_per_second': prompt_tokens / min(prefill),
+        'decode_tokens_per_second': max(decode),
+        'sample': text[:200]
+    })
+    return result
+
+def run_worker(args):
+    """Mesure une précision et écrit le résultat en JSON sur la sortie standard"""
+    from modules.cpu_inference import configure_torch_threads, pin_to_numa_node
+    
+    if args.numa_node is not None:
+        pin_to_numa_node(args.numa_node)
+    threads = configure_torch_threads(args.intra_op[0], args.inter_op)
+    rss_start = rss_mb()
+    
+    prompt = build_prompt(args.context_words, args.seed)
+    if args.precision == 'gguf':
+        result = bench_gguf(args, prompt)
+    else:
+        result = bench_transformers(args, prompt)
+        
+    result.update({
+        'precision': args.precision,
+        'intra_op_threads': threads['intra_op'],
+        'inter_op_threads': threads['inter_op'],
+        'numa_node': args.numa_node,
+        'rss_start_mb': rss_start,
+        'rss_peak_mb': peak_rss_mb()
+    })
+    print(json.dumps(result, ensure_ascii=False))
+
+# =========================
+# Coordination
+# =========================
+
+def run_precision(args, precision: str, intra_op: int) -> Dict:
+    command = [
+        sys.executable, __file__, '--worker',
+        '--precision', precision,
+        '--model', args.model,
+        '--new-tokens', str(args.new_tokens),
+        '--context-words', str(args.context_words),
+        '--runs', str(args.runs),
+        '--seed', str(args.seed)
+    ]
+    if intra_op:
+        command += ['--intra-op', str(intra_op)]
+    if args.inter_op:
+        command += ['--inter-op', str(args.inter_op)]
+    if args.numa_node is not None:
+        command += ['--numa-node', str(args.numa_node)]
+    if args.gguf:
+        command += ['--gguf', str(args.gguf)]
+        
+    completed = subprocess.run(command, capture_output=True, text=True)
+    if completed.returncode != 0:
+        return {'precision': precision, 'intra_op_threads': intra_op, 'error': completed.stderr.strip()[-500:]}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def token_agreement(tokens: List[int], reference: List[int]) -> float:
+    """Part de la réponse de référence reproduite avant la première divergence"""
+    if not reference:
+        return 0.0
+    same = next((i for i, (a, b) in enumerate(zip(tokens, reference)) if a != b), min(len(tokens), len(reference)))
+    return same / len(reference)
+
+def print_table(results: List[Dict]):
+    print()
+    print(f"{'précision':>9} {'threads':>7} {'charg. s':>8} {'poids Mo':>9} {'RSS Mo':>8} "
+          f"{'pic Mo':>8} {'prefill ms':>10} {'décodage tok/s':>15} {'accord fp32':>11}")
+    for r in results:
+        if 'error' in r:
+            print(f"{r['precision']:>9} {r['intra_op_threads'] or '-':>7}  erreur : {r['error'].splitlines()[-1]}")
+            continue
+        agreement = f"{r['agreement_fp32'] * 100:.0f} %" if 'agreement_fp32' in r else '-'
+        print(f"{r['precision']:>9} {r['intra_op_threads']:>7} {r['load_seconds']:>8.1f} {r['weights_mb']:>9.0f} "
+              f"{r['rss_loaded_mb']:>8.0f} {r['rss_peak_mb']:>8.0f} {r['prefill_ms']:>10.0f} "
+              f"{r['decode_tokens_per_second']:>15.1f} {agreement:>11}")
+
+def parse_args():
+    from modules.cpu_inference import PRECISIONS
+    
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='gpt2', help="Modèle transformers (fp32, bf16, int8)")
+    parser.add_argument('--gguf', type=Path, default=None, help="Fichier GGUF (précision gguf)")
+    parser.add_argument('--precisions', nargs='+', choices=PRECISIONS, default=['fp32', 'bf16', 'int8'])
+    parser.add_argument('--new-tokens', type=int, default=64)
+    parser.add_argument('--context-words', type=int, default=300, help="Taille du contexte du prompt (mots)")
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--intra-op', type=int, nargs='+', default=[None],
+                        help="Threads intra-op à comparer (défaut : un par CPU autorisé)")
+    parser.add_argument('--inter-op', type=int, default=None)
+    parser.add_argument('--numa-node', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', type=Path, default=None)
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--precision', default=None, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if args.worker:
+        run_worker(args)
+        return
+    if 'gguf' in args.precisions and not args.gguf:
+        sys.exit("--gguf est requis avec la précision gguf")
+        
+    results = []
+    for intra_op in args.intra_op:
+        for precision in args.precisions:
+            result = run_precision(args, precision, intra_op)
+            results.append(result)
+            print(json.dumps({k: v for k, v in result.items() if k != 'tokens'}, ensure_ascii=False))
+            
+        reference = next((r for r in results[-len(args.precisions):] if r['precision'] == 'fp32' and 'tokens' in r), None)
+        if reference is not None:
+            for r in results[-len(args.precisions):]:
+                if 'tokens' in r:
+                    r['agreement_fp32'] = token_agreement(r['tokens'], reference['tokens'])
+    print_table(results)
+    
+    output = args.output or (
+        Path(__file__).parent / 'results' / f"llm-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'args': {k: str(v) if isinstance(v, Path) else v for k, v in vars(args).items() if k not in ('worker', 'precision')},
+            'results': [{k: v for k, v in r.items() if k != 'tokens'} for r in results]
+        }, f, ensure_ascii=False, indent=2)
+    print(f"Résultats écrits dans {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""
+Benchmark reproductible de la chaîne RAG : chunking, embeddings, index FAISS et API
+
+Exemples :
+    python benchmarks/benchmark_rag.py --sizes 1000 10000 100000
+    python benchmarks/benchmark_rag.py --sizes 1000000 --index-types flat ivf hnsw --skip-embedding
+    python benchmarks/benchmark_rag.py --api-url http://127.0.0.1:8000 --concurrency 8
+    python benchmarks/benchmark_rag.py --baseline results/main.json --tolerance 0.15
+
+Les résultats sont écrits en JSON ; avec --baseline, le script compare
+chaque mesure à une exécution de référence et sort en erreur (code 1)
+si une régression dépasse la tolérance.
+"""
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+sys.path.append(str(Path(__file__).parent))
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+
+import faiss
+import numpy as np
+
+from synthetic import SyntheticCorpus, synthetic_vectors, perturbed_queries
+
+# Mesures où une valeur plus haute est meilleure (les autres : plus basse)
+HIGHER_IS_BETTER = {
+    'words_per_second', 'chunks_per_second', 'docs_per_second',
+    'batch_qps', 'single_qps', 'recall_at_k', 'qps'
+}
+
+def percentile_ms(latencies: List[float], q: float) -> float:
+    return float(np.percentile(latencies, q) * 1000) if latencies else 0.0
+
+def rss_mb() -> float:
+    """Mémoire résidente du processus (Linux)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+def environment_info() -> Dict:
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, cwd=Path(__file__).parent
+        ).stdout.strip()
+    except OSError:
+        commit = ''
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'faiss_version': faiss.__version__,
+        'faiss_omp_threads': faiss.omp_get_max_threads()
+    }
+
+# =========================
+# Étapes du benchmark
+# =========================
+
+def bench_chunking(corpus: SyntheticCorpus, num_words: int) -> Dict:
+    """Débit du découpage en chunks sur un texte de num_words mots"""
+    from modules.chunking import TextChunker
+    
+    chunker = TextChunker()
+    text = corpus.text(num_words)
+    
+    start = time.perf_counter()
+    chunks = chunker.create_chunks_with_metadata(text, 'synthetic.txt')
+    elapsed = time.perf_counter() - start
+    
+    return {
+        'stage': 'chunking',
+        'num_words': num_words,
+        'num_chunks': len(chunks),
+        'seconds': elapsed,
+        'words_per_second': num_words / elapsed,
+        'chunks_per_second': len(chunks) / elapsed
+    }
+
+def bench_embedding(embedding_model, corpus: SyntheticCorpus, num_docs: int) -> Dict:
+    """Débit d'encodage du modèle d'embeddings"""
+    texts = corpus.chunks(num_docs)
+    
+    # Chauffe : chargement des poids et allocation des buffers
+    embedding_model.encode(texts[:8])
+    
+    start = time.perf_counter()
+    embedding_model.encode(texts)
+    elapsed = time.perf_counter() - start
+    
+    return {
+        'stage': 'embedding',
+        'model': embedding_model.model_name,
+        'num_docs': num_docs,
+        'seconds': elapsed,
+        'docs_per_second': num_docs / elapsed
+    }
+
+def bench_index(retriever, vectors: np.ndarray, queries: np.ndarray,
+                ground_truth: np.ndarray, index_type: str, top_k: int,
+                num_single_queries: int) -> Dict:
+    """Construction, mémoire, débit, latence et rappel d'un type d'index"""
+    retriever.index_type = index_type
+    metadata = [{'chunk_id': str(i)} for i in range(len(vectors))]
+    
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    retriever.create_index(vectors.copy(), metadata)
+    build_seconds = time.perf_counter() - start
+    rss_after = rss_mb()
+    
+    index = retriever.index
+    
+    # Débit en lot : toutes les requêtes en un appel
+    start = time.perf_counter()
+    _, found = index.search(queries, top_k)
+    batch_seconds = time.perf_counter() - start
+    
+    # Latence requête par requête, comme dans /query
+    latencies = []
+    for query in queries[:num_single_queries]:
+        start = time.perf_counter()
+        index.search(query.reshape(1, -1), top_k)
+        latencies.append(time.perf_counter() - start)
+        
+    recall = np.mean([
+        len(set(found[i]) & set(ground_truth[i])) / top_k
+        for i in range(len(queries))
+    ])
+    
+    return {
+        'stage': 'index',
+        'index_type': index_type,
+        'num_vectors': len(vectors),
+        'dimension': vectors.shape[1],
+        'top_k': top_k,
+        'build_seconds': build_seconds,
+        'memory_mb': max(rss_after - rss_before, 0.0),
+        'batch_qps': len(queries) / batch_seconds,
+        'single_qps': len(latencies) / sum(latencies),
+        'p50_ms': percentile_ms(latencies, 50),
+        'p99_ms': percentile_ms(latencies, 99),
+        'recall_at_k': float(recall)
+    }
+
+def bench_api(api_url: str, corpus: SyntheticCorpus, num_requests: int,
+              concurrency: int, top_k: int) -> Dict:
+    """Latence de bout en bout de /query sous charge concurrente"""
+    import requests
+    
+    session = requests.Session()
+    questions = [
+        f"C'est quoi {corpus.text(3).rstrip('.').lower()} ?"
+        for _ in range(num_requests)
+    ]
+    
+    def ask(question: str):
+        start = time.perf_counter()
+        try:
+            response = session.post(
+                f"{api_url}/query",
+                json={'question': question, 'top_k': top_k},
+                timeout=120
+            )
+            ok = response.status_code == 200
+        except requests.RequestException:
+            ok = False
+        return ok, time.perf_counter() - start
+        
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(ask, questions))
+    elapsed = time.perf_counter() - start
+    
+    latencies = [latency for ok, latency in outcomes if ok]
+    return {
+        'stage': 'api_query',
+        'api_url': api_url,
+        'num_requests': num_requests,
+        'concurrency': concurrency,
+        'errors': len(outcomes) - len(latencies),
+        'qps': len(latencies) / elapsed,
+        'p50_ms': percentile_ms(latencies, 50),
+        'p99_ms': percentile_ms(latencies, 99)
+    }
+
+# =========================
+# Comparaison à une référence
+# =========================
+
+def result_key(result: Dict) -> tuple:
+    return (
+        result['stage'],
+        result.get('index_type'),
+        result.get('num_vectors'),
+        result.get('concurrency')
+    )
+
+def compare_to_baseline(results: List[Dict], baseline: List[Dict], tolerance: float) -> List[str]:
+    """Liste les mesures dégradées de plus de `tolerance` par rapport à la référence"""
+    reference = {result_key(r): r for r in baseline}
+    regressions = []
+    
+    for result in results:
+        previous = reference.get(result_key(result))
+        if previous is None:
+            continue
+        for metric, value in result.items():
+            old = previous.get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(old, (int, float)) or old == 0:
+                continue
+            if metric in HIGHER_IS_BETTER:
+                degraded = value < old * (1 - tolerance)
+            elif metric.endswith('_ms') or metric.endswith('_seconds') or metric == 'memory_mb':
+                degraded = value > old * (1 + tolerance)
+            else:
+                continue
+            if degraded:
+                regressions.append(
+                    f"{result_key(result)} {metric}: {old:.4g} -> {value:.4g}"
+                )
+    return regressions
+
+# =========================
+# Point d'entrée
+# =========================
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help="Nombres de chunks indexés (ex: 1000 10000 100000 1000000)")
+    parser.add_argument('--index-types', nargs='+', default=['flat', 'ivf', 'hnsw'])
+    parser.add_argument('--top-k', type=int, default=5)
+    parser.add_argument('--queries', type=int, default=1000, help="Requêtes pour le rappel et le débit en lot")
+    parser.add_argument('--single-queries', type=int, default=200, help="Requêtes unitaires pour p50/p99")
+    parser.add_argument('--chunking-words', type=int, default=1_000_000)
+    parser.add_argument('--embed-docs', type=int, default=1000)
+    parser.add_argument('--skip-embedding', action='store_true',
+                        help="Ne pas charger le modèle (vecteurs synthétiques uniquement)")
+    parser.add_argument('--dimension', type=int, default=384,
+                        help="Dimension des vecteurs synthétiques si le modèle n'est pas chargé")
+    parser.add_argument('--api-url', default=None, help="Mesurer /query sur une API en cours d'exécution")
+    parser.add_argument('--api-requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', type=Path, default=None)
+    parser.add_argument('--baseline', type=Path, default=None)
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    corpus = SyntheticCorpus(seed=args.seed)
+    results = []
+    
+    def report(result: Dict):
+        results.append(result)
+        print(json.dumps(result, ensure_ascii=False))
+        
+    report(bench_chunking(corpus, args.chunking_words))
+    
+    embedding_model = None
+    if not args.skip_embedding:
+        from modules.embeddings import EmbeddingModel
+        embedding_model = EmbeddingModel()
+        report(bench_embedding(embedding_model, corpus, args.embed_docs))
+        
+    if args.index_types:
+        from modules.retrieval import FAISSRetriever
+        
+        if embedding_model is None:
+            # Retriever sans modèle : seules les opérations vectorielles sont mesurées
+            retriever = FAISSRetriever(embedding_model=_NoModel(args.dimension))
+        else:
+            retriever = FAISSRetriever(embedding_model=embedding_model)
+            
+        for size in args.sizes:
+            vectors = synthetic_vectors(size, retriever.dimension, seed=args.seed)
+            queries = perturbed_queries(vectors, args.queries, seed=args.seed + 1)
+            
+            # Vérité terrain : recherche exacte
+            exact = faiss.IndexFlatL2(retriever.dimension)
+            exact.add(vectors)
+            _, ground_truth = exact.search(queries, args.top_k)
+            del exact
+            
+            for index_type in args.index_types:
+                report(bench_index(
+                    retriever, vectors, queries, ground_truth,
+                    index_type, args.top_k, args.single_queries
+                ))
+                retriever.clear_index()
+                
+    if args.api_url:
+        report(bench_api(args.api_url, corpus, args.api_requests, args.concurrency, args.top_k))
+        
+    output = args.output or (
+        Path(__file__).parent / 'results' / f"benchmark-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'environment': environment_info(), 'args': {
+            k: str(v) if isinstance(v, Path) else v for k, v in vars(args).items()
+        }, 'results': results}, f, ensure_ascii=False, indent=2)
+    print(f"Résultats écrits dans {output}")
+    
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"RÉGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+class _NoModel:
+    """Remplace le modèle d'embeddings quand seules les opérations FAISS sont mesurées"""
+    
+    model_name = 'synthetic'
+    
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+    
+    def get_embedding_dimension(self) -> int:
+        return self.dimension
+
+if __name__ == "__main__":
+    main()
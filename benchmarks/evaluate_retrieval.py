@@ -0,0 +1,168 @@
+"""
+Évaluation qualité / vitesse du retrieval sur un jeu de questions de référence
+
+Pour chaque combinaison (taille de chunk, overlap, type d'index, top_k),
+le corpus est redécoupé et réindexé, puis chaque question de référence
+est posée via FAISSRetriever.search. Le script calcule recall@k, MRR,
+nDCG@k et la latence, puis affiche la frontière de Pareto qualité/latence.
+
+Exemple :
+    python benchmarks/evaluate_retrieval.py \\
+        --golden data/golden_qa.jsonl --documents data/documents \\
+        --chunk-sizes 200 350 500 --overlaps 0 50 \\
+        --index-types flat ivf hnsw --top-k 3 5 10 --workers 4
+
+Format du jeu de référence (une ligne JSON par question) :
+    {"question": "C'est quoi le gradient ?",
+     "expected_passages": ["le gradient indique la direction"],
+     "expected_chunk_ids": []}
+"""
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import product
+from typing import Dict, List
+import argparse
+import json
+import time
+
+import numpy as np
+
+from modules.evaluation import load_golden_set, evaluate_search, pareto_frontier
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.txt')
+
+def run_configuration(job: Dict) -> List[Dict]:
+    """
+    Évalue un découpage (taille, overlap) pour tous les types d'index et top_k
+    
+    Exécuté dans un processus séparé : le découpage et les embeddings
+    sont calculés une fois puis partagés entre les types d'index.
+    """
+    from modules.ingestion import DocumentIngestion
+    from modules.chunking import TextChunker
+    from modules.embeddings import EmbeddingModel
+    from modules.retrieval import FAISSRetriever
+    
+    ingestion = DocumentIngestion()
+    chunker = TextChunker(job['chunk_size'], job['chunk_overlap'])
+    
+    chunks = []
+    for path in job['documents']:
+        doc_info = ingestion.process_document(Path(path))
+        chunks.extend(chunker.create_chunks_with_metadata(doc_info['content'], doc_info['filename']))
+        
+    embedding_model = EmbeddingModel()
+    start = time.perf_counter()
+    embeddings = embedding_model.encode([c['content'] for c in chunks])
+    embedding_seconds = time.perf_counter() - start
+    
+    generator = None
+    if job['with_generation']:
+        from modules.learning_generator import LearningResponseGenerator
+        generator = LearningResponseGenerator()
+        
+    results = []
+    for index_type in job['index_types']:
+        retriever = FAISSRetriever(index_type=index_type, embedding_model=embedding_model)
+        start = time.perf_counter()
+        retriever.create_index(embeddings.copy(), chunks)
+        build_seconds = time.perf_counter() - start
+        
+        # Chauffe avant les mesures de latence
+        retriever.search(job['golden'][0]['question'], 1)
+        
+        for top_k in job['top_ks']:
+            result = {
+                'chunk_size': job['chunk_size'],
+                'chunk_overlap': job['chunk_overlap'],
+                'index_type': index_type,
+                'num_chunks': len(chunks),
+                'embedding_seconds': embedding_seconds,
+                'build_seconds': build_seconds,
+                **evaluate_search(retriever.search, job['golden'], top_k)
+            }
+            
+            if generator is not None:
+                latencies = []
+                for item in job['golden'][:job['generation_sample']]:
+                    retrieved = retriever.search(item['question'], top_k)
+                    start = time.perf_counter()
+                    generator.generate_pedagogical_answer(item['question'], retrieved)
+                    latencies.append(time.perf_counter() - start)
+                result['generation_p50_ms'] = float(np.percentile(latencies, 50) * 1000)
+                result['total_p50_ms'] = result['latency_p50_ms'] + result['generation_p50_ms']
+                
+            results.append(result)
+            print(json.dumps(result, ensure_ascii=False), flush=True)
+            
+    return results
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--golden', type=Path, required=True, help="Questions de référence (JSON ou JSONL)")
+    parser.add_argument('--documents', type=Path, required=True, help="Dossier des documents du cours")
+    parser.add_argument('--chunk-sizes', type=int, nargs='+', default=[500])
+    parser.add_argument('--overlaps', type=int, nargs='+', default=[50])
+    parser.add_argument('--index-types', nargs='+', default=['flat'])
+    parser.add_argument('--top-k', type=int, nargs='+', default=[5])
+    parser.add_argument('--workers', type=int, default=2, help="Processus en parallèle")
+    parser.add_argument('--with-generation', action='store_true',
+                        help="Mesurer aussi la latence de LearningResponseGenerator")
+    parser.add_argument('--generation-sample', type=int, default=10)
+    parser.add_argument('--quality-metric', default='ndcg_at_k', choices=['recall_at_k', 'mrr', 'ndcg_at_k'])
+    parser.add_argument('--output', type=Path, default=None)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    golden = load_golden_set(args.golden)
+    documents = sorted(
+        str(p) for p in args.documents.iterdir()
+        if p.suffix.lower() in SUPPORTED_EXTENSIONS
+    )
+    if not documents:
+        sys.exit(f"Aucun document dans {args.documents}")
+        
+    jobs = [
+        {
+            'chunk_size': chunk_size,
+            'chunk_overlap': overlap,
+            'index_types': args.index_types,
+            'top_ks': args.top_k,
+            'documents': documents,
+            'golden': golden,
+            'with_generation': args.with_generation,
+            'generation_sample': args.generation_sample
+        }
+        for chunk_size, overlap in product(args.chunk_sizes, args.overlaps)
+        if overlap < chunk_size
+    ]
+    
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        results = [r for batch in pool.map(run_configuration, jobs) for r in batch]
+        
+    latency_key = 'total_p50_ms' if args.with_generation else 'latency_p50_ms'
+    frontier = pareto_frontier(results, quality_key=args.quality_metric, latency_key=latency_key)
+    
+    print(f"\nFrontière de Pareto ({args.quality_metric} / {latency_key}) :")
+    for r in frontier:
+        print(
+            f"  chunk={r['chunk_size']:<5} overlap={r['chunk_overlap']:<4} "
+            f"index={r['index_type']:<5} top_k={r['top_k']:<3} "
+            f"{args.quality_metric}={r[args.quality_metric]:.3f} {latency_key}={r[latency_key]:.1f}"
+        )
+        
+    output = args.output or (
+        Path(__file__).parent / 'results' / f"evaluation-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'results': results, 'pareto_frontier': frontier}, f, ensure_ascii=False, indent=2)
+    print(f"Résultats écrits dans {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+"""
+Test de charge : trafic d'étudiants simulé contre une API en cours d'exécution
+
+Les requêtes arrivent selon un processus de Poisson (boucle ouverte) au
+débit demandé, réparties entre /query, /upload_document et
+/list_documents. Les questions sont tirées des mots-clés de
+QUESTION_TYPES, des questions d'exemple et des suggestions de
+l'interface ; une partie des étudiants relance avec une suggestion de
+suivi dans la même session. Avec plusieurs débits, le script trace la
+courbe de saturation : débit servi et latences en fonction du débit offert.
+
+Exemples :
+    LLM_STUB_LATENCY_MS=800 uvicorn src.api.main:app --port 8000
+    python benchmarks/load_test.py --api-url http://127.0.0.1:8000 --rates 2 4 8 16 32 --duration 60
+    python benchmarks/load_test.py --rates 10 --mix query=0.7,upload=0.1,list=0.2 --follow-up-ratio 0.3
+
+La latence est mesurée depuis l'instant d'arrivée prévu : une requête
+retardée faute de connexion libre côté client compte comme lente
+(pas d'« omission coordonnée »).
+"""
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+sys.path.append(str(Path(__file__).parent))
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+from modules.learning_config import learning_config
+from synthetic import SyntheticCorpus
+
+OPERATIONS = ('query', 'upload', 'list')
+
+# Champs demandés par l'interface (voir frontend/api_client.py), plus le
+# mode de réponse pour compter les réponses dégradées
+QUERY_FIELDS = ["answer", "sources", "question_type", "follow_up_suggestions", "answer_mode"]
+
+# Notions des cours générés : les questions portent sur le même vocabulaire
+TOPICS = [
+    "le machine learning", "l'apprentissage supervisé", "la descente de gradient",
+    "un réseau de neurones", "la fonction de perte", "le surapprentissage",
+    "la régularisation", "la validation croisée", "un arbre de décision",
+    "les forêts aléatoires", "le clustering", "la normalisation des données",
+    "le taux d'apprentissage", "la rétropropagation", "la matrice de confusion"
+]
+
+# Phrases des cours générés, une notion par paragraphe
+COURSE_SENTENCES = [
+    "{topic} est une notion centrale de ce chapitre.",
+    "Pour comprendre {topic}, il faut d'abord revoir les bases vues en cours.",
+    "En pratique, {topic} intervient à chaque étape de l'entraînement d'un modèle.",
+    "Un exemple classique de {topic} est présenté dans l'exercice suivant.",
+    "La différence entre {topic} et les approches précédentes tient à la façon de traiter les données.",
+    "Les étapes à suivre pour appliquer {topic} sont détaillées ci-dessous."
+]
+
+class StudentTraffic:
+    """Générateur reproductible de questions, de sessions et de cours à déposer"""
+    
+    def __init__(self, seed: int = 42, follow_up_ratio: float = 0.2):
+        self.rng = random.Random(seed)
+        self.corpus = SyntheticCorpus(seed=seed)
+        self.follow_up_ratio = follow_up_ratio
+        self.levels = list(learning_config.LEARNING_PROMPTS)
+        self.questions = self._question_pool()
+        # Sessions ouvertes : id -> suggestions de suivi reçues
+        self.sessions: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+    
+    def _question_pool(self) -> List[str]:
+        pool = [
+            f"{keyword[0].upper()}{keyword[1:]} {topic} ?"
+            for keywords in learning_config.QUESTION_TYPES.values()
+            for keyword in keywords
+            for topic in TOPICS
+        ]
+        # Questions sans mot-clé : repli du classifieur par embeddings
+        pool += [q for examples in learning_config.QUESTION_TYPE_EXAMPLES.values() for q in examples]
+        pool += [question for _, question in learning_config.SUGGESTED_QUESTIONS]
+        return pool
+    
+    def next_query(self, top_k: int) -> Dict:
+        """Nouvelle question, ou relance d'une session avec une suggestion reçue"""
+        with self._lock:
+            open_sessions = [s for s, suggestions in self.sessions.items() if suggestions]
+            if open_sessions and self.rng.random() < self.follow_up_ratio:
+                session_id = self.rng.choice(open_sessions)
+                question = self.rng.choice(self.sessions[session_id])
+            else:
+                session_id = uuid.UUID(int=self.rng.getrandbits(128)).hex
+                question = self.rng.choice(self.questions)
+            level = self.rng.choice(self.levels)
+        return {
+            "question": question,
+            "top_k": top_k,
+            "learning_level": level,
+            "fields": QUERY_FIELDS,
+            "session_id": session_id
+        }
+    
+    def remember(self, session_id: str, suggestions: List[str]):
+        with self._lock:
+            self.sessions[session_id] = suggestions or []
+            # Les étudiants finissent par partir
+            while len(self.sessions) > 500:
+                self.sessions.pop(next(iter(self.sessions)))
+    
+    def course(self, paragraphs: int = 12) -> str:
+        """Cours à déposer : chaque paragraphe développe une notion"""
+        with self._lock:
+            topics = [self.rng.choice(TOPICS) for _ in range(paragraphs)]
+            texts = [
+                " ".join(self.rng.choice(COURSE_SENTENCES).format(topic=topic) for _ in range(4))
+                + " " + self.corpus.text(60)
+                for topic in topics
+            ]
+        return "\n\n".join(texts)
+    
+    def search_term(self) -> Optional[str]:
+        with self._lock:
+            return self.rng.choice([None, None, None, "cours", "chapitre"])
+
+class LoadRunner:
+    """Envoie les requêtes d'une étape et collecte leurs résultats"""
+    
+    def __init__(self, api_url: str, traffic: StudentTraffic, mix: Dict[str, float],
+                 top_k: int, timeout: float, max_in_flight: int):
+        self.api_url = api_url.rstrip("/")
+        self.traffic = traffic
+        self.operations = list(mix)
+        self.weights = [mix[op] for op in self.operations]
+        self.top_k = top_k
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_in_flight, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._etag = None
+    
+    def _query(self) -> Tuple[requests.Response, Optional[str]]:
+        payload = self.traffic.next_query(self.top_k)
+        response = self.session.post(f"{self.api_url}/query", json=payload, timeout=self.timeout)
+        if response.status_code != 200:
+            return response, None
+        data = response.json()
+        self.traffic.remember(payload["session_id"], data.get("follow_up_suggestions", []))
+        return response, data.get("answer_mode")
+    
+    def _upload(self) -> Tuple[requests.Response, Optional[str]]:
+        name = f"charge_{uuid.uuid4().hex[:12]}.txt"
+        content = self.traffic.course().encode("utf-8")
+        response = self.session.post(
+            f"{self.api_url}/upload_document",
+            files={"file": (name, content, "text/plain")},
+            timeout=self.timeout
+        )
+        return response, None
+    
+    def _list(self) -> Tuple[requests.Response, Optional[str]]:
+        # Comme l'interface : requête conditionnelle sur le dernier ETag
+        search = self.traffic.search_term()
+        headers = {"If-None-Match": self._etag} if self._etag and not search else {}
+        params = {"search": search} if search else {}
+        response = self.session.get(
+            f"{self.api_url}/list_documents", params=params, headers=headers, timeout=self.timeout
+        )
+        if response.status_code == 200 and not search:
+            self._etag = response.headers.get("ETag")
+        return response, None
+    
+    def _send(self, operation: str, scheduled: float) -> Dict:
+        mode = None
+        try:
+            response, mode = getattr(self, f"_{operation}")()
+            status = response.status_code
+            ok = status in (200, 304)
+        except requests.RequestException as e:
+            status, ok = type(e).__name__, False
+        return {
+            'operation': operation,
+            'ok': ok,
+            'status': status,
+            'answer_mode': mode,
+            'latency': time.perf_counter() - scheduled
+        }
+    
+    def run(self, rate: float, duration: float, seed: int) -> Dict:
+        """
+        Une étape à débit constant
+        
+        Les arrivées suivent un processus de Poisson de paramètre `rate`
+        et sont envoyées sans attendre les réponses précédentes (au plus
+        max_in_flight en parallèle, les autres attendent côté client).
+        """
+        rng = random.Random(seed)
+        outcomes = []
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+            futures = []
+            next_arrival = start
+            while next_arrival - start < duration:
+                delay = next_arrival - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                operation = rng.choices(self.operations, self.weights)[0]
+                futures.append(pool.submit(self._send, operation, next_arrival))
+                next_arrival += rng.expovariate(rate)
+            outcomes = [future.result() for future in futures]
+        elapsed = time.perf_counter() - start
+        return summarize(outcomes, rate, elapsed)
+
+def percentiles_ms(latencies: List[float]) -> Dict:
+    if not latencies:
+        return {'p50_ms': 0.0, 'p90_ms': 0.0, 'p95_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0}
+    values = np.percentile(latencies, [50, 90, 95, 99]) * 1000
+    return {
+        'p50_ms': round(float(values[0]), 1),
+        'p90_ms': round(float(values[1]), 1),
+        'p95_ms': round(float(values[2]), 1),
+        'p99_ms': round(float(values[3]), 1),
+        'max_ms': round(max(latencies) * 1000, 1)
+    }
+
+def summarize(outcomes: List[Dict], rate: float, elapsed: float) -> Dict:
+    """Débit, latences et erreurs d'une étape, au total et par opération"""
+    def block(items: List[Dict]) -> Dict:
+        ok = [o['latency'] for o in items if o['ok']]
+        errors: Dict[str, int] = {}
+        for o in items:
+            if not o['ok']:
+                errors[str(o['status'])] = errors.get(str(o['status']), 0) + 1
+        return {
+            'requests': len(items),
+            'throughput': round(len(ok) / elapsed, 2) if elapsed else 0.0,
+            'error_rate': round(1 - len(ok) / len(items), 4) if items else 0.0,
+            'errors': errors,
+            **percentiles_ms(ok)
+        }
+        
+    result = {'offered_rate': rate, 'duration': round(elapsed, 2), **block(outcomes)}
+    result['operations'] = {
+        op: block([o for o in outcomes if o['operation'] == op])
+        for op in OPERATIONS if any(o['operation'] == op for o in outcomes)
+    }
+    # Générées, extractives (LLM saturé), sans contexte…
+    modes: Dict[str, int] = {}
+    for o in outcomes:
+        if o['answer_mode']:
+            modes[o['answer_mode']] = modes.get(o['answer_mode'], 0) + 1
+    result['answer_modes'] = modes
+    return result
+
+def is_saturated(step: Dict, slo_ms: float) -> bool:
+    """Débit servi nettement sous le débit offert, erreurs, ou p99 hors objectif"""
+    return (
+        step['throughput'] < 0.9 * step['offered_rate']
+        or step['error_rate'] > 0.01
+        or step['p99_ms'] > slo_ms
+    )
+
+def print_curve(steps: List[Dict], slo_ms: float):
+    print(f"\n{'offert':>8} {'servi':>8} {'erreurs':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'générées':>9}  état")
+    for step in steps:
+        state = "SATURÉ" if is_saturated(step, slo_ms) else "ok"
+        answered = sum(step['answer_modes'].values())
+        generated = step['answer_modes'].get('generate', 0) / answered if answered else 0.0
+        print(
+            f"{step['offered_rate']:>8.1f} {step['throughput']:>8.1f} {step['error_rate']:>8.2%} "
+            f"{step['p50_ms']:>9.0f} {step['p95_ms']:>9.0f} {step['p99_ms']:>9.0f} {generated:>9.0%}  {state}"
+        )
+    # Dernier débit tenu avant la première étape saturée
+    capacity = None
+    for step in steps:
+        if is_saturated(step, slo_ms):
+            break
+        capacity = step['offered_rate']
+    if capacity is not None:
+        print(f"\nCapacité mesurée : {capacity} req/s (p99 < {slo_ms:.0f} ms, erreurs < 1 %)")
+    else:
+        print("\nSaturé dès le premier débit")
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Opération inconnue : {name} (attendu : {', '.join(OPERATIONS)})")
+        mix[name.strip()] = float(weight)
+    return mix
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--api-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--rates', type=float, nargs='+', default=[1, 2, 4, 8],
+                        help="Débits offerts (requêtes/s), une étape par débit")
+    parser.add_argument('--duration', type=float, default=30, help="Durée de chaque étape (secondes)")
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('query=0.85,upload=0.05,list=0.10'))
+    parser.add_argument('--follow-up-ratio', type=float, default=0.2,
+                        help="Part des questions qui relancent une session avec une suggestion")
+    parser.add_argument('--warmup-documents', type=int, default=3, help="Cours déposés avant la mesure")
+    parser.add_argument('--top-k', type=int, default=5)
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--max-in-flight', type=int, default=256)
+    parser.add_argument('--slo-ms', type=float, default=5000, help="Objectif de p99 pour la courbe de saturation")
+    parser.add_argument('--stop-when-saturated', action='store_true')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', type=Path, default=None)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    traffic = StudentTraffic(seed=args.seed, follow_up_ratio=args.follow_up_ratio)
+    runner = LoadRunner(args.api_url, traffic, args.mix, args.top_k, args.timeout, args.max_in_flight)
+    
+    health = runner.session.get(f"{runner.api_url}/health", timeout=10).json()
+    print(f"API : {health}")
+    for _ in range(args.warmup_documents):
+        response, _ = runner._upload()
+        response.raise_for_status()
+        
+    steps = []
+    for i, rate in enumerate(args.rates):
+        step = runner.run(rate, args.duration, seed=args.seed + i)
+        steps.append(step)
+        print(json.dumps(step, ensure_ascii=False))
+        if args.stop_when_saturated and is_saturated(step, args.slo_ms):
+            break
+    print_curve(steps, args.slo_ms)
+    
+    output = args.output or (
+        Path(__file__).parent / 'results' / f"load-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'api': health,
+            'args': {k: str(v) if isinstance(v, Path) else v for k, v in vars(args).items()},
+            'steps': steps
+        }, f, ensure_ascii=False, indent=2)
+    print(f"Résultats écrits dans {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Génération de corpus et de vecteurs synthétiques reproductibles pour les benchmarks
+"""
+from typing import List
+import numpy as np
+
+SYLLABLES = [
+    'ba', 'cé', 'di', 'fo', 'gu', 'la', 'mé', 'ni', 'po', 'ru',
+    'sa', 'té', 'vi', 'zo', 'an', 'on', 'in', 'ra', 'lo', 'ti',
+    'que', 'tion', 'ment', 'age', 'eur', 'ique', 'isme', 'al'
+]
+
+class SyntheticCorpus:
+    """
+    Corpus pseudo-français organisé en thèmes
+    
+    Chaque thème tire ses mots d'une loi de Zipf sur une partie du
+    vocabulaire : les chunks d'un même thème se ressemblent, ce qui
+    donne une structure réaliste aux embeddings.
+    """
+    
+    def __init__(self, num_topics: int = 50, vocabulary_size: int = 5000, seed: int = 42):
+        self.rng = np.random.default_rng(seed)
+        self.vocabulary = self._make_vocabulary(vocabulary_size)
+        self.num_topics = num_topics
+        
+        # Chaque thème privilégie sa propre permutation du vocabulaire
+        self.topic_words = [
+            self.rng.permutation(vocabulary_size)
+            for _ in range(num_topics)
+        ]
+        ranks = np.arange(1, vocabulary_size + 1)
+        weights = 1.0 / ranks
+        self.word_probabilities = weights / weights.sum()
+    
+    def _make_vocabulary(self, size: int) -> List[str]:
+        words = set()
+        while len(words) < size:
+            num_syllables = self.rng.integers(2, 5)
+            words.add(''.join(self.rng.choice(SYLLABLES, size=num_syllables)))
+        return sorted(words)
+    
+    def text(self, num_words: int, topic: int = None) -> str:
+        """Génère un texte d'un thème donné (aléatoire par défaut)"""
+        if topic is None:
+            topic = int(self.rng.integers(self.num_topics))
+        ids = self.rng.choice(
+            self.topic_words[topic],
+            size=num_words,
+            p=self.word_probabilities
+        )
+        words = [self.vocabulary[i] for i in ids]
+        
+        # Phrases de 8 à 20 mots
+        sentences = []
+        i = 0
+        while i < len(words):
+            length = int(self.rng.integers(8, 21))
+            sentence = ' '.join(words[i:i + length])
+            sentences.append(sentence.capitalize() + '.')
+            i += length
+        return ' '.join(sentences)
+    
+    def chunks(self, num_chunks: int, words_per_chunk: int = 100) -> List[str]:
+        """Génère des textes de la taille d'un chunk"""
+        return [self.text(words_per_chunk) for _ in range(num_chunks)]
+
+def synthetic_vectors(num_vectors: int, dimension: int, seed: int = 42,
+                      num_clusters: int = None) -> np.ndarray:
+    """
+    Vecteurs normalisés tirés d'un mélange de gaussiennes
+    
+    Des vecteurs uniformes sur la sphère n'ont pas de voisins
+    significatifs ; un mélange de clusters reproduit mieux la
+    distribution d'embeddings de textes et le comportement des index
+    approximatifs.
+    """
+    rng = np.random.default_rng(seed)
+    num_clusters = num_clusters or max(8, int(np.sqrt(num_vectors)))
+    
+    centers = rng.standard_normal((num_clusters, dimension)).astype('float32')
+    assignments = rng.integers(num_clusters, size=num_vectors)
+    
+    vectors = np.empty((num_vectors, dimension), dtype='float32')
+    batch = 100_000
+    for start in range(0, num_vectors, batch):
+        end = min(start + batch, num_vectors)
+        noise = rng.standard_normal((end - start, dimension)).astype('float32')
+        vectors[start:end] = centers[assignments[start:end]] + 0.5 * noise
+        
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+def perturbed_queries(vectors: np.ndarray, num_queries: int, seed: int = 7,
+                      noise: float = 0.3) -> np.ndarray:
+    """Requêtes proches de vecteurs du corpus (comme une question sur un passage)"""
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(len(vectors), size=num_queries)
+    queries = vectors[picks] + noise * rng.standard_normal(
+        (num_queries, vectors.shape[1])
+    ).astype('float32') / np.sqrt(vectors.shape[1])
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return queries.astype('float32')
@@ -1,19 +1,50 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Request, Response, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
 from pathlib import Path
-import shutil
+from typing import List, Literal, Optional
+from concurrent.futures import ThreadPoolExecutor
 import logging
+import os
 import sys
+import threading
+import time
+from datetime import datetime, timezone
 
 # Ajouter le chemin des modules
 sys.path.append(str(Path(__file__).parent.parent))
 
 from modules.ingestion import DocumentIngestion
 from modules.chunking import TextChunker
-from modules.retrieval import FAISSRetriever
-from modules.generation import ResponseGenerator
+from modules.retrieval import FAISSRetriever, configure_search_threads
+from modules.embedding_store import EmbeddingStore, content_hash
+from modules.extractive import ExtractiveAnswerer
+from modules.admission import AdmissionController, AdmissionRejected
+from modules.relevance import RelevanceGate
+from modules.dedup import NearDuplicateIndex, dedup_report
+from modules.distributed import ScatterGatherRetriever, ShardUnavailable
+from modules.profiling import Profiler, profiled, process_rss, sample_stacks, start_memory_tracing, stop_memory_tracing
+from modules.conversations import ConversationStore, is_follow_up
+from modules.response_shaping import query_terms, compile_terms, shape_chunks, select_fields
+from modules.learning_generator import LearningResponseGenerator
+from modules.cpu_inference import configure_torch_threads, pin_to_numa_node
+from modules.learning_config import learning_config, question_classifier
+from modules.uploads import (
+    UploadManager, UploadSession, UploadError, MultipartFileStream,
+    UploadNotFound, UploadTooLarge, UploadOffsetMismatch
+)
 from modules.config import config
+from modules import metrics
+
+# Sérialisation JSON via orjson si disponible (plus rapide, gère numpy)
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+except ImportError:
+    DefaultResponse = JSONResponse
 
 # Configuration du logging
 logging.basicConfig(
@@ -26,7 +57,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="RAG System API",
     description="API pour système RAG avec FAISS et LLM",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=DefaultResponse
 )
 
 # CORS
@@ -38,11 +70,214 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compression des réponses au-delà de GZIP_MINIMUM_SIZE octets
+app.add_middleware(GZipMiddleware, minimum_size=int(os.getenv("GZIP_MINIMUM_SIZE", "1000")))
+
+# Nœud NUMA du processus (vide : tous les CPU) ; appliqué avant tout
+# chargement de modèle pour que les poids soient alloués sur ce nœud
+NUMA_NODE = os.getenv("NUMA_NODE", "")
+if NUMA_NODE:
+    pin_to_numa_node(int(NUMA_NODE))
+# Threads torch (génération locale et embeddings) : intra-op, vide pour un
+# par CPU autorisé, et inter-op, vide pour garder la valeur de torch
+TORCH_INTRA_OP_THREADS = os.getenv("TORCH_INTRA_OP_THREADS", "")
+TORCH_INTER_OP_THREADS = os.getenv("TORCH_INTER_OP_THREADS", "")
+configure_torch_threads(
+    int(TORCH_INTRA_OP_THREADS) if TORCH_INTRA_OP_THREADS else None,
+    int(TORCH_INTER_OP_THREADS) if TORCH_INTER_OP_THREADS else None
+)
+
 # Initialisation des composants
 ingestion = DocumentIngestion()
 chunker = TextChunker()
-retriever = FAISSRetriever()
-generator = ResponseGenerator()
+# Similarité de Jaccard estimée (MinHash) au-delà de laquelle un chunk est
+# fusionné avec un chunk déjà indexé, 'off' pour désactiver
+DEDUP_THRESHOLD = os.getenv("DEDUP_THRESHOLD", "0.8").lower()
+# Recherche en deux temps : sections (fenêtres de chunks consécutifs)
+# présélectionnées par leur centroïde avant la recherche des chunks ;
+# approximative (rappel@5 ≈ 0,91 à 64 sections, ≈ 0,999 à 256 sur le
+# benchmark), elle est désactivée par défaut (0 : tous les chunks)
+COARSE_SECTIONS = int(os.getenv("COARSE_SECTIONS", "0"))
+retriever = FAISSRetriever(
+    deduplicator=None if DEDUP_THRESHOLD == "off" else NearDuplicateIndex(threshold=float(DEDUP_THRESHOLD)),
+    coarse_sections=COARSE_SECTIONS
+)
+# Recherche distribuée : URL des nœuds (api/node.py) séparées par des virgules ;
+# vide, l'index local est utilisé. Au-delà de l'échéance (secondes), les
+# nœuds qui n'ont pas répondu sont ignorés. Avec des nœuds, les routes qui
+# modifient l'index répondent 409 (index découpé avec node.py split)
+RETRIEVAL_NODES = [url.strip() for url in os.getenv("RETRIEVAL_NODES", "").split(",") if url.strip()]
+RETRIEVAL_DEADLINE_SECONDS = float(os.getenv("RETRIEVAL_DEADLINE_SECONDS", "2"))
+searcher = ScatterGatherRetriever.from_urls(
+    RETRIEVAL_NODES, retriever.embedding_model, RETRIEVAL_DEADLINE_SECONDS
+) if RETRIEVAL_NODES else retriever
+# Durée maximale d'une génération : au-delà, la réponse partielle est renvoyée
+GENERATION_TIMEOUT_SECONDS = float(os.getenv("GENERATION_TIMEOUT_SECONDS", "30"))
+# LLM simulé pour les tests de charge : délai (ms) de chaque génération ;
+# vide, le vrai modèle est chargé
+LLM_STUB_LATENCY_MS = os.getenv("LLM_STUB_LATENCY_MS", "")
+# Précision du modèle local : fp32, bf16, int8 (quantification dynamique)
+# ou gguf (llama.cpp, modèle quantifié désigné par LLM_GGUF_PATH)
+LLM_PRECISION = os.getenv("LLM_PRECISION", "fp32").lower()
+generator = LearningResponseGenerator(
+    max_generation_seconds=GENERATION_TIMEOUT_SECONDS or None,
+    stub_latency=float(LLM_STUB_LATENCY_MS) / 1000 if LLM_STUB_LATENCY_MS else None,
+    precision=LLM_PRECISION,
+    gguf_path=os.getenv("LLM_GGUF_PATH") or None,
+    numa=bool(NUMA_NODE)
+)
+
+# Intervalle (secondes) de surveillance des fichiers d'index, 0 pour désactiver
+INDEX_WATCH_INTERVAL = float(os.getenv("INDEX_WATCH_INTERVAL", "5"))
+
+# Beaucoup de petites recherches concurrentes : un thread OpenMP chacune
+configure_search_threads(int(os.getenv("FAISS_OMP_THREADS", "1")))
+
+# En-tête X-Timing sur toutes les réponses (sinon seulement sur demande)
+TIMING_HEADER_ALWAYS = os.getenv("TIMING_HEADER_ALWAYS", "false").lower() == "true"
+
+# Profilage à la demande (en-tête X-Profile, /admin/profiling) ; désactivé,
+# aucun middleware n'est installé
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+# Fraction des requêtes profilées sans qu'elles le demandent
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+profiler = Profiler(PROFILE_SAMPLE_RATE) if PROFILING_ENABLED else None
+
+# Générations LLM simultanées ; au-delà, le mode 'auto' répond en extractif
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "2"))
+generation_slots = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+extractive_answerer = ExtractiveAnswerer(retriever.embedding_model)
+
+# Admission de /query : exécutions simultanées, file d'attente bornée,
+# attente maximale avant réponse dégradée, requêtes par client, réponses
+# dégradées simultanées (au-delà, 503 avec Retry-After)
+admission = AdmissionController(
+    max_concurrency=int(os.getenv("QUERY_MAX_CONCURRENCY", "8")),
+    max_queue=int(os.getenv("QUERY_MAX_QUEUE", "64")),
+    queue_timeout=float(os.getenv("QUERY_QUEUE_TIMEOUT", "10")),
+    per_client_limit=int(os.getenv("QUERY_PER_CLIENT_LIMIT", "8")),
+    max_degraded=int(os.getenv("QUERY_MAX_DEGRADED", "4"))
+)
+# Réponse servie quand l'attente dépasse QUERY_QUEUE_TIMEOUT : 'extractive' ou 'retrieval'
+QUERY_DEGRADED_MODE = os.getenv("QUERY_DEGRADED_MODE", "extractive")
+
+# Type de question déduit de l'embedding quand aucun mot-clé n'est reconnu
+QUESTION_EMBEDDING_FALLBACK = os.getenv("QUESTION_EMBEDDING_FALLBACK", "true").lower() == "true"
+
+# Taille maximale d'un document reçu (octets)
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(50 * 1024 * 1024)))
+
+# Marge du corps multipart au-delà du fichier (délimiteurs, en-têtes des
+# parties) tolérée par le contrôle de Content-Length
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+# Extractions en parallèle lors d'un upload multiple
+INGESTION_WORKERS = int(os.getenv("INGESTION_WORKERS", "4"))
+
+# Taille des lots d'encodage lors d'un upload multiple
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+
+# Uploads en cours : fichiers spool uniques à côté des documents
+uploads = UploadManager(
+    config.DOCUMENTS_DIR / ".uploads",
+    MAX_UPLOAD_BYTES,
+    chunker=chunker,
+    embedding_model=retriever.embedding_model
+)
+
+# Embeddings des chunks conservés sur disque, par modèle : une
+# reconstruction d'index ne réencode que les chunks inconnus
+embedding_store = EmbeddingStore(
+    Path(os.getenv("EMBEDDING_STORE_DIR", str(config.FAISS_INDEX_PATH.parent / "embeddings"))),
+    retriever.embedding_model.model_name,
+    retriever.dimension
+)
+
+# Seuil de pertinence : 'auto' (appris sur le corpus), une valeur fixe
+# (similarité cosinus) ou 'off'
+RELEVANCE_THRESHOLD = os.getenv("RELEVANCE_THRESHOLD", "auto").lower()
+relevance_gate = None if RELEVANCE_THRESHOLD == "off" else RelevanceGate(
+    retriever,
+    fixed_threshold=None if RELEVANCE_THRESHOLD == "auto" else float(RELEVANCE_THRESHOLD)
+)
+
+# Sessions de conversation : les questions de suivi réutilisent les chunks
+# de l'échange précédent tant que le sujet ne change pas
+conversations = ConversationStore(
+    Path(os.getenv("CONVERSATION_DB", str(config.FAISS_INDEX_PATH.parent / "conversations.sqlite3"))),
+    ttl=float(os.getenv("CONVERSATION_TTL_HOURS", "24")) * 3600
+)
+# Similarité minimale avec la question d'origine pour rester sur le même sujet
+CONVERSATION_TOPIC_THRESHOLD = float(os.getenv("CONVERSATION_TOPIC_THRESHOLD", "0.6"))
+
+# Taille et version de l'index lues au moment du scrape
+metrics.INDEX_VECTORS.set_function(lambda: retriever.index.ntotal if retriever.index else 0)
+metrics.INDEX_VERSION.set_function(lambda: retriever.version)
+metrics.QUEUE_DEPTH.labels(queue='query').set_function(lambda: admission.active + admission.waiting)
+metrics.QUEUE_DEPTH.labels(queue='query_waiting').set_function(lambda: admission.waiting)
+metrics.QUEUE_DEPTH.labels(queue='query_degraded').set_function(lambda: admission.degraded_active)
+
+@app.middleware("http")
+async def timing_middleware(request: Request, call_next):
+    """Mesure la durée des requêtes et expose le détail par étape"""
+    timings = metrics.start_request_timings()
+    start = time.perf_counter()
+    
+    response = await call_next(request)
+    
+    elapsed = time.perf_counter() - start
+    route = request.scope.get("route")
+    metrics.REQUEST_LATENCY.labels(
+        method=request.method,
+        endpoint=route.path if route else "unmatched",
+        status=response.status_code
+    ).observe(elapsed)
+    
+    if TIMING_HEADER_ALWAYS or "x-timing" in request.headers:
+        timings["total"] = elapsed
+        response.headers["X-Timing"] = metrics.format_timings(timings)
+        
+    return response
+
+if PROFILING_ENABLED:
+    @app.middleware("http")
+    async def profiling_middleware(request: Request, call_next):
+        """Profile la requête si elle le demande, si des captures sont armées ou par tirage"""
+        capture = profiler.start_capture(
+            f"{request.method} {request.url.path}",
+            requested="x-profile" in request.headers
+        )
+        response = await call_next(request)
+        if capture is not None and profiler.record(capture):
+            response.headers["X-Profile-Id"] = str(capture.id)
+        return response
+
+@app.on_event("startup")
+def load_existing_index():
+    """Charge l'index persisté et surveille ses mises à jour"""
+    try:
+        retriever.reload_index()
+    except Exception as e:
+        logger.warning(f"Index existant non chargé : {e}")
+        
+    if INDEX_WATCH_INTERVAL > 0:
+        retriever.start_watching(INDEX_WATCH_INTERVAL)
+
+@app.on_event("startup")
+def fit_question_prototypes():
+    """Prépare le repli par embeddings de la détection du type de question"""
+    if not QUESTION_EMBEDDING_FALLBACK:
+        return
+    examples = learning_config.QUESTION_TYPE_EXAMPLES
+    question_classifier.fit_prototypes({
+        qtype: retriever.embedding_model.encode(questions)
+        for qtype, questions in examples.items()
+    })
+
+@app.on_event("shutdown")
+def stop_index_watcher():
+    """Arrête la surveillance des fichiers d'index"""
+    retriever.stop_watching()
 
 # =========================
 # Modèles Pydantic
@@ -51,12 +286,43 @@ generator = ResponseGenerator()
 class QueryRequest(BaseModel):
     question: str
     top_k: int = 5
+    learning_level: str = 'intermediate'
+    # Comparaisons : une sous-requête par concept, fusionnées
+    multi_query: bool = True
+    # 'extractive' : phrases du cours citées, sans LLM ; 'auto' : extractif
+    # seulement si toutes les places de génération sont occupées
+    # 'retrieval' : uniquement les chunks retrouvés, sans réponse rédigée
+    answer_mode: Literal['auto', 'generate', 'extractive', 'retrieval'] = 'auto'
+    # 'batch' passe après les requêtes interactives en cas d'attente
+    priority: Literal['interactive', 'batch'] = 'interactive'
+    # Mise en forme : champs renvoyés (tous par défaut), texte complet des
+    # chunks, longueur de l'extrait surligné ajouté à chaque chunk (0 = aucun)
+    fields: Optional[List[str]] = None
+    include_content: bool = True
+    snippet_chars: int = 0
+    # Session de conversation (identifiant choisi par le client)
+    session_id: Optional[str] = Field(None, max_length=64, pattern=r'^[A-Za-z0-9_-]+$')
+
+class UploadInitRequest(BaseModel):
+    filename: str
+    total_size: Optional[int] = None
+
+class UploadCompleteRequest(BaseModel):
+    sha256: Optional[str] = None
 
 class QueryResponse(BaseModel):
     answer: str
     retrieved_chunks: list
     sources: list
     context_used: int
+    question_type: str = 'general'
+    learning_level: str = 'intermediate'
+    follow_up_suggestions: list = []
+    truncated: bool = False
+    answer_mode: str = 'generate'
+    session_id: Optional[str] = None
+    # Chunks repris de l'échange précédent, sans nouvelle recherche
+    follow_up: bool = False
 
 # =========================
 # Endpoints
@@ -71,6 +337,11 @@ def read_root():
         "health": "/health"
     }
 
+@app.get("/metrics")
+def prometheus_metrics():
+    """Métriques Prometheus (latences par étape, tokens/s, files, caches, index)"""
+    return Response(content=metrics.export_metrics(), media_type=metrics.METRICS_CONTENT_TYPE)
+
 @app.get("/health")
 def health_check():
     """Vérification de l'état du système"""
@@ -79,138 +350,878 @@ def health_check():
     return {
         "status": "healthy",
         "num_vectors": num_vectors,
+        "index_version": retriever.version,
         "embedding_model": retriever.embedding_model.model_name,
-        "llm_model": generator.model_name
+        "llm_model": generator.model_name,
+        "llm_precision": generator.precision
     }
 
-@app.post("/upload_document")
-async def upload_document(file: UploadFile = File(...)):
+def _prepare_upload(session: UploadSession) -> tuple:
     """
-    Upload et indexation d'un document
+    Extrait et découpe un document reçu
+    
+    Les TXT ont déjà été découpés (et souvent encodés) pendant l'upload ;
+    les autres formats passent par l'ingestion classique.
     
-    Args:
-        file: Fichier PDF, DOCX ou TXT
-        
     Returns:
-        Informations sur le document indexé
+        (chunks, embeddings ou None, nombre de caractères)
     """
+    path = session.finish()
+    num_pages = None
+    
+    if session.streamed:
+        chunks = [
+            chunker.build_chunk_metadata(text, session.filename, idx)
+            for idx, text in enumerate(session.chunk_texts)
+        ]
+        embeddings = session.streamed_embeddings()
+        num_characters = session.num_characters
+    else:
+        # 1. Ingestion
+        doc_info = ingestion.process_document(path)
+        
+        # 2. Chunking
+        chunks = chunker.create_chunks_with_metadata(doc_info['content'], session.filename)
+        embeddings = None
+        num_characters = doc_info['num_characters']
+        num_pages = doc_info['num_pages']
+        
+    if not chunks:
+        raise ValueError("Aucun texte extrait du document")
+        
+    # Informations du document reprises par le catalogue
+    ingested_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    for chunk in chunks:
+        chunk['ingested_at'] = ingested_at
+        chunk['num_pages'] = num_pages
+    return chunks, embeddings, num_characters
+
+def _archive_upload(session: UploadSession):
+    """Archive nommée par empreinte : deux uploads du même nom ne s'écrasent plus"""
+    archive_path = config.DOCUMENTS_DIR / f"{session.sha256[:12]}_{session.filename}"
+    os.replace(session.path, archive_path)
+
+@profiled()
+def _index_upload(session: UploadSession) -> dict:
+    """Indexe un document reçu (exécuté dans le pool de threads)"""
     try:
-        # Vérifier l'extension
-        file_ext = Path(file.filename).suffix.lower()
-        if file_ext not in ['.pdf', '.txt', '.docx']:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Format non supporté: {file_ext}"
-            )
+        chunks, embeddings, num_characters = _prepare_upload(session)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
         
-        # Sauvegarder temporairement
-        temp_path = config.DOCUMENTS_DIR / file.filename
-        with open(temp_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+    # 3. Embeddings
+    if embeddings is None:
+        embeddings = embedding_store.encode(retriever.embedding_model, [c['content'] for c in chunks])
+    else:
+        embedding_store.add([content_hash(c['content']) for c in chunks], embeddings)
         
-        logger.info(f"📄 Document reçu: {file.filename}")
+    # 4. Indexation (les quasi-doublons sont fusionnés)
+    num_duplicates = retriever.add_to_index(embeddings, chunks)
+    
+    # 5. Sauvegarder l'index
+    retriever.save_index()
+    
+    _archive_upload(session)
+    logger.info(f"✅ Document indexé: {session.filename}")
+    
+    return {
+        "filename": session.filename,
+        "num_chunks": len(chunks),
+        "num_characters": num_characters,
+        "num_duplicates": num_duplicates,
+        "total_vectors": retriever.index.ntotal,
+        "sha256": session.sha256
+    }
+
+@profiled()
+def _index_batch(sessions: List[UploadSession]) -> List[dict]:
+    """
+    Indexe plusieurs documents en une seule passe (exécuté dans le pool de threads)
+    
+    Extraction en parallèle, puis tous les chunks sont encodés ensemble
+    en grands lots, ajoutés à l'index en une fois et sauvegardés une fois.
+    """
+    with ThreadPoolExecutor(max_workers=INGESTION_WORKERS) as pool:
+        futures = [pool.submit(_prepare_upload, session) for session in sessions]
         
-        # 1. Ingestion
-        doc_info = ingestion.process_document(temp_path)
+    results, all_chunks, prepared = [], [], []
+    num_duplicates = 0
+    for session, future in zip(sessions, futures):
+        try:
+            chunks, _, num_characters = future.result()
+        except Exception as e:
+            logger.error(f"Erreur extraction {session.filename}: {e}")
+            results.append({"filename": session.filename, "status": "error", "error": str(e)})
+            continue
+        all_chunks.extend(chunks)
+        prepared.append(session)
+        results.append({
+            "filename": session.filename,
+            "status": "indexed",
+            "num_chunks": len(chunks),
+            "num_characters": num_characters,
+            "sha256": session.sha256
+        })
         
-        # 2. Chunking
-        chunks = chunker.create_chunks_with_metadata(
-            doc_info['content'],
-            doc_info['filename']
+    if all_chunks:
+        embeddings = embedding_store.encode(
+            retriever.embedding_model,
+            [c['content'] for c in all_chunks],
+            batch_size=EMBEDDING_BATCH_SIZE
         )
+        num_duplicates = retriever.add_to_index(embeddings, all_chunks)
+        retriever.save_index()
+        for session in prepared:
+            _archive_upload(session)
+            
+    logger.info(
+        f"✅ {len(prepared)}/{len(sessions)} documents indexés "
+        f"({len(all_chunks)} chunks, {num_duplicates} quasi-doublons fusionnés)"
+    )
+    return results
+
+def _local_index_only():
+    """
+    Refuse les écritures quand la recherche passe par des nœuds (RETRIEVAL_NODES)
+    
+    L'index local du coordinateur n'est alors jamais interrogé : un
+    document indexé ici ne serait jamais retrouvé. Les documents
+    s'ajoutent à l'index de l'API avant son découpage en shards.
+    """
+    if searcher is not retriever:
+        raise HTTPException(
+            status_code=409,
+            detail="Recherche distribuée (RETRIEVAL_NODES) : l'index est en lecture seule sur le "
+                   "coordinateur ; modifier l'index puis le redécouper avec `python src/api/node.py split`"
+        )
+
+def _upload_http_error(e: Exception) -> HTTPException:
+    """Traduit une erreur d'upload en réponse HTTP"""
+    if isinstance(e, UploadNotFound):
+        return HTTPException(status_code=404, detail=str(e))
+    if isinstance(e, UploadTooLarge):
+        return HTTPException(status_code=413, detail=str(e))
+    if isinstance(e, UploadOffsetMismatch):
+        return HTTPException(
+            status_code=409,
+            detail=str(e),
+            headers={"Upload-Offset": str(e.expected)}
+        )
+    if isinstance(e, UploadError):
+        return HTTPException(status_code=409, detail=str(e))
+    return HTTPException(status_code=400, detail=str(e))
+
+def _multipart_body(field: str, multiple: bool = False) -> dict:
+    """Corps multipart documenté dans OpenAPI (le handler lit le flux brut)"""
+    schema = {"type": "string", "format": "binary"}
+    if multiple:
+        schema = {"type": "array", "items": schema}
+    return {"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+        "type": "object", "properties": {field: schema}, "required": [field]
+    }}}}}
+
+def _multipart_stream(request: Request, max_bytes: int = None) -> MultipartFileStream:
+    """
+    Parseur du corps multipart d'une requête
+    
+    Avec max_bytes, un corps annoncé (Content-Length) plus gros est
+    refusé avant d'être lu.
+    """
+    content_length = request.headers.get("content-length")
+    if max_bytes is not None and content_length and content_length.isdigit() \
+            and int(content_length) > max_bytes + MULTIPART_OVERHEAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Taille maximale dépassée ({max_bytes} octets)")
+    try:
+        return MultipartFileStream(request.headers.get("content-type"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/upload_document", openapi_extra=_multipart_body("file"),
+          dependencies=[Depends(_local_index_only)])
+async def upload_document(request: Request):
+    """
+    Upload et indexation d'un document
+    
+    Le corps multipart (champ file : PDF, DOCX ou TXT) est analysé en
+    flux et le fichier écrit directement dans son spool, sans copie
+    intermédiaire du corps. Un document trop gros est refusé (413) dès
+    l'en-tête Content-Length, ou dès que MAX_UPLOAD_BYTES est dépassé.
+    
+    Returns:
+        Informations sur le document indexé
+    """
+    parts = _multipart_stream(request, MAX_UPLOAD_BYTES)
+    session = None
+    
+    try:
+        async for data in request.stream():
+            for event, value in parts.feed(data):
+                if event == 'file':
+                    if session is not None:
+                        raise HTTPException(status_code=400, detail="Un seul fichier attendu (voir /upload_documents)")
+                    session = uploads.create(value)
+                    logger.info(f"📄 Document reçu: {session.filename}")
+                elif event == 'data':
+                    # Taille bornée, empreinte calculée au passage
+                    await run_in_threadpool(session.write, value)
+        if session is None or not parts.complete:
+            raise HTTPException(status_code=400, detail="Aucun fichier complet dans la requête")
+        return await run_in_threadpool(_index_upload, session)
         
-        # 3. Embeddings
-        chunk_texts = [c['content'] for c in chunks]
-        embeddings = retriever.embedding_model.encode(chunk_texts)
+    except HTTPException:
+        raise
+    except (UploadError, ValueError) as e:
+        raise _upload_http_error(e)
+    except Exception as e:
+        logger.error(f"Erreur upload: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if session is not None:
+            uploads.release(session.upload_id)
+
+@app.post("/upload_documents", openapi_extra=_multipart_body("files", multiple=True),
+          dependencies=[Depends(_local_index_only)])
+async def upload_documents(request: Request):
+    """
+    Upload et indexation de plusieurs documents en une requête
+    
+    Les fichiers du corps multipart (champ files) sont écrits dans leur
+    spool à mesure qu'ils arrivent ; un fichier refusé (format, taille)
+    est signalé dans le résultat sans interrompre les suivants.
+    
+    Returns:
+        Résultat par fichier et taille finale de l'index
+    """
+    parts = _multipart_stream(request)
+    results, sessions = [], {}
+    session = None
+    
+    try:
+        async for data in request.stream():
+            for event, value in parts.feed(data):
+                if event == 'file':
+                    results.append({"filename": value, "status": "error", "error": "Fichier incomplet"})
+                    try:
+                        # Pas d'encodage pendant l'upload : tout est encodé ensemble ensuite
+                        session = uploads.create(value, stream_extraction=False)
+                    except (UploadError, ValueError) as e:
+                        results[-1]["error"] = str(e)
+                        session = None
+                elif event == 'data' and session is not None:
+                    try:
+                        await run_in_threadpool(session.write, value)
+                    except UploadError as e:
+                        # Le reste de ce fichier est ignoré
+                        results[-1]["error"] = str(e)
+                        uploads.release(session.upload_id)
+                        session = None
+                elif event == 'end' and session is not None:
+                    sessions[len(results) - 1] = session
+                    session = None
+                    
+        if sessions:
+            indexed = await run_in_threadpool(_index_batch, list(sessions.values()))
+            for i, result in zip(sessions, indexed):
+                results[i] = result
+                
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Erreur upload multiple: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        for pending in list(sessions.values()) + [session]:
+            if pending is not None:
+                uploads.release(pending.upload_id)
+                
+    return {
+        "documents": results,
+        "num_indexed": sum(1 for r in results if r["status"] == "indexed"),
+        "total_vectors": retriever.index.ntotal if retriever.index else 0
+    }
+
+# =========================
+# Uploads en plusieurs morceaux (reprise possible)
+# =========================
+
+@app.post("/uploads", dependencies=[Depends(_local_index_only)])
+def create_upload(request: UploadInitRequest):
+    """
+    Ouvre un upload en plusieurs morceaux
+    
+    Le client envoie ensuite le contenu avec PATCH /uploads/{upload_id}
+    (en-tête Upload-Offset), puis appelle POST /uploads/{upload_id}/complete.
+    """
+    try:
+        session = uploads.create(request.filename, total_size=request.total_size)
+    except (UploadError, ValueError) as e:
+        raise _upload_http_error(e)
         
-        # 4. Indexation
-        retriever.add_to_index(embeddings, chunks)
+    return {
+        "upload_id": session.upload_id,
+        "offset": session.offset,
+        "max_bytes": uploads.max_bytes
+    }
+
+@app.head("/uploads/{upload_id}")
+@app.get("/uploads/{upload_id}")
+def upload_status(upload_id: str):
+    """Position atteinte par un upload (pour reprendre après une coupure)"""
+    try:
+        session = uploads.get(upload_id)
+    except UploadError as e:
+        raise _upload_http_error(e)
         
-        # 5. Sauvegarder l'index
-        retriever.save_index()
+    return JSONResponse(
+        {
+            "upload_id": upload_id,
+            "filename": session.filename,
+            "offset": session.offset,
+            "total_size": session.total_size
+        },
+        headers={"Upload-Offset": str(session.offset)}
+    )
+
+@app.patch("/uploads/{upload_id}", dependencies=[Depends(_local_index_only)])
+async def append_upload(upload_id: str, request: Request):
+    """
+    Ajoute des octets à un upload
+    
+    Le corps est lu en flux et écrit morceau par morceau : une coupure
+    en cours de route conserve tout ce qui a été reçu, et le client
+    reprend à l'offset renvoyé par GET /uploads/{upload_id}.
+    """
+    try:
+        session = uploads.get(upload_id)
+        offset = int(request.headers["Upload-Offset"]) if "Upload-Offset" in request.headers else None
+    except (UploadError, ValueError) as e:
+        raise _upload_http_error(e)
         
-        logger.info(f"✅ Document indexé: {file.filename}")
+    if not session.writer.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="Un envoi est déjà en cours pour cet upload")
+    try:
+        async for data in request.stream():
+            if data:
+                await run_in_threadpool(session.write, data, offset)
+                offset = None
+    except UploadError as e:
+        raise _upload_http_error(e)
+    finally:
+        session.writer.release()
         
-        return {
-            "filename": doc_info['filename'],
-            "num_chunks": len(chunks),
-            "num_characters": doc_info['num_characters'],
-            "total_vectors": retriever.index.ntotal
-        }
+    return JSONResponse(
+        {"upload_id": upload_id, "offset": session.offset},
+        headers={"Upload-Offset": str(session.offset)}
+    )
+
+@app.post("/uploads/{upload_id}/complete", dependencies=[Depends(_local_index_only)])
+def complete_upload(upload_id: str, request: UploadCompleteRequest = None):
+    """Termine un upload, vérifie son empreinte et indexe le document"""
+    try:
+        session = uploads.get(upload_id)
+    except UploadError as e:
+        raise _upload_http_error(e)
+        
+    if session.total_size is not None and session.offset != session.total_size:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Upload incomplet : {session.offset}/{session.total_size} octets",
+            headers={"Upload-Offset": str(session.offset)}
+        )
+    if request is not None and request.sha256 and request.sha256.lower() != session.sha256:
+        uploads.release(upload_id)
+        raise HTTPException(status_code=422, detail="Empreinte SHA-256 différente : upload à recommencer")
         
+    try:
+        return _index_upload(session)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erreur upload: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        uploads.release(upload_id)
+
+@app.delete("/uploads/{upload_id}")
+def cancel_upload(upload_id: str):
+    """Abandonne un upload et supprime son fichier temporaire"""
+    try:
+        uploads.get(upload_id)
+    except UploadError as e:
+        raise _upload_http_error(e)
+    uploads.release(upload_id)
+    return {"message": "Upload annulé", "upload_id": upload_id}
 
 @app.get("/list_documents")
-def list_documents():
-    """Liste les documents indexés"""
-    if not retriever.metadata:
-        return {"documents": [], "total": 0}
-    
-    # Grouper par document
-    docs_info = {}
-    for meta in retriever.metadata:
-        doc_name = meta['document_name']
-        if doc_name not in docs_info:
-            docs_info[doc_name] = {
-                'filename': doc_name,
-                'num_chunks': 0,
-                'total_characters': 0
-            }
-        docs_info[doc_name]['num_chunks'] += 1
-        docs_info[doc_name]['total_characters'] += meta.get('num_characters', 0)
+def list_documents(request: Request, offset: int = 0, limit: int = 100, search: Optional[str] = None):
+    """
+    Liste les documents indexés
     
+    Le catalogue est tenu à jour à chaque modification de l'index : la
+    liste ne reparcourt pas les chunks. Avec If-None-Match, un catalogue
+    inchangé répond 304 sans corps.
+    
+    Args:
+        offset: Position du premier document
+        limit: Nombre maximal de documents (1 à 1000)
+        search: Filtre sur le nom du document
+    """
+    if offset < 0 or not 1 <= limit <= 1000:
+        raise HTTPException(status_code=400, detail="Pagination invalide (offset >= 0, 1 <= limit <= 1000)")
+        
+    catalogue = retriever.catalogue
+    headers = {"ETag": catalogue.etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == catalogue.etag:
+        return Response(status_code=304, headers=headers)
+        
+    documents, total = catalogue.page(offset, limit, search)
+    # Sujet, mots-clés et résumé calculés à l'ingestion
+    topics = retriever.topics
+    documents = [
+        {**document, **{k: v for k, v in topics.documents.get(document['filename'], {}).items() if k != 'document_name'}}
+        for document in documents
+    ]
+    return DefaultResponse({
+        "documents": documents,
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "total_chunks": catalogue.total_chunks
+    }, headers=headers)
+
+@app.get("/documents/{document_name}/summary")
+def document_summary(document_name: str):
+    """Sujet, mots-clés et résumé extractif d'un document et de chacune de ses sections"""
+    description = retriever.topics.describe(document_name)
+    if description is None:
+        raise HTTPException(status_code=404, detail=f"Document non indexé : {document_name}")
+    return description
+
+@app.delete("/documents/{document_name}", dependencies=[Depends(_local_index_only)])
+def delete_document(document_name: str):
+    """Retire un document de l'index (reconstruit sans réencoder les autres chunks)"""
+    try:
+        removed = retriever.remove_document(
+            document_name,
+            lambda kept: embedding_store.encode(
+                retriever.embedding_model,
+                [m['content'] for m in kept],
+                batch_size=EMBEDDING_BATCH_SIZE
+            )
+        )
+    except Exception as e:
+        logger.error(f"Erreur suppression {document_name}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+        
+    if not removed:
+        raise HTTPException(status_code=404, detail=f"Document non indexé : {document_name}")
+    retriever.save_index()
     return {
-        "documents": list(docs_info.values()),
-        "total": len(docs_info)
+        "message": "Document retiré",
+        "document": document_name,
+        "num_chunks": removed,
+        "total_vectors": retriever.index.ntotal if retriever.index else 0
     }
 
 @app.post("/query", response_model=QueryResponse)
-def query_system(request: QueryRequest):
+async def query_system(request: QueryRequest, http_request: Request):
     """
     Pose une question au système RAG
     
+    La requête passe d'abord par le contrôle d'admission : elle attend
+    son tour dans une file bornée (priorité, équité entre clients), est
+    refusée immédiatement si la file est pleine, ou servie sans
+    génération si l'attente dépasse l'échéance.
+    
     Args:
         request: Question et paramètres
         
     Returns:
         Réponse générée avec sources
     """
+    if not request.question.strip():
+        raise HTTPException(status_code=400, detail="Question vide")
     try:
-        if not request.question.strip():
-            raise HTTPException(status_code=400, detail="Question vide")
+        select_fields(dict.fromkeys(QueryResponse.model_fields), request.fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
         
+    client = http_request.client
+    client_id = http_request.headers.get("X-Client-Id") or (client.host if client else "anonyme")
+    
+    try:
+        with metrics.stage('queue'):
+            ticket = await admission.acquire(client_id, request.priority)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+        
+    answer_mode = request.answer_mode
+    if ticket.degraded and answer_mode in ('auto', 'generate'):
+        answer_mode = QUERY_DEGRADED_MODE
+        
+    try:
+        return await run_in_threadpool(_shaped_answer, request, answer_mode)
+    finally:
+        admission.release(ticket)
+
+@profiled()
+def _shaped_answer(request: QueryRequest, answer_mode: str):
+    """Réponse à la question, allégée selon les options de la requête"""
+    response = _answer_query(request, answer_mode)
+    if request.fields is None and request.include_content and request.snippet_chars <= 0:
+        return response
+        
+    payload = response.model_dump()
+    if request.fields is None or 'retrieved_chunks' in request.fields:
+        payload['retrieved_chunks'] = shape_chunks(
+            response.retrieved_chunks,
+            include_content=request.include_content,
+            snippet_chars=request.snippet_chars,
+            pattern=compile_terms(query_terms(request.question))
+        )
+    return DefaultResponse(select_fields(payload, request.fields))
+
+def _answer_query(request: QueryRequest, answer_mode: str) -> QueryResponse:
+    """Recherche et réponse (exécuté dans le pool de threads)"""
+    try:
         logger.info(f"🔍 Question reçue: {request.question[:50]}...")
         
-        # 1. Recherche
-        retrieved_chunks = retriever.search(request.question, top_k=request.top_k)
+        # 1. Type de question : mots-clés, sinon embedding de la question
+        # (le même que pour la recherche, aucun appel modèle en plus)
+        query_embedding = retriever.encode_query(request.question)
+        question_type = question_classifier.classify(request.question, query_embedding)
         
+        # 2. Question de suivi : contexte de l'échange précédent, sans recherche
+        previous = conversations.last_turn(request.session_id) if request.session_id else None
+        follow_up = is_follow_up(request.question, query_embedding, previous, CONVERSATION_TOPIC_THRESHOLD)
+        if previous is not None:
+            metrics.record_cache_lookup('conversation', follow_up)
+            
+        if follow_up:
+            retrieved_chunks = previous.chunks[:request.top_k]
+            topic_question, topic_embedding = previous.topic_question, previous.topic_embedding
+            # Le sujet accompagne la relance ("Un exemple ?") pour la génération
+            question = f"{request.question} (sujet : {topic_question})"
+            scoring_embedding = query_embedding.reshape(-1) + topic_embedding
+            logger.info(f"Question de suivi, sujet : {topic_question[:50]}")
+        else:
+            queries = (
+                learning_config.expand_question(request.question, question_type)
+                if request.multi_query else [request.question]
+            )
+            if len(queries) > 1:
+                logger.info(f"Sous-requêtes : {queries[1:]}")
+                retrieved_chunks = searcher.search_multi(queries, top_k=request.top_k, query_embedding=query_embedding)
+            else:
+                retrieved_chunks = searcher.search_by_vector(query_embedding, top_k=request.top_k)
+            topic_question, topic_embedding = request.question, query_embedding
+            question, scoring_embedding = request.question, query_embedding
+            
+            # Seuls les chunks au-dessus du seuil de pertinence sont gardés
+            if relevance_gate is not None and retrieved_chunks:
+                retrieved_chunks = relevance_gate.filter(retrieved_chunks)
+                metrics.RELEVANCE_GATE.labels(result='passed' if retrieved_chunks else 'rejected').inc()
+                
         if not retrieved_chunks:
+            # Rien de pertinent : pas de génération
+            result = generator._handle_no_context(request.question)
             return QueryResponse(
-                answer="Je n'ai pas trouvé d'information pertinente dans les documents.",
+                answer=result['answer'],
                 retrieved_chunks=[],
                 sources=[],
-                context_used=0
+                context_used=0,
+                question_type=question_type,
+                learning_level=request.learning_level,
+                follow_up_suggestions=result['follow_up_suggestions'],
+                answer_mode='no_context',
+                session_id=request.session_id
             )
-        
-        # 2. Génération
-        result = generator.generate_answer(request.question, retrieved_chunks)
+            
+        if answer_mode == 'retrieval':
+            response = QueryResponse(
+                answer="Réponse rédigée indisponible (forte charge) : voici les passages du cours les plus pertinents.",
+                retrieved_chunks=retrieved_chunks,
+                sources=generator._format_sources(retrieved_chunks),
+                context_used=len(retrieved_chunks),
+                question_type=question_type,
+                learning_level=request.learning_level,
+                answer_mode='retrieval',
+                session_id=request.session_id,
+                follow_up=follow_up
+            )
+            _remember_turn(request, response, topic_question, topic_embedding)
+            return response
+            
+        # 3. Génération, ou extraction si demandée ou si le LLM est saturé
+        if answer_mode == 'extractive':
+            acquired = False
+        elif answer_mode == 'generate':
+            acquired = generation_slots.acquire()
+        else:
+            acquired = generation_slots.acquire(blocking=False)
+            
+        if acquired:
+            try:
+                result = generator.generate_pedagogical_answer(
+                    question,
+                    retrieved_chunks,
+                    learning_level=request.learning_level,
+                    question_type=question_type
+                )
+            finally:
+                generation_slots.release()
+            answer_mode = 'generate'
+        else:
+            result = generator.generate_extractive_answer(
+                question,
+                retrieved_chunks,
+                extractive_answerer,
+                scoring_embedding,
+                learning_level=request.learning_level,
+                question_type=question_type
+            )
+            answer_mode = 'extractive'
         
         logger.info(f"✅ Réponse générée avec {result['context_used']} chunks")
         
-        return QueryResponse(
+        response = QueryResponse(
             answer=result['answer'],
             retrieved_chunks=retrieved_chunks,
             sources=result['sources'],
-            context_used=result['context_used']
+            context_used=result['context_used'],
+            question_type=result['question_type'],
+            learning_level=result['learning_level'],
+            follow_up_suggestions=result['follow_up_suggestions'],
+            truncated=result.get('truncated', False),
+            answer_mode=answer_mode,
+            session_id=request.session_id,
+            follow_up=follow_up
         )
+        _remember_turn(request, response, topic_question, topic_embedding)
+        return response
         
+    except HTTPException:
+        raise
+    except ShardUnavailable as e:
+        logger.error(f"Recherche distribuée indisponible : {e}")
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Erreur query: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.delete("/clear_index")
+def _remember_turn(request: QueryRequest, response: QueryResponse, topic_question: str, topic_embedding):
+    """Enregistre l'échange dans la session de conversation, s'il y en a une"""
+    if not request.session_id:
+        return
+    try:
+        conversations.add_turn(
+            request.session_id,
+            request.question,
+            response.answer,
+            response.question_type,
+            response.follow_up,
+            topic_question,
+            topic_embedding,
+            response.retrieved_chunks
+        )
+    except Exception as e:
+        # L'historique ne doit jamais faire échouer la réponse
+        logger.error(f"Erreur enregistrement session {request.session_id}: {e}")
+
+@app.get("/sessions/{session_id}")
+def get_session_history(session_id: str):
+    """Historique d'une session de conversation"""
+    turns = conversations.history(session_id)
+    if not turns:
+        raise HTTPException(status_code=404, detail="Session inconnue ou expirée")
+    return {"session_id": session_id, "turns": turns}
+
+@app.delete("/sessions/{session_id}")
+def delete_session(session_id: str):
+    """Supprime une session de conversation"""
+    if not conversations.delete(session_id):
+        raise HTTPException(status_code=404, detail="Session inconnue ou expirée")
+    return {"message": "Session supprimée", "session_id": session_id}
+
+@app.get("/admin/relevance")
+def relevance_calibration():
+    """Seuil de pertinence en vigueur et distribution des scores hors sujet"""
+    if relevance_gate is None:
+        return {"enabled": False}
+    try:
+        return {"enabled": True, **(relevance_gate.calibration() or {})}
+    except Exception as e:
+        logger.error(f"Erreur calibration pertinence: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _require_profiler() -> Profiler:
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="Profilage désactivé (PROFILING_ENABLED)")
+    return profiler
+
+@app.post("/admin/profiling/arm")
+def arm_profiling(requests: int = Query(10, ge=0, le=1000)):
+    """Profile les prochaines requêtes (0 pour annuler)"""
+    _require_profiler().arm(requests)
+    return {"armed": requests}
+
+@app.get("/admin/profiling/hot")
+def hot_functions(limit: int = Query(25, ge=1, le=200), sort: Literal['cumulative', 'total'] = 'cumulative'):
+    """Fonctions du paquet modules les plus coûteuses, sur toutes les requêtes profilées"""
+    return _require_profiler().hot_functions(limit, sort)
+
+@app.get("/admin/profiling/captures")
+def list_captures():
+    """Dernières requêtes profilées"""
+    return {"captures": _require_profiler().captures()}
+
+@app.get("/admin/profiling/captures/{capture_id}")
+def get_capture(capture_id: int, format: Literal['pstats', 'text'] = 'pstats'):
+    """Profil d'une requête : fichier pstats (snakeviz, flameprof) ou texte"""
+    current = _require_profiler()
+    if format == 'text':
+        text = current.capture_text(capture_id)
+        if text is None:
+            raise HTTPException(status_code=404, detail="Capture inconnue")
+        return Response(content=text, media_type="text/plain; charset=utf-8")
+    data = current.capture_stats(capture_id)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Capture inconnue")
+    return Response(
+        content=data,
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="query-{capture_id}.prof"'}
+    )
+
+@app.delete("/admin/profiling")
+def reset_profiling():
+    """Vide les captures et l'agrégat"""
+    _require_profiler().reset()
+    return {"message": "Profils effacés"}
+
+@app.get("/admin/profiling/flamegraph")
+def capture_flamegraph(seconds: float = Query(10, gt=0, le=60), interval_ms: float = Query(5, ge=1, le=100)):
+    """
+    Échantillonne les piles de tous les threads pendant `seconds`
+    
+    Format « piles repliées » : flamegraph.pl, speedscope.
+    """
+    _require_profiler()
+    stacks = sample_stacks(seconds, interval_ms / 1000)
+    return Response(content=stacks, media_type="text/plain; charset=utf-8")
+
+@app.post("/admin/profiling/memory")
+def start_memory_profiling(frames: int = Query(1, ge=1, le=25)):
+    """Démarre tracemalloc (ralentit les allocations jusqu'à l'arrêt)"""
+    _require_profiler()
+    start_memory_tracing(frames)
+    return {"tracing": True}
+
+@app.delete("/admin/profiling/memory")
+def stop_memory_profiling():
+    _require_profiler()
+    stop_memory_tracing()
+    return {"tracing": False}
+
+@app.get("/admin/profiling/memory")
+def memory_snapshot(limit: int = Query(20, ge=1, le=200)):
+    """
+    Instantané mémoire : allocations Python par fichier, croissance depuis
+    l'instantané précédent, taille de l'index et mémoire résidente
+    """
+    current = _require_profiler()
+    try:
+        report = current.memory_snapshot(limit)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    num_vectors = retriever.index.ntotal if retriever.index else 0
+    report["index"] = {
+        "vectors": num_vectors,
+        "vector_bytes": num_vectors * retriever.dimension * 4,
+        "metadata_chunks": len(retriever.metadata),
+        "documents": len(retriever.catalogue)
+    }
+    report["rss_bytes"] = process_rss()
+    return report
+
+@app.get("/admin/shards")
+def shard_status():
+    """Nœuds de la recherche distribuée et leur état"""
+    if searcher is retriever:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        "deadline_seconds": RETRIEVAL_DEADLINE_SECONDS,
+        "shards": searcher.status()
+    }
+
+@app.get("/admin/dedup_report")
+def deduplication_report():
+    """Chunks fusionnés avec un quasi-doublon et place économisée dans l'index"""
+    return {"enabled": retriever.deduplicator is not None, **dedup_report(retriever.metadata, retriever.dimension)}
+
+@app.post("/admin/reload")
+def reload_index(background_tasks: BackgroundTasks):
+    """
+    Recharge l'index depuis le disque en arrière-plan
+    
+    Les recherches en cours se terminent sur l'ancienne version ;
+    la nouvelle est publiée par échange atomique une fois construite.
+    """
+    background_tasks.add_task(_reload_index_in_background)
+    return {
+        "message": "Rechargement programmé",
+        "current_version": retriever.version
+    }
+
+def _reload_index_in_background():
+    try:
+        if retriever.reload_index():
+            logger.info(f"🔄 Index rechargé (version {retriever.version})")
+    except Exception as e:
+        logger.error(f"Erreur rechargement index: {e}")
+
+@app.post("/admin/rebuild_index", dependencies=[Depends(_local_index_only)])
+def rebuild_index(index_type: Optional[str] = None):
+    """
+    Reconstruit l'index (éventuellement d'un autre type) sans réencoder
+    
+    Les embeddings viennent du stockage disque ; seuls les chunks qui
+    n'y figurent pas encore passent par le modèle.
+    """
+    try:
+        metadata = retriever.metadata
+        if not metadata:
+            raise HTTPException(status_code=400, detail="Index vide")
+            
+        start = time.perf_counter()
+        embeddings = embedding_store.encode(
+            retriever.embedding_model,
+            [m['content'] for m in metadata],
+            batch_size=EMBEDDING_BATCH_SIZE
+        )
+        retriever.rebuild_index(embeddings, index_type)
+        retriever.save_index()
+        
+        return {
+            "index_type": retriever.index_type,
+            "total_vectors": retriever.index.ntotal,
+            "version": retriever.version,
+            "seconds": round(time.perf_counter() - start, 3)
+        }
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Erreur reconstruction index: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.delete("/clear_index", dependencies=[Depends(_local_index_only)])
 def clear_index():
     """Vide complètement l'index"""
     try:
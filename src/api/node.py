@@ -0,0 +1,149 @@
+"""
+Nœud de recherche : sert la recherche d'un shard de l'index pour le
+coordinateur de l'API (RETRIEVAL_NODES, voir modules/distributed.py)
+
+Découpage de l'index de l'API en shards, document par document :
+    python src/api/node.py split --shards 3 --output data/shards
+
+Un processus par shard :
+    NODE_INDEX_PATH=data/shards/0/faiss.index NODE_METADATA_PATH=data/shards/0/metadata.json \\
+        uvicorn src.api.node:app --port 8101
+"""
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+from pathlib import Path
+from typing import List
+import argparse
+import logging
+import os
+import sys
+import numpy as np
+
+# Ajouter le chemin des modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from modules.retrieval import FAISSRetriever, configure_search_threads
+from modules.config import config
+from modules import metrics
+
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+except ImportError:
+    DefaultResponse = JSONResponse
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Fichiers du shard servi par ce nœud
+NODE_INDEX_PATH = Path(os.getenv("NODE_INDEX_PATH", str(config.FAISS_INDEX_PATH)))
+NODE_METADATA_PATH = Path(os.getenv("NODE_METADATA_PATH", str(config.METADATA_PATH)))
+# Intervalle (secondes) de surveillance des fichiers du shard, 0 pour désactiver
+INDEX_WATCH_INTERVAL = float(os.getenv("INDEX_WATCH_INTERVAL", "5"))
+# Threads OpenMP par recherche FAISS (même réglage que l'API)
+FAISS_OMP_THREADS = int(os.getenv("FAISS_OMP_THREADS", "1"))
+# Embeddings acceptés par requête (sous-requêtes d'une question)
+NODE_MAX_VECTORS = 32
+
+configure_search_threads(FAISS_OMP_THREADS)
+
+app = FastAPI(
+    title="RAG Search Node",
+    description="Recherche FAISS d'un shard de l'index",
+    version="1.0.0",
+    default_response_class=DefaultResponse
+)
+
+# Sections présélectionnées avant la recherche des chunks (0, défaut : tous les chunks)
+COARSE_SECTIONS = int(os.getenv("COARSE_SECTIONS", "0"))
+
+retriever = FAISSRetriever(index_type=os.getenv("FAISS_INDEX_TYPE", "flat"), coarse_sections=COARSE_SECTIONS)
+
+class SearchRequest(BaseModel):
+    vectors: List[List[float]] = Field(..., min_length=1, max_length=NODE_MAX_VECTORS)
+    top_k: int = Field(5, ge=1, le=100)
+
+@app.on_event("startup")
+def load_shard():
+    """Charge le shard et surveille ses mises à jour"""
+    try:
+        retriever.reload_index(NODE_INDEX_PATH, NODE_METADATA_PATH)
+    except Exception as e:
+        logger.warning(f"Shard non chargé : {e}")
+    if INDEX_WATCH_INTERVAL > 0:
+        retriever.start_watching(INDEX_WATCH_INTERVAL, NODE_INDEX_PATH, NODE_METADATA_PATH)
+
+@app.on_event("shutdown")
+def stop_watching():
+    retriever.stop_watching()
+
+@app.post("/search")
+def search(request: SearchRequest):
+    """Top-k du shard pour chaque embedding (normalisé) reçu"""
+    vectors = np.asarray(request.vectors, dtype='float32')
+    if vectors.ndim != 2 or vectors.shape[1] != retriever.dimension:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Embeddings de dimension {retriever.dimension} attendus"
+        )
+    try:
+        results = retriever.search_vectors(vectors, top_k=request.top_k)
+    except ValueError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"results": results, "index_version": retriever.version}
+
+@app.get("/health")
+def health_check():
+    return {
+        "status": "healthy",
+        "num_vectors": retriever.index.ntotal if retriever.index else 0,
+        "index_version": retriever.version,
+        "documents": len(retriever.catalogue),
+        "dimension": retriever.dimension,
+        "embedding_model": retriever.embedding_model.model_name
+    }
+
+@app.get("/metrics")
+def prometheus_metrics():
+    return Response(content=metrics.export_metrics(), media_type=metrics.METRICS_CONTENT_TYPE)
+
+def split_index(num_shards: int, output_dir: Path):
+    """Découpe l'index de l'API en shards (un document n'est jamais coupé)"""
+    from modules.distributed import split_by_document
+    from modules.embedding_store import EmbeddingStore
+    
+    retriever.load_index()
+    metadata = retriever.metadata
+    # Embeddings déjà calculés à l'ingestion : rien n'est réencodé
+    store = EmbeddingStore(
+        Path(os.getenv("EMBEDDING_STORE_DIR", str(config.FAISS_INDEX_PATH.parent / "embeddings"))),
+        retriever.embedding_model.model_name,
+        retriever.dimension
+    )
+    embeddings = store.encode(retriever.embedding_model, [m['content'] for m in metadata])
+    
+    for i, positions in enumerate(split_by_document(metadata, num_shards)):
+        shard = FAISSRetriever(retriever.index_type, embedding_model=retriever.embedding_model)
+        if positions:
+            shard.create_index(embeddings[positions], [metadata[p] for p in positions])
+        else:
+            shard.clear_index()
+        shard_dir = output_dir / str(i)
+        shard_dir.mkdir(parents=True, exist_ok=True)
+        shard.save_index(shard_dir / NODE_INDEX_PATH.name, shard_dir / NODE_METADATA_PATH.name)
+        logger.info(f"Shard {i} : {len(positions)} chunks, {len(shard.catalogue)} documents")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Nœud de recherche distribuée")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    split = subcommands.add_parser("split", help="Découpe l'index de l'API en shards")
+    split.add_argument("--shards", type=int, required=True)
+    split.add_argument("--output", type=Path, default=config.FAISS_INDEX_PATH.parent / "shards")
+    args = parser.parse_args()
+    
+    if args.command == "split":
+        split_index(args.shards, args.output)
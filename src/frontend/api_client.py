@@ -0,0 +1,145 @@
+"""
+Client HTTP de l'interface Streamlit : session poolée, délais, cache
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import streamlit as st
+
+# docker-compose fournit l'URL du service API
+API_URL = os.getenv("API_URL", "http://127.0.0.1:8000").rstrip("/")
+
+# Délais (connexion, lecture) en secondes
+CONNECT_TIMEOUT = 3.05
+HEALTH_TIMEOUT = (CONNECT_TIMEOUT, 3)
+CATALOGUE_TIMEOUT = (CONNECT_TIMEOUT, 10)
+QUERY_TIMEOUT = (CONNECT_TIMEOUT, float(os.getenv("QUERY_TIMEOUT", "120")))
+UPLOAD_TIMEOUT = (CONNECT_TIMEOUT, float(os.getenv("UPLOAD_TIMEOUT", "600")))
+
+# Durée de vie (secondes) de l'état et du catalogue affichés dans la barre latérale
+OVERVIEW_TTL = int(os.getenv("FRONTEND_CACHE_TTL", "30"))
+
+# Champs de /query affichés par l'interface : pas de texte des chunks
+QUERY_FIELDS = ["answer", "sources", "question_type", "follow_up_suggestions"]
+
+class ApiUnavailable(Exception):
+    """L'API ne répond pas"""
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    """
+    Session partagée par tous les reruns et utilisateurs
+    
+    Les connexions keep-alive sont réutilisées au lieu d'ouvrir une
+    connexion TCP par appel ; seules les lectures (GET) sont rejouées
+    après une erreur de connexion.
+    """
+    session = requests.Session()
+    retry = Retry(total=2, connect=2, read=0, backoff_factor=0.2, allowed_methods=frozenset({"GET", "HEAD"}))
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+@st.cache_resource
+def _get_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="api-client")
+
+# Dernière version du catalogue reçue, pour les requêtes conditionnelles
+_catalogue_lock = threading.Lock()
+_catalogue: Dict[str, Tuple[str, Dict]] = {}
+
+def _get_health(session: requests.Session) -> Dict:
+    response = session.get(f"{API_URL}/health", timeout=HEALTH_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+def _get_documents(session: requests.Session, search: str = None) -> Dict:
+    """Catalogue des documents ; un catalogue inchangé revient en 304 sans corps"""
+    key = search or ""
+    with _catalogue_lock:
+        etag, cached = _catalogue.get(key, (None, None))
+    headers = {"If-None-Match": etag} if etag else {}
+    params = {"search": search} if search else {}
+    
+    response = session.get(
+        f"{API_URL}/list_documents", params=params, headers=headers, timeout=CATALOGUE_TIMEOUT
+    )
+    if response.status_code == 304 and cached is not None:
+        return cached
+    response.raise_for_status()
+    
+    documents = response.json()
+    if response.headers.get("ETag"):
+        with _catalogue_lock:
+            _catalogue[key] = (response.headers["ETag"], documents)
+    return documents
+
+@st.cache_data(ttl=OVERVIEW_TTL, show_spinner=False)
+def fetch_overview(search: str = None) -> Tuple[Dict, Optional[Dict]]:
+    """
+    État de l'API et catalogue, récupérés en parallèle
+    
+    Mis en cache OVERVIEW_TTL secondes : les reruns (chaque interaction
+    avec un widget) ne font aucun appel réseau. Une API hors ligne lève
+    ApiUnavailable, qui n'est pas mis en cache.
+    
+    Returns:
+        (état de /health, catalogue ou None si indisponible)
+    """
+    # Ressources Streamlit obtenues ici : les threads n'ont pas de contexte de script
+    session, executor = get_session(), _get_executor()
+    health = executor.submit(_get_health, session)
+    documents = executor.submit(_get_documents, session, search)
+    try:
+        health_data = health.result()
+    except requests.RequestException as e:
+        raise ApiUnavailable(str(e)) from e
+    try:
+        return health_data, documents.result()
+    except requests.RequestException:
+        return health_data, None
+
+def invalidate_overview():
+    """À appeler après toute modification de l'index (upload, réinitialisation)"""
+    fetch_overview.clear()
+
+def ask(question: str, top_k: int, learning_level: str, session_id: str = None) -> requests.Response:
+    """
+    Pose une question (seuls les champs affichés sont demandés)
+    
+    Avec session_id, l'API garde le fil de la conversation : une
+    question de suivi réutilise le contexte de la précédente.
+    """
+    return get_session().post(
+        f"{API_URL}/query",
+        json={
+            "question": question,
+            "top_k": top_k,
+            "learning_level": learning_level,
+            "fields": QUERY_FIELDS,
+            "session_id": session_id
+        },
+        timeout=QUERY_TIMEOUT
+    )
+
+def upload_document(filename: str, file, mime_type: str) -> requests.Response:
+    """Envoie un cours à indexer"""
+    response = get_session().post(
+        f"{API_URL}/upload_document",
+        files={"file": (filename, file, mime_type)},
+        timeout=UPLOAD_TIMEOUT
+    )
+    if response.ok:
+        invalidate_overview()
+    return response
+
+def clear_index() -> requests.Response:
+    """Vide l'index"""
+    response = get_session().delete(f"{API_URL}/clear_index", timeout=CATALOGUE_TIMEOUT)
+    invalidate_overview()
+    return response
@@ -1,7 +1,15 @@
 import streamlit as st
-import requests
 from pathlib import Path
+import sys
 import time
+import uuid
+import api_client
+from api_client import ApiUnavailable
+
+# Ajouter le chemin des modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from modules.learning_config import learning_config
 
 # -------------------------
 # Configuration
@@ -13,8 +21,6 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-API_URL = "http://127.0.0.1:8000"
-
 # -------------------------
 # CSS Personnalisé
 # -------------------------
@@ -81,6 +87,9 @@ if 'conversation_history' not in st.session_state:
     st.session_state.conversation_history = []
 if 'learning_level' not in st.session_state:
     st.session_state.learning_level = 'intermediate'
+if 'session_id' not in st.session_state:
+    # Fil de conversation côté API (questions de suivi)
+    st.session_state.session_id = uuid.uuid4().hex
 
 # -------------------------
 # Header
@@ -94,19 +103,18 @@ st.markdown('<p class="sub-header">Votre assistant pédagogique intelligent</p>'
 with st.sidebar:
     st.header("⚙️ Configuration")
     
-    # Health check
+    # Health check et catalogue : un seul appel parallèle, mis en cache
     try:
-        r = requests.get(f"{API_URL}/health", timeout=3)
-        if r.status_code == 200:
-            data = r.json()
-            st.success("✅ Système opérationnel")
-            
-            col1, col2 = st.columns(2)
-            with col1:
-                st.metric("📚 Documents", data.get("num_vectors", 0))
-            with col2:
-                st.metric("🎓 Niveau", st.session_state.learning_level.title())
-    except:
+        data, docs = api_client.fetch_overview()
+        st.success("✅ Système opérationnel")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("📚 Documents", data.get("num_vectors", 0))
+        with col2:
+            st.metric("🎓 Niveau", st.session_state.learning_level.title())
+    except ApiUnavailable:
+        data, docs = None, None
         st.error("❌ API hors ligne")
     
     st.divider()
@@ -144,24 +152,22 @@ with st.sidebar:
     
     # Documents indexés
     st.subheader("📚 Cours indexés")
-    try:
-        docs = requests.get(f"{API_URL}/list_documents").json()
-        if docs["total"] > 0:
-            for doc in docs["documents"]:
-                with st.expander(f"📄 {doc['filename']}"):
-                    st.write(f"📊 Sections : {doc['num_chunks']}")
-                    st.write(f"📝 Caractères : {doc['total_characters']:,}")
-        else:
-            st.info("Aucun cours indexé")
-    except:
+    if docs is None:
         st.warning("Impossible de charger les cours")
+    elif docs["total"] > 0:
+        for doc in docs["documents"]:
+            with st.expander(f"📄 {doc['filename']}"):
+                st.write(f"📊 Sections : {doc['num_chunks']}")
+                st.write(f"📝 Caractères : {doc['total_characters']:,}")
+    else:
+        st.info("Aucun cours indexé")
     
     st.divider()
     
     # Actions
     if st.button("🗑️ Réinitialiser l'index"):
         try:
-            requests.delete(f"{API_URL}/clear_index")
+            api_client.clear_index()
             st.success("Index réinitialisé")
             st.rerun()
         except:
@@ -169,6 +175,7 @@ with st.sidebar:
     
     if st.button("🔄 Nouvelle session"):
         st.session_state.conversation_history = []
+        st.session_state.session_id = uuid.uuid4().hex
         st.rerun()
 
 # =========================
@@ -186,16 +193,10 @@ with tab1:
     st.markdown("### ❓ Votre question")
     
     # Suggestions de questions
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        if st.button("💡 C'est quoi ... ?"):
-            st.session_state.example_question = "C'est quoi le machine learning ?"
-    with col2:
-        if st.button("🔍 Comment ... ?"):
-            st.session_state.example_question = "Comment fonctionne un réseau de neurones ?"
-    with col3:
-        if st.button("📋 Exemple de ... ?"):
-            st.session_state.example_question = "Donne-moi un exemple d'algorithme supervisé"
+    for column, (label, suggestion) in zip(st.columns(3), learning_config.SUGGESTED_QUESTIONS):
+        with column:
+            if st.button(label):
+                st.session_state.example_question = suggestion
     
     # Question principale
     question = st.text_area(
@@ -217,12 +218,8 @@ with tab1:
         with st.spinner("🤔 Recherche et analyse en cours..."):
             try:
                 # Appel API
-                response = requests.post(
-                    f"{API_URL}/query",
-                    json={
-                        "question": question,
-                        "top_k": top_k
-                    }
+                response = api_client.ask(
+                    question, top_k, st.session_state.learning_level, st.session_state.session_id
                 )
                 
                 if response.status_code == 200:
@@ -309,8 +306,7 @@ with tab2:
         if st.button("🚀 Indexer le cours", type="primary"):
             with st.spinner("⏳ Indexation en cours..."):
                 try:
-                    files = {"file": (uploaded_file.name, uploaded_file, uploaded_file.type)}
-                    r = requests.post(f"{API_URL}/upload_document", files=files)
+                    r = api_client.upload_document(uploaded_file.name, uploaded_file, uploaded_file.type)
                     
                     if r.status_code == 200:
                         data = r.json()
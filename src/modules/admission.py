@@ -0,0 +1,170 @@
+"""
+Contrôle d'admission des requêtes coûteuses (file bornée, équité, priorités)
+"""
+from typing import Dict, List
+import asyncio
+import heapq
+import itertools
+import math
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Classes de priorité : les plus petites valeurs passent en premier
+PRIORITIES = {
+    'interactive': 0,
+    'batch': 1
+}
+
+class AdmissionRejected(Exception):
+    """Requête refusée sans attente (file pleine ou client trop gourmand)"""
+    
+    def __init__(self, message: str, status_code: int, retry_after: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+class Ticket:
+    """Droit d'exécution accordé à une requête"""
+    
+    __slots__ = ('client_id', 'priority', 'degraded', 'waited', 'started')
+    
+    def __init__(self, client_id: str, priority: str, degraded: bool = False, waited: float = 0.0):
+        self.client_id = client_id
+        self.priority = priority
+        self.degraded = degraded
+        self.waited = waited
+        self.started = time.monotonic()
+
+class AdmissionController:
+    """
+    File d'attente bornée devant le pipeline RAG
+    
+    Au plus max_concurrency requêtes s'exécutent en même temps ; les
+    suivantes attendent dans une file triée par classe de priorité puis
+    par rang du client (un client qui a déjà N requêtes en file passe
+    après la première requête d'un autre client), puis par arrivée.
+    
+    - File pleine : 503 immédiat avec Retry-After
+    - Trop de requêtes d'un même client : 429 immédiat avec Retry-After
+    - Attente au-delà de queue_timeout : la requête est admise en mode
+      dégradé (sans génération) sur l'une des max_degraded places qui lui
+      sont réservées ; si elles sont toutes prises, 503 avec Retry-After
+      
+    Toutes les méthodes s'exécutent dans la boucle asyncio : pas de verrou.
+    """
+    
+    def __init__(self, max_concurrency: int = 4, max_queue: int = 64,
+                 queue_timeout: float = 10.0, per_client_limit: int = 8,
+                 max_degraded: int = 4):
+        self.max_concurrency = max_concurrency
+        self.max_degraded = max_degraded
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.per_client_limit = per_client_limit
+        self.active = 0
+        self.degraded_active = 0
+        self._queue: List = []
+        self._waiting = 0
+        self._per_client: Dict[str, int] = {}
+        self._sequence = itertools.count()
+        # Durée moyenne d'exécution (moyenne glissante), pour Retry-After
+        self._service_time = 1.0
+    
+    @property
+    def waiting(self) -> int:
+        return self._waiting
+    
+    def retry_after(self) -> int:
+        """Estimation (secondes) du temps pour écouler la file actuelle"""
+        backlog = self._waiting + self.active
+        return max(1, math.ceil(backlog * self._service_time / max(1, self.max_concurrency)))
+    
+    async def acquire(self, client_id: str, priority: str = 'interactive') -> Ticket:
+        """
+        Attend une place d'exécution
+        
+        Raises:
+            AdmissionRejected: file pleine ou attente dépassée sans place
+                dégradée libre (503), limite du client (429)
+        """
+        if self._per_client.get(client_id, 0) >= self.per_client_limit:
+            raise AdmissionRejected(
+                f"Trop de requêtes en cours pour ce client ({self.per_client_limit} max)",
+                429, self.retry_after()
+            )
+            
+        if self.active < self.max_concurrency and not self._waiting:
+            self._admit(client_id)
+            return Ticket(client_id, priority)
+            
+        if self._waiting >= self.max_queue:
+            raise AdmissionRejected("Serveur saturé, réessayez plus tard", 503, self.retry_after())
+            
+        future = asyncio.get_running_loop().create_future()
+        rank = self._per_client.get(client_id, 0)
+        entry = (PRIORITIES.get(priority, 0), rank, next(self._sequence), future, client_id)
+        heapq.heappush(self._queue, entry)
+        self._waiting += 1
+        self._per_client[client_id] = rank + 1
+        start = time.monotonic()
+        
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+            degraded = False
+        except asyncio.TimeoutError:
+            if future.done():
+                # Place accordée au moment même de l'échéance
+                degraded = False
+            else:
+                future.cancel()
+                self._waiting -= 1
+                if self.degraded_active >= self.max_degraded:
+                    self._forget(client_id)
+                    logger.warning(f"Attente dépassée pour {client_id}, aucune place dégradée : refus")
+                    raise AdmissionRejected("Serveur saturé, réessayez plus tard", 503, self.retry_after())
+                self.degraded_active += 1
+                degraded = True
+                logger.warning(f"Attente dépassée pour {client_id} : réponse dégradée")
+        except asyncio.CancelledError:
+            # Client parti pendant l'attente
+            if future.done() and not future.cancelled():
+                self.release(Ticket(client_id, priority))
+            else:
+                future.cancel()
+                self._waiting -= 1
+                self._forget(client_id)
+            raise
+            
+        return Ticket(client_id, priority, degraded=degraded, waited=time.monotonic() - start)
+    
+    def _admit(self, client_id: str):
+        self.active += 1
+        self._per_client[client_id] = self._per_client.get(client_id, 0) + 1
+    
+    def _forget(self, client_id: str):
+        count = self._per_client.get(client_id, 0) - 1
+        if count > 0:
+            self._per_client[client_id] = count
+        else:
+            self._per_client.pop(client_id, None)
+    
+    def release(self, ticket: Ticket):
+        """Libère la place d'une requête terminée et réveille la suivante"""
+        self._forget(ticket.client_id)
+        if ticket.degraded:
+            self.degraded_active -= 1
+            return
+            
+        elapsed = time.monotonic() - ticket.started
+        self._service_time = 0.8 * self._service_time + 0.2 * elapsed
+        self.active -= 1
+        
+        while self._queue and self.active < self.max_concurrency:
+            _, _, _, future, _ = heapq.heappop(self._queue)
+            if future.cancelled():
+                continue
+            self._waiting -= 1
+            self.active += 1
+            future.set_result(True)
@@ -0,0 +1,103 @@
+"""
+Catalogue des documents indexés, tenu à jour à chaque modification de l'index
+"""
+from typing import Dict, List, Optional, Tuple
+import itertools
+import uuid
+from .question_classifier import normalize_text
+
+# Préfixe des jetons : deux démarrages du serveur ne produisent jamais le même ETag
+_BOOT_ID = uuid.uuid4().hex[:8]
+_tokens = itertools.count(1)
+
+class DocumentCatalogue:
+    """
+    Agrégats par document (chunks, caractères, pages, date d'ingestion)
+    
+    Immuable comme les snapshots de l'index qui le portent : un ajout
+    produit un nouveau catalogue en ne recalculant que les documents
+    touchés, au lieu de reparcourir toutes les métadonnées à chaque
+    lecture. Chaque catalogue a un jeton unique qui sert d'ETag.
+    """
+    
+    __slots__ = ('documents', 'total_chunks', 'token', '_search_keys')
+    
+    def __init__(self, documents: Dict[str, Dict] = None):
+        # Ordre d'insertion = ordre d'ingestion
+        self.documents = documents or {}
+        self.total_chunks = sum(d['num_chunks'] for d in self.documents.values())
+        self.token = f"{_BOOT_ID}-{next(_tokens)}"
+        self._search_keys = {name: normalize_text(name) for name in self.documents}
+    
+    @classmethod
+    def from_metadata(cls, metadata: List[Dict]) -> 'DocumentCatalogue':
+        """Catalogue complet à partir des métadonnées des chunks"""
+        return cls().with_chunks(metadata)
+    
+    def __len__(self) -> int:
+        return len(self.documents)
+    
+    @property
+    def etag(self) -> str:
+        return f'"{self.token}"'
+    
+    def with_chunks(self, chunks: List[Dict]) -> 'DocumentCatalogue':
+        """
+        Nouveau catalogue incluant des chunks ajoutés
+        
+        Les quasi-doublons fusionnés dans un chunk ('duplicates') comptent
+        pour leur propre document ; les chunks sans nom de document (index
+        construits hors ingestion, benchmarks) sont ignorés.
+        """
+        chunks = itertools.chain.from_iterable(
+            itertools.chain((chunk,), chunk.get('duplicates', ())) for chunk in chunks
+        )
+        documents = dict(self.documents)
+        touched = set()
+        for chunk in chunks:
+            name = chunk.get('document_name')
+            if name is None:
+                continue
+            if name not in touched:
+                previous = documents.get(name)
+                documents[name] = dict(previous) if previous else {
+                    'filename': name,
+                    'num_chunks': 0,
+                    'total_characters': 0,
+                    'num_pages': None,
+                    'ingested_at': None
+                }
+                touched.add(name)
+            entry = documents[name]
+            entry['num_chunks'] += 1
+            entry['total_characters'] += chunk.get('num_characters', 0)
+            if chunk.get('num_pages') is not None:
+                entry['num_pages'] = chunk['num_pages']
+            if chunk.get('ingested_at') and not entry['ingested_at']:
+                entry['ingested_at'] = chunk['ingested_at']
+        return DocumentCatalogue(documents)
+    
+    def without(self, document_name: str) -> 'DocumentCatalogue':
+        """Nouveau catalogue sans un document"""
+        documents = {name: d for name, d in self.documents.items() if name != document_name}
+        return DocumentCatalogue(documents)
+    
+    def page(self, offset: int = 0, limit: int = 100, search: Optional[str] = None) -> Tuple[List[Dict], int]:
+        """
+        Une page du catalogue
+        
+        Args:
+            offset: Position du premier document
+            limit: Nombre maximal de documents
+            search: Filtre sur le nom (sans casse ni accents)
+            
+        Returns:
+            (documents de la page, nombre total de documents correspondants)
+        """
+        if not search:
+            names = itertools.islice(self.documents, offset, offset + limit)
+            return [self.documents[name] for name in names], len(self.documents)
+            
+        key = normalize_text(search.strip())
+        names = [name for name, k in self._search_keys.items() if key in k]
+        return [self.documents[name] for name in names[offset:offset + limit]], len(names)
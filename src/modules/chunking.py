@@ -1,4 +1,4 @@
-from typing import List, Dict
+from typing import List, Dict, Iterable, Iterator
 import re
 from .config import config
 
@@ -7,7 +7,14 @@ class TextChunker:
     
     def __init__(self, chunk_size: int = None, chunk_overlap: int = None):
         self.chunk_size = chunk_size or config.CHUNK_SIZE
-        self.chunk_overlap = chunk_overlap or config.CHUNK_OVERLAP
+        # Un overlap de 0 est une valeur valide
+        self.chunk_overlap = config.CHUNK_OVERLAP if chunk_overlap is None else chunk_overlap
+        
+        if not 0 <= self.chunk_overlap < self.chunk_size:
+            raise ValueError(
+                f"Overlap invalide : {self.chunk_overlap} "
+                f"(doit être entre 0 et chunk_size={self.chunk_size})"
+            )
     
     def clean_text(self, text: str) -> str:
         """Nettoie le texte"""
@@ -43,6 +50,36 @@ class TextChunker:
         
         return chunks
     
+    def stream(self) -> 'StreamingChunker':
+        """Découpeur incrémental avec les mêmes paramètres"""
+        return StreamingChunker(self.chunk_size, self.chunk_overlap)
+    
+    def iter_chunks_from_stream(self, pieces: Iterable[str]) -> Iterator[str]:
+        """
+        Découpe un texte reçu par morceaux, sans attendre la fin du flux
+        
+        Args:
+            pieces: Morceaux de texte successifs (coupures arbitraires)
+            
+        Yields:
+            Chunks de texte, identiques à split_into_chunks sur le texte complet
+        """
+        streaming = self.stream()
+        for piece in pieces:
+            yield from streaming.feed(piece)
+        yield from streaming.close()
+    
+    def build_chunk_metadata(self, chunk: str, document_name: str, idx: int) -> Dict[str, any]:
+        """Métadonnées d'un chunk"""
+        return {
+            'chunk_id': f"{document_name}_{idx}",
+            'document_name': document_name,
+            'chunk_index': idx,
+            'content': chunk,
+            'num_words': len(chunk.split()),
+            'num_characters': len(chunk)
+        }
+    
     def create_chunks_with_metadata(
         self, 
         text: str, 
@@ -62,13 +99,51 @@ class TextChunker:
         
         chunks_with_metadata = []
         for idx, chunk in enumerate(chunks):
-            chunks_with_metadata.append({
-                'chunk_id': f"{document_name}_{idx}",
-                'document_name': document_name,
-                'chunk_index': idx,
-                'content': chunk,
-                'num_words': len(chunk.split()),
-                'num_characters': len(chunk)
-            })
+            chunks_with_metadata.append(
+                self.build_chunk_metadata(chunk, document_name, idx)
+            )
         
-        return chunks_with_metadata
\ No newline at end of file
+        return chunks_with_metadata
+
+class StreamingChunker:
+    """
+    Découpage incrémental d'un texte qui arrive par morceaux
+    
+    Un chunk est émis dès que ses chunk_size mots sont arrivés ; les
+    derniers chunks (incomplets) sont émis à la fermeture. Le résultat est
+    identique à TextChunker.split_into_chunks sur le texte complet.
+    """
+    
+    def __init__(self, chunk_size: int, chunk_overlap: int):
+        self.chunk_size = chunk_size
+        self.step = chunk_size - chunk_overlap
+        self._buffer = []
+        self._partial = ''
+    
+    def feed(self, text: str) -> List[str]:
+        """Ajoute du texte et retourne les chunks complets disponibles"""
+        words = (self._partial + text).split()
+        # Le dernier mot peut continuer dans le morceau suivant
+        if words and not text[-1:].isspace():
+            self._partial = words.pop()
+        else:
+            self._partial = ''
+        self._buffer.extend(words)
+        
+        chunks = []
+        while len(self._buffer) >= self.chunk_size:
+            chunks.append(' '.join(self._buffer[:self.chunk_size]))
+            self._buffer = self._buffer[self.step:]
+        return chunks
+    
+    def close(self) -> List[str]:
+        """Termine le flux et retourne les derniers chunks"""
+        if self._partial:
+            self._buffer.append(self._partial)
+            self._partial = ''
+            
+        chunks = []
+        while self._buffer:
+            chunks.append(' '.join(self._buffer[:self.chunk_size]))
+            self._buffer = self._buffer[self.step:]
+        return chunks
\ No newline at end of file
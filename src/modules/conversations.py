@@ -0,0 +1,165 @@
+"""
+Sessions de conversation côté serveur (SQLite) pour les questions de suivi
+"""
+from typing import Dict, List, Optional
+from pathlib import Path
+import json
+import sqlite3
+import threading
+import time
+import logging
+import numpy as np
+from .learning_config import learning_config
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS turns (
+    session_id TEXT NOT NULL,
+    turn INTEGER NOT NULL,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    question_type TEXT,
+    follow_up INTEGER NOT NULL,
+    topic_question TEXT NOT NULL,
+    topic_embedding BLOB NOT NULL,
+    chunks TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (session_id, turn)
+);
+CREATE INDEX IF NOT EXISTS turns_created_at ON turns (created_at);
+"""
+
+class Turn:
+    """Échange enregistré : question, réponse et contexte de recherche utilisé"""
+    
+    __slots__ = ('turn', 'question', 'answer', 'question_type', 'follow_up',
+                 'topic_question', 'topic_embedding', 'chunks', 'created_at')
+    
+    def __init__(self, turn: int, question: str, answer: str, question_type: str, follow_up: bool,
+                 topic_question: str, topic_embedding: np.ndarray, chunks: List[Dict], created_at: float):
+        self.turn = turn
+        self.question = question
+        self.answer = answer
+        self.question_type = question_type
+        self.follow_up = follow_up
+        self.topic_question = topic_question
+        self.topic_embedding = topic_embedding
+        self.chunks = chunks
+        self.created_at = created_at
+
+def is_follow_up(question: str, query_embedding: np.ndarray, previous: Optional[Turn],
+                 threshold: float = 0.6) -> bool:
+    """
+    La question prolonge-t-elle le sujet de l'échange précédent ?
+    
+    Oui pour une relance explicite ("Voulez-vous un exemple pratique ?"),
+    ou quand l'embedding de la question reste proche de celui de la
+    question qui a servi à la dernière recherche. Sinon le sujet a
+    dérivé et une nouvelle recherche s'impose.
+    """
+    if previous is None:
+        return False
+    if learning_config.is_follow_up_question(question):
+        return True
+    query = np.asarray(query_embedding, dtype='float32').reshape(-1)
+    topic = previous.topic_embedding
+    denominator = float(np.linalg.norm(query) * np.linalg.norm(topic))
+    return denominator > 0 and float(query @ topic) / denominator >= threshold
+
+class ConversationStore:
+    """
+    Historique des sessions dans une base SQLite
+    
+    Chaque échange garde les chunks retrouvés et l'embedding de la
+    question qui a servi à la recherche (le « sujet ») : une question de
+    suivi réutilise ce contexte au lieu de refaire une recherche.
+    Une seule connexion, protégée par un verrou (le pool de threads de
+    l'API y accède en parallèle).
+    """
+    
+    def __init__(self, path: Path, ttl: float = 24 * 3600, max_turns: int = 50):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_turns = max_turns
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+        self._last_cleanup = 0.0
+    
+    def last_turn(self, session_id: str) -> Optional[Turn]:
+        """Dernier échange d'une session, None si la session est vide ou expirée"""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT turn, question, answer, question_type, follow_up, topic_question, "
+                "topic_embedding, chunks, created_at FROM turns "
+                "WHERE session_id = ? ORDER BY turn DESC LIMIT 1",
+                (session_id,)
+            ).fetchone()
+        if row is None or time.time() - row[8] > self.ttl:
+            return None
+        return Turn(
+            row[0], row[1], row[2], row[3], bool(row[4]), row[5],
+            np.frombuffer(row[6], dtype='float32'), json.loads(row[7]), row[8]
+        )
+    
+    def add_turn(self, session_id: str, question: str, answer: str, question_type: str,
+                 follow_up: bool, topic_question: str, topic_embedding: np.ndarray, chunks: List[Dict]):
+        """Enregistre un échange à la suite de la session"""
+        embedding = np.asarray(topic_embedding, dtype='float32').reshape(-1)
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT INTO turns VALUES ("
+                "?, (SELECT COALESCE(MAX(turn), 0) + 1 FROM turns WHERE session_id = ?), "
+                "?, ?, ?, ?, ?, ?, ?, ?)",
+                (session_id, session_id, question, answer, question_type, int(follow_up),
+                 topic_question, embedding.tobytes(), json.dumps(chunks, ensure_ascii=False), now)
+            )
+            # Seuls les derniers échanges sont utiles
+            self._connection.execute(
+                "DELETE FROM turns WHERE session_id = ? AND turn <= "
+                "(SELECT MAX(turn) FROM turns WHERE session_id = ?) - ?",
+                (session_id, session_id, self.max_turns)
+            )
+        if now - self._last_cleanup > 600:
+            self.cleanup_expired()
+    
+    def history(self, session_id: str) -> List[Dict]:
+        """Échanges d'une session, du plus ancien au plus récent"""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT turn, question, answer, question_type, follow_up, created_at "
+                "FROM turns WHERE session_id = ? ORDER BY turn",
+                (session_id,)
+            ).fetchall()
+        return [
+            {'turn': r[0], 'question': r[1], 'answer': r[2], 'question_type': r[3],
+             'follow_up': bool(r[4]), 'created_at': r[5]}
+            for r in rows
+        ]
+    
+    def delete(self, session_id: str) -> bool:
+        """Supprime une session"""
+        with self._lock, self._connection:
+            cursor = self._connection.execute("DELETE FROM turns WHERE session_id = ?", (session_id,))
+        return cursor.rowcount > 0
+    
+    def cleanup_expired(self):
+        """Supprime les sessions inactives depuis plus de ttl secondes"""
+        self._last_cleanup = time.time()
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                "DELETE FROM turns WHERE session_id IN ("
+                "SELECT session_id FROM turns GROUP BY session_id HAVING MAX(created_at) < ?)",
+                (self._last_cleanup - self.ttl,)
+            )
+        if cursor.rowcount:
+            logger.info(f"{cursor.rowcount} échanges expirés supprimés")
+    
+    def close(self):
+        with self._lock:
+            self._connection.close()
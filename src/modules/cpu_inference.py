@@ -0,0 +1,172 @@
+"""
+Inférence LLM sur CPU : précision des poids (fp32, bf16, int8, GGUF),
+threads torch et placement sur un nœud NUMA
+"""
+from pathlib import Path
+from typing import Dict, List
+import glob
+import logging
+import os
+import torch
+from torch import nn
+
+logger = logging.getLogger(__name__)
+
+# Précisions du modèle local ; 'gguf' passe par llama.cpp (llama-cpp-python)
+PRECISIONS = ('fp32', 'bf16', 'int8', 'gguf')
+
+# Fenêtre de contexte d'un modèle GGUF (prompt + réponse)
+GGUF_CONTEXT_LENGTH = 2048
+
+NUMA_ROOT = "/sys/devices/system/node"
+
+def parse_cpulist(text: str) -> List[int]:
+    """Liste de CPU au format du noyau (ex: '0-3,8-11')"""
+    cpus = []
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        cpus.extend(range(int(first), int(last or first) + 1))
+    return cpus
+
+def numa_nodes(root: str = NUMA_ROOT) -> Dict[int, List[int]]:
+    """CPU de chaque nœud NUMA (vide si le système ne les expose pas)"""
+    nodes = {}
+    for path in glob.glob(os.path.join(root, "node[0-9]*", "cpulist")):
+        node = int(Path(path).parent.name[len("node"):])
+        with open(path) as cpulist:
+            cpus = parse_cpulist(cpulist.read())
+        if cpus:
+            nodes[node] = cpus
+    return dict(sorted(nodes.items()))
+
+def pin_to_numa_node(node: int, root: str = NUMA_ROOT) -> List[int]:
+    """
+    Restreint le processus aux CPU d'un nœud NUMA
+    
+    À appeler avant le chargement du modèle : le noyau place une page
+    sur le nœud du CPU qui la touche en premier, les poids sont donc
+    alloués dans la mémoire locale des threads qui les lisent. Sur une
+    machine à plusieurs sockets, lancer un processus par nœud évite les
+    accès mémoire distants, qui plafonnent le décodage.
+    
+    Returns:
+        CPU retenus
+    """
+    nodes = numa_nodes(root)
+    if node not in nodes:
+        raise ValueError(f"Nœud NUMA inconnu : {node} (disponibles : {sorted(nodes) or 'aucun'})")
+    cpus = sorted(set(nodes[node]) & os.sched_getaffinity(0))
+    if not cpus:
+        raise ValueError(f"Aucun CPU du nœud NUMA {node} n'est autorisé pour ce processus")
+    os.sched_setaffinity(0, cpus)
+    logger.info(f"Processus placé sur le nœud NUMA {node} : {len(cpus)} CPU")
+    return cpus
+
+def configure_torch_threads(intra_op: int = None, inter_op: int = None) -> Dict[str, int]:
+    """
+    Règle les threads torch de la génération locale
+    
+    intra_op parallélise chaque produit matriciel ; par défaut, un thread
+    par CPU autorisé (après pin_to_numa_node), jamais plus : au-delà, les
+    threads se disputent les cœurs. inter_op n'est utile qu'aux graphes
+    à branches parallèles (1 ou 2 suffisent pour un décodeur) et ne peut
+    être réglé qu'avant le premier calcul torch.
+    """
+    intra_op = intra_op or len(os.sched_getaffinity(0))
+    torch.set_num_threads(max(1, intra_op))
+    if inter_op:
+        try:
+            torch.set_num_interop_threads(max(1, inter_op))
+        except RuntimeError as e:
+            logger.warning(f"Threads inter-op non modifiés : {e}")
+    threads = {'intra_op': torch.get_num_threads(), 'inter_op': torch.get_num_interop_threads()}
+    logger.info(f"Torch : {threads['intra_op']} thread(s) intra-op, {threads['inter_op']} inter-op")
+    return threads
+
+def _conv1d_to_linear(model: nn.Module) -> nn.Module:
+    """
+    Remplace les Conv1D de transformers (GPT-2) par des nn.Linear
+    
+    La quantification dynamique de torch ne traite que nn.Linear ; Conv1D
+    fait le même calcul avec un poids transposé.
+    """
+    from transformers.pytorch_utils import Conv1D
+    
+    for parent in list(model.modules()):
+        for name, child in list(parent.named_children()):
+            if isinstance(child, Conv1D):
+                linear = nn.Linear(child.weight.shape[0], child.weight.shape[1])
+                linear.weight.data = child.weight.data.t().contiguous()
+                linear.bias.data = child.bias.data
+                setattr(parent, name, linear)
+    return model
+
+def quantize_int8(model: nn.Module) -> nn.Module:
+    """
+    Quantification dynamique int8 des couches linéaires
+    
+    Les poids sont stockés en int8 (4 fois moins de mémoire à lire à
+    chaque token), les activations quantifiées à la volée. La tête de
+    sortie (lm_head), partagée avec les embeddings et la plus sensible
+    aux erreurs d'arrondi, reste en fp32.
+    """
+    from torch.ao.quantization import quantize_dynamic
+    
+    model = _conv1d_to_linear(model)
+    layers = {
+        name for name, module in model.named_modules()
+        if isinstance(module, nn.Linear) and name != 'lm_head'
+    }
+    return quantize_dynamic(model, layers, dtype=torch.qint8)
+
+def load_causal_lm(model_name: str, precision: str = 'fp32') -> nn.Module:
+    """Charge un modèle transformers dans la précision demandée (fp32, bf16 ou int8)"""
+    from transformers import AutoModelForCausalLM
+    
+    if precision == 'bf16':
+        model = AutoModelForCausalLM.from_pretrained(model_name, torch_dtype=torch.bfloat16)
+    elif precision in ('fp32', 'int8'):
+        model = AutoModelForCausalLM.from_pretrained(model_name)
+        if precision == 'int8':
+            model = quantize_int8(model)
+    else:
+        raise ValueError(f"Précision inconnue pour transformers : {precision}")
+    return model.eval()
+
+def load_gguf(model_path: str, num_threads: int = None, numa: bool = False,
+              context_length: int = GGUF_CONTEXT_LENGTH):
+    """
+    Charge un modèle GGUF quantifié (Q4_K_M, Q8_0...) avec llama.cpp
+    
+    llama.cpp garde le cache KV du prompt précédent et ne recalcule que
+    la partie qui diffère : le préambule commun des templates n'est pas
+    repassé dans le modèle d'une requête à l'autre.
+    """
+    try:
+        from llama_cpp import Llama
+    except ImportError as e:
+        raise ImportError("LLM_PRECISION=gguf nécessite llama-cpp-python") from e
+        
+    num_threads = num_threads or len(os.sched_getaffinity(0))
+    return Llama(
+        model_path=str(model_path),
+        n_ctx=context_length,
+        n_threads=num_threads,
+        n_threads_batch=num_threads,
+        numa=numa,
+        verbose=False
+    )
+
+def model_size_bytes(model: nn.Module) -> int:
+    """Taille des poids d'un modèle torch, y compris les poids int8 emballés"""
+    from torch.ao.nn.quantized.dynamic import Linear as DynamicLinear
+    
+    size = sum(p.numel() * p.element_size() for p in model.parameters())
+    for module in model.modules():
+        if isinstance(module, DynamicLinear):
+            weight, bias = module._weight_bias()
+            size += weight.numel() * weight.element_size()
+            size += bias.numel() * bias.element_size() if bias is not None else 0
+    return size
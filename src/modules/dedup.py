@@ -0,0 +1,118 @@
+"""
+Détection des chunks quasi identiques (MinHash + LSH sur les shingles de mots)
+"""
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from collections import defaultdict
+import re
+import zlib
+import numpy as np
+from .question_classifier import normalize_text
+
+# Premier de Mersenne 2^31 - 1 : (a * x + b) tient dans un uint64
+_PRIME = np.uint64((1 << 31) - 1)
+
+def shingles(text: str, size: int = 5) -> Set[int]:
+    """Empreintes des suites de `size` mots (sans casse, accents ni ponctuation)"""
+    words = re.findall(r"\w+", normalize_text(text))
+    if len(words) <= size:
+        grams = [" ".join(words)] if words else []
+    else:
+        grams = [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return {zlib.crc32(gram.encode('utf-8')) & 0x7FFFFFFF for gram in grams}
+
+class NearDuplicateIndex:
+    """
+    Index LSH de signatures MinHash
+    
+    La signature d'un chunk estime la similarité de Jaccard de ses
+    shingles avec ceux d'un autre chunk ; découpée en bandes, elle place
+    le chunk dans des seaux où ne tombent, avec forte probabilité, que
+    des chunks proches. Seuls ces candidats sont comparés : l'ajout d'un
+    chunk ne parcourt pas tout le corpus.
+    """
+    
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, bands: int = 16,
+                 shingle_size: int = 5, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm doit être un multiple de bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, int(_PRIME), size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, int(_PRIME), size=num_perm).astype(np.uint64)
+        self._buckets: List[Dict[bytes, List[int]]] = []
+        self._signatures: Dict[int, np.ndarray] = {}
+        self.clear()
+    
+    def clear(self):
+        self._buckets = [defaultdict(list) for _ in range(self.bands)]
+        self._signatures = {}
+    
+    def __len__(self) -> int:
+        return len(self._signatures)
+    
+    def signature(self, text: str) -> np.ndarray:
+        """Signature MinHash du texte"""
+        values = np.fromiter(shingles(text, self.shingle_size), dtype=np.uint64)
+        if values.size == 0:
+            return np.full(self.num_perm, _PRIME, dtype=np.uint64)
+        return ((values[:, None] * self._a + self._b) % _PRIME).min(axis=0)
+    
+    def _band_keys(self, signature: np.ndarray) -> Iterable[Tuple[int, bytes]]:
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+    
+    def query(self, signature: np.ndarray) -> Optional[int]:
+        """Clé du chunk indexé le plus proche au-dessus du seuil, None sinon"""
+        candidates = set()
+        for band, key in self._band_keys(signature):
+            candidates.update(self._buckets[band].get(key, ()))
+            
+        best_key, best_similarity = None, self.threshold
+        for candidate in candidates:
+            similarity = float(np.mean(self._signatures[candidate] == signature))
+            if similarity >= best_similarity:
+                best_key, best_similarity = candidate, similarity
+        return best_key
+    
+    def add(self, key: int, signature: np.ndarray):
+        self._signatures[key] = signature
+        for band, band_key in self._band_keys(signature):
+            self._buckets[band][band_key].append(key)
+    
+    def rebuild(self, texts: Iterable[Tuple[int, str]]):
+        """Réindexe des (clé, texte)"""
+        self.clear()
+        for key, text in texts:
+            self.add(key, self.signature(text))
+
+def source_reference(chunk: Dict) -> Dict:
+    """Référence vers un chunk fusionné : ses métadonnées sans le texte"""
+    return {k: v for k, v in chunk.items() if k not in ('content', 'duplicates')}
+
+def dedup_report(metadata: List[Dict], dimension: int) -> Dict:
+    """
+    Place économisée par la fusion des quasi-doublons
+    
+    Args:
+        metadata: Métadonnées des chunks indexés (un par vecteur)
+        dimension: Dimension des embeddings
+    """
+    collapsed_by_document: Dict[str, int] = defaultdict(int)
+    for chunk in metadata:
+        for reference in chunk.get('duplicates', ()):
+            collapsed_by_document[reference['document_name']] += 1
+    collapsed = sum(collapsed_by_document.values())
+    total = len(metadata) + collapsed
+    return {
+        'indexed_vectors': len(metadata),
+        'source_chunks': total,
+        'collapsed_chunks': collapsed,
+        'collapsed_ratio': round(collapsed / total, 4) if total else 0.0,
+        # Vecteurs float32 non stockés dans l'index ni recherchés
+        'vector_bytes_saved': collapsed * dimension * 4,
+        'collapsed_by_document': dict(sorted(collapsed_by_document.items(), key=lambda item: -item[1]))
+    }
@@ -0,0 +1,198 @@
+"""
+Recherche distribuée : l'index est réparti sur plusieurs nœuds (shards)
+interrogés en parallèle, et leurs résultats sont fusionnés
+"""
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Sequence, Tuple
+import heapq
+import logging
+import time
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from .config import config
+from .retrieval import reciprocal_rank_fusion, chunk_key
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Délai de connexion (secondes) aux nœuds
+CONNECT_TIMEOUT = 0.5
+
+class ShardUnavailable(Exception):
+    """Aucun nœud n'a répondu avant l'échéance"""
+
+class HttpShard:
+    """
+    Nœud de recherche distant (voir api/node.py)
+    
+    Les connexions keep-alive vers le nœud sont réutilisées ; aucune
+    requête n'est rejouée : un nœud lent est laissé de côté, pas relancé.
+    """
+    
+    def __init__(self, url: str, session=None):
+        self.url = url.rstrip("/")
+        self.name = self.url.split("://", 1)[-1]
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=32, max_retries=0)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+    
+    def search(self, query_embeddings: np.ndarray, top_k: int, timeout: float) -> List[List[Dict]]:
+        """Résultats du nœud pour chaque embedding (voir FAISSRetriever.search_vectors)"""
+        response = self.session.post(
+            f"{self.url}/search",
+            json={"vectors": query_embeddings.tolist(), "top_k": top_k},
+            timeout=(CONNECT_TIMEOUT, timeout)
+        )
+        response.raise_for_status()
+        return response.json()["results"]
+    
+    def health(self, timeout: float) -> Dict:
+        response = self.session.get(f"{self.url}/health", timeout=(CONNECT_TIMEOUT, timeout))
+        response.raise_for_status()
+        return response.json()
+
+class ScatterGatherRetriever:
+    """
+    Coordinateur : même interface de recherche que FAISSRetriever
+    
+    La question est encodée une seule fois par l'API ; l'embedding part
+    vers tous les nœuds en parallèle, et les top-k de chaque nœud sont
+    fusionnés par score (les scores cosinus sont comparables d'un nœud à
+    l'autre). Les nœuds qui n'ont pas répondu à l'échéance sont ignorés :
+    la réponse est partielle plutôt qu'en retard. Si aucun nœud ne répond,
+    ShardUnavailable est levée.
+    """
+    
+    def __init__(self, shards: Sequence, embedding_model, deadline: float = 2.0):
+        if not shards:
+            raise ValueError("Aucun nœud de recherche")
+        self.shards = list(shards)
+        self.embedding_model = embedding_model
+        self.deadline = deadline
+        # Un nœud lent occupe un thread au-delà de l'échéance : marge pour
+        # que les requêtes suivantes ne l'attendent pas
+        self._executor = ThreadPoolExecutor(
+            max_workers=8 * len(self.shards), thread_name_prefix="scatter"
+        )
+    
+    @classmethod
+    def from_urls(cls, urls: Sequence[str], embedding_model, deadline: float = 2.0) -> 'ScatterGatherRetriever':
+        return cls([HttpShard(url) for url in urls], embedding_model, deadline)
+    
+    def _call(self, shard, query_embeddings: np.ndarray, top_k: int, deadline: float) -> List[List[Dict]]:
+        start = time.perf_counter()
+        results = shard.search(query_embeddings, top_k, deadline)
+        metrics.SHARD_LATENCY.labels(shard=shard.name).observe(time.perf_counter() - start)
+        return results
+    
+    def gather(self, query_embeddings: np.ndarray, top_k: int = None) -> Tuple[List[List[Dict]], List[str]]:
+        """
+        Interroge tous les nœuds et fusionne leurs résultats par score
+        
+        Args:
+            query_embeddings: Embeddings normalisés (n x dimension)
+            top_k: Nombre de résultats par embedding
+            
+        Returns:
+            (pour chaque embedding, les top_k chunks de tous les nœuds,
+            noms des nœuds absents de la réponse)
+        """
+        top_k = top_k or config.TOP_K_RESULTS
+        query_embeddings = np.ascontiguousarray(query_embeddings, dtype='float32')
+        deadline = self.deadline
+        futures = {
+            self._executor.submit(self._call, shard, query_embeddings, top_k, deadline): shard
+            for shard in self.shards
+        }
+        with metrics.stage('search'):
+            done, not_done = wait(futures, timeout=deadline)
+            
+        shard_results, missing = [], []
+        for future in not_done:
+            future.cancel()
+            shard = futures[future]
+            missing.append(shard.name)
+            metrics.SHARD_SEARCHES.labels(shard=shard.name, result='timeout').inc()
+        for future in done:
+            shard = futures[future]
+            try:
+                rows = future.result()
+            except Exception as e:
+                logger.warning(f"Nœud {shard.name} en erreur : {e}")
+                missing.append(shard.name)
+                metrics.SHARD_SEARCHES.labels(shard=shard.name, result='error').inc()
+                continue
+            metrics.SHARD_SEARCHES.labels(shard=shard.name, result='ok').inc()
+            for row in rows:
+                for chunk in row:
+                    chunk['shard'] = shard.name
+            shard_results.append(rows)
+            
+        if not shard_results:
+            raise ShardUnavailable(f"Aucun nœud n'a répondu en {deadline} s : {', '.join(missing)}")
+        if missing:
+            logger.warning(f"Résultats partiels : {len(missing)}/{len(self.shards)} nœuds absents ({', '.join(missing)})")
+            
+        merged = [
+            heapq.nlargest(top_k, (chunk for rows in shard_results for chunk in rows[i]), key=lambda c: c['score'])
+            for i in range(len(query_embeddings))
+        ]
+        return merged, missing
+    
+    def search_vectors(self, query_embeddings: np.ndarray, top_k: int = None) -> List[List[Dict]]:
+        return self.gather(query_embeddings, top_k)[0]
+    
+    def search_by_vector(self, query_embedding: np.ndarray, top_k: int = None) -> List[Dict]:
+        return self.search_vectors(query_embedding.reshape(1, -1), top_k)[0]
+    
+    def search_multi(self, queries: List[str], top_k: int = None,
+                     query_embedding: np.ndarray = None) -> List[Dict]:
+        """Sous-requêtes cherchées en un seul aller-retour par nœud, fusionnées par RRF"""
+        top_k = top_k or config.TOP_K_RESULTS
+        to_encode = queries if query_embedding is None else queries[1:]
+        query_embeddings = np.asarray(self.embedding_model.encode(to_encode), dtype='float32')
+        query_embeddings /= np.maximum(np.linalg.norm(query_embeddings, axis=1, keepdims=True), 1e-12)
+        if query_embedding is not None:
+            query_embeddings = np.vstack([query_embedding.reshape(1, -1), query_embeddings])
+        rankings = self.search_vectors(query_embeddings, top_k)
+        return reciprocal_rank_fusion(
+            rankings, queries, top_k, lambda chunk: (chunk['shard'],) + chunk_key(chunk)
+        )
+    
+    def status(self, timeout: float = 2.0) -> List[Dict]:
+        """État de chaque nœud (vecteurs, version, modèle), interrogés en parallèle"""
+        futures = [(shard, self._executor.submit(shard.health, timeout)) for shard in self.shards]
+        statuses = []
+        for shard, future in futures:
+            try:
+                statuses.append({'shard': shard.name, 'available': True, **future.result(timeout=timeout + 1)})
+            except Exception as e:
+                statuses.append({'shard': shard.name, 'available': False, 'error': str(e)})
+        return statuses
+
+def split_by_document(metadata: List[Dict], num_shards: int) -> List[List[int]]:
+    """
+    Répartit les chunks entre nœuds, document par document
+    
+    Un document reste entier sur un seul nœud (son retrait ne touche qu'un
+    nœud) ; les plus gros documents sont placés d'abord, chacun sur le
+    nœud le moins chargé.
+    
+    Returns:
+        Positions des chunks de chaque nœud
+    """
+    by_document: Dict[str, List[int]] = {}
+    for position, chunk in enumerate(metadata):
+        by_document.setdefault(chunk['document_name'], []).append(position)
+        
+    shards = [[] for _ in range(num_shards)]
+    loads = [(0, i) for i in range(num_shards)]
+    for positions in sorted(by_document.values(), key=len, reverse=True):
+        load, i = heapq.heappop(loads)
+        shards[i].extend(positions)
+        heapq.heappush(loads, (load + len(positions), i))
+    return [sorted(positions) for positions in shards]
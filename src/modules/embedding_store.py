@@ -0,0 +1,159 @@
+"""
+Stockage disque des embeddings de chunks, réutilisés entre reconstructions d'index
+"""
+from typing import Dict, List, Tuple
+from pathlib import Path
+import hashlib
+import json
+import os
+import re
+import threading
+import logging
+import numpy as np
+from .metrics import CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+def content_hash(text: str) -> str:
+    """Clé d'un chunk : SHA-256 de son contenu"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+class EmbeddingStore:
+    """
+    Embeddings bruts des chunks, indexés par empreinte du contenu
+    
+    Un répertoire par modèle d'embeddings : changer EMBEDDING_MODEL ne
+    réutilise jamais des vecteurs d'un autre modèle. Les vecteurs sont
+    ajoutés à la fin d'un fichier float32 lu par memory-map ; les clés
+    sont écrites après les vecteurs, si bien qu'une écriture interrompue
+    laisse au pire des vecteurs orphelins, ignorés au chargement.
+    """
+    
+    def __init__(self, root: Path, model_name: str, dimension: int):
+        self.model_name = model_name
+        self.dimension = dimension
+        self.directory = Path(root) / re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.vectors_path = self.directory / 'vectors.f32'
+        self.keys_path = self.directory / 'keys.txt'
+        self._lock = threading.Lock()
+        self._rows: Dict[str, int] = {}
+        self._vectors = np.empty((0, dimension), dtype='float32')
+        self._check_info()
+        self._load()
+    
+    def _check_info(self):
+        info_path = self.directory / 'store.json'
+        if info_path.exists():
+            with open(info_path, 'r', encoding='utf-8') as f:
+                info = json.load(f)
+            if info['dimension'] != self.dimension:
+                raise ValueError(
+                    f"Stockage d'embeddings incohérent : dimension {info['dimension']} "
+                    f"pour le modèle {self.model_name} (attendu {self.dimension})"
+                )
+        else:
+            with open(info_path, 'w', encoding='utf-8') as f:
+                json.dump({'model': self.model_name, 'dimension': self.dimension}, f)
+    
+    def _load(self):
+        keys = self.keys_path.read_text(encoding='utf-8').split() if self.keys_path.exists() else []
+        row_bytes = self.dimension * 4
+        stored_rows = self.vectors_path.stat().st_size // row_bytes if self.vectors_path.exists() else 0
+        count = min(len(keys), stored_rows)
+        
+        # Écriture interrompue : on revient au dernier état cohérent
+        if stored_rows > count:
+            with open(self.vectors_path, 'r+b') as f:
+                f.truncate(count * row_bytes)
+        if len(keys) > count:
+            self.keys_path.write_text(''.join(f"{k}\n" for k in keys[:count]), encoding='utf-8')
+            
+        self._rows = {key: row for row, key in enumerate(keys[:count])}
+        self._remap()
+        logger.info(f"Stockage d'embeddings {self.model_name} : {count} vecteurs")
+    
+    def _remap(self):
+        count = len(self._rows)
+        if count:
+            self._vectors = np.memmap(self.vectors_path, dtype='float32', mode='r', shape=(count, self.dimension))
+    
+    def __len__(self) -> int:
+        return len(self._rows)
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self._rows
+    
+    def lookup(self, keys: List[str]) -> Tuple[np.ndarray, List[int]]:
+        """
+        Récupère les embeddings connus
+        
+        Returns:
+            (matrice len(keys) x dimension, positions des clés absentes)
+            Les lignes des clés absentes sont à zéro.
+        """
+        rows = self._rows
+        vectors = self._vectors
+        result = np.zeros((len(keys), self.dimension), dtype='float32')
+        found, missing = [], []
+        for i, key in enumerate(keys):
+            row = rows.get(key)
+            if row is None or row >= len(vectors):
+                missing.append(i)
+            else:
+                found.append((i, row))
+        if found:
+            positions, stored = zip(*found)
+            result[list(positions)] = vectors[list(stored)]
+        return result, missing
+    
+    def add(self, keys: List[str], embeddings: np.ndarray):
+        """Ajoute des embeddings (les clés déjà présentes sont ignorées)"""
+        embeddings = np.asarray(embeddings, dtype='float32')
+        with self._lock:
+            new_rows = {}
+            for key, vector in zip(keys, embeddings):
+                if key not in self._rows and key not in new_rows:
+                    new_rows[key] = vector
+            if not new_rows:
+                return
+                
+            # Vecteurs d'abord, clés ensuite : les clés ne pointent
+            # jamais vers des vecteurs non écrits
+            with open(self.vectors_path, 'ab') as f:
+                f.write(np.stack(list(new_rows.values())).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self.keys_path, 'a', encoding='utf-8') as f:
+                f.write(''.join(f"{key}\n" for key in new_rows))
+                
+            start = len(self._rows)
+            rows = dict(self._rows)
+            rows.update({key: start + i for i, key in enumerate(new_rows)})
+            self._rows = rows
+            self._remap()
+    
+    def encode(self, embedding_model, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Embeddings des textes, en n'encodant que ceux absents du stockage
+        
+        Args:
+            embedding_model: Modèle utilisé pour les textes inconnus
+            texts: Contenus des chunks
+            batch_size: Taille des lots d'encodage
+        """
+        if embedding_model.model_name != self.model_name:
+            raise ValueError(
+                f"Modèle {embedding_model.model_name} différent du stockage ({self.model_name})"
+            )
+        keys = [content_hash(text) for text in texts]
+        embeddings, missing = self.lookup(keys)
+        
+        CACHE_LOOKUPS.labels(cache='embeddings', result='hit').inc(len(keys) - len(missing))
+        CACHE_LOOKUPS.labels(cache='embeddings', result='miss').inc(len(missing))
+        
+        if missing:
+            computed = embedding_model.encode([texts[i] for i in missing], batch_size=batch_size)
+            self.add([keys[i] for i in missing], computed)
+            embeddings[missing] = computed
+        return embeddings
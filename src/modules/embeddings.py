@@ -3,6 +3,7 @@ import numpy as np
 from typing import List
 import logging
 from .config import config
+from .metrics import stage
 
 logger = logging.getLogger(__name__)
 
@@ -15,12 +16,13 @@ class EmbeddingModel:
         self.model = SentenceTransformer(self.model_name)
         logger.info("Modèle chargé avec succès")
     
-    def encode(self, texts: List[str]) -> np.ndarray:
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
         """
         Encode une liste de textes en embeddings
         
         Args:
             texts: Liste de textes
+            batch_size: Nombre de textes passés ensemble au modèle
             
         Returns:
             Array numpy des embeddings
@@ -29,11 +31,13 @@ class EmbeddingModel:
             texts = [texts]
         
         logger.info(f"Encoding de {len(texts)} textes...")
-        embeddings = self.model.encode(
-            texts,
-            show_progress_bar=True,
-            convert_to_numpy=True
-        )
+        with stage('embedding'):
+            embeddings = self.model.encode(
+                texts,
+                batch_size=batch_size,
+                show_progress_bar=True,
+                convert_to_numpy=True
+            )
         logger.info("Encoding terminé")
         return embeddings
     
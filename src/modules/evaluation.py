@@ -0,0 +1,135 @@
+"""
+Évaluation hors ligne de la qualité et de la vitesse du retrieval
+"""
+from typing import List, Dict, Sequence, Callable
+import json
+import math
+import re
+import time
+import logging
+from pathlib import Path
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+def load_golden_set(path: Path) -> List[Dict]:
+    """
+    Charge un jeu de questions de référence (JSON ou JSONL)
+    
+    Chaque entrée contient une 'question' et au moins l'un de :
+    - 'expected_chunk_ids' : identifiants de chunks pertinents
+    - 'expected_passages' : extraits de texte que doit contenir un chunk
+      pertinent (indépendants du découpage, à privilégier pour comparer
+      des tailles de chunks)
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        if Path(path).suffix == '.jsonl':
+            items = [json.loads(line) for line in f if line.strip()]
+        else:
+            items = json.load(f)
+            
+    for item in items:
+        if 'question' not in item:
+            raise ValueError(f"Entrée sans 'question' : {item}")
+        if not item.get('expected_chunk_ids') and not item.get('expected_passages'):
+            raise ValueError(f"Entrée sans résultat attendu : {item['question']}")
+    return items
+
+def _normalize(text: str) -> str:
+    return re.sub(r'\s+', ' ', text).strip().lower()
+
+def relevance_labels(retrieved: List[Dict], item: Dict) -> List[int]:
+    """
+    Pertinence binaire de chaque chunk retrouvé pour une question de référence
+    
+    Chaque résultat attendu n'est compté qu'une fois : avec l'overlap,
+    plusieurs chunks peuvent contenir le même extrait.
+    """
+    remaining_ids = set(item.get('expected_chunk_ids', []))
+    remaining_passages = {_normalize(p) for p in item.get('expected_passages', [])}
+    
+    labels = []
+    for chunk in retrieved:
+        content = _normalize(chunk.get('content', ''))
+        matched = {p for p in remaining_passages if p in content}
+        relevant = chunk.get('chunk_id') in remaining_ids or bool(matched)
+        
+        remaining_ids.discard(chunk.get('chunk_id'))
+        remaining_passages -= matched
+        labels.append(int(relevant))
+    return labels
+
+def num_relevant(item: Dict) -> int:
+    """Nombre de résultats pertinents attendus pour une question"""
+    return max(len(item.get('expected_chunk_ids', [])), len(item.get('expected_passages', [])), 1)
+
+def recall_at_k(labels: Sequence[int], total_relevant: int, k: int) -> float:
+    """Part des résultats pertinents retrouvés dans les k premiers"""
+    return min(sum(labels[:k]), total_relevant) / total_relevant
+
+def reciprocal_rank(labels: Sequence[int]) -> float:
+    """Inverse du rang du premier résultat pertinent (0 si aucun)"""
+    for rank, label in enumerate(labels, 1):
+        if label:
+            return 1.0 / rank
+    return 0.0
+
+def ndcg_at_k(labels: Sequence[int], total_relevant: int, k: int) -> float:
+    """nDCG@k avec pertinence binaire"""
+    dcg = sum(label / math.log2(rank + 1) for rank, label in enumerate(labels[:k], 1))
+    ideal = sum(1 / math.log2(rank + 1) for rank in range(1, min(total_relevant, k) + 1))
+    return dcg / ideal if ideal > 0 else 0.0
+
+def evaluate_search(search: Callable[[str, int], List[Dict]], golden: List[Dict], top_k: int) -> Dict:
+    """
+    Évalue une fonction de recherche sur un jeu de référence
+    
+    Args:
+        search: Fonction (question, top_k) -> chunks, ex. FAISSRetriever.search
+        golden: Questions de référence
+        top_k: Nombre de résultats demandés
+        
+    Returns:
+        Dict avec recall@k, MRR, nDCG@k et latences (ms)
+    """
+    recalls, rrs, ndcgs, latencies = [], [], [], []
+    
+    for item in golden:
+        start = time.perf_counter()
+        retrieved = search(item['question'], top_k)
+        latencies.append(time.perf_counter() - start)
+        
+        labels = relevance_labels(retrieved, item)
+        total = num_relevant(item)
+        recalls.append(recall_at_k(labels, total, top_k))
+        rrs.append(reciprocal_rank(labels))
+        ndcgs.append(ndcg_at_k(labels, total, top_k))
+        
+    return {
+        'num_questions': len(golden),
+        'top_k': top_k,
+        'recall_at_k': float(np.mean(recalls)) if recalls else 0.0,
+        'mrr': float(np.mean(rrs)) if rrs else 0.0,
+        'ndcg_at_k': float(np.mean(ndcgs)) if ndcgs else 0.0,
+        'latency_p50_ms': float(np.percentile(latencies, 50) * 1000) if latencies else 0.0,
+        'latency_p95_ms': float(np.percentile(latencies, 95) * 1000) if latencies else 0.0
+    }
+
+def pareto_frontier(results: List[Dict], quality_key: str = 'ndcg_at_k',
+                    latency_key: str = 'latency_p50_ms') -> List[Dict]:
+    """
+    Configurations non dominées : aucune autre n'est à la fois
+    au moins aussi bonne et au moins aussi rapide (et strictement
+    meilleure sur l'un des deux)
+    
+    Returns:
+        Configurations de la frontière, de la plus rapide à la plus lente
+    """
+    ordered = sorted(results, key=lambda r: (r[latency_key], -r[quality_key]))
+    frontier = []
+    best_quality = -math.inf
+    for result in ordered:
+        if result[quality_key] > best_quality:
+            frontier.append(result)
+            best_quality = result[quality_key]
+    return frontier
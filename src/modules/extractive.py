@@ -0,0 +1,117 @@
+"""
+Réponses extractives rapides : phrases des chunks notées contre la question
+"""
+from typing import List, Dict, Tuple
+from collections import OrderedDict
+import re
+import threading
+import logging
+import numpy as np
+from .metrics import stage, record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+# Fin de phrase suivie d'un espace, ou saut de ligne
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+|\n+')
+
+# Phrases trop courtes pour porter une information (titres, puces vides)
+MIN_SENTENCE_LENGTH = 25
+
+# Deux phrases plus proches que ce seuil sont considérées comme redondantes
+REDUNDANCY_THRESHOLD = 0.92
+
+def split_sentences(text: str) -> List[str]:
+    """Découpe un texte en phrases"""
+    return [
+        sentence.strip() for sentence in SENTENCE_BOUNDARY.split(text)
+        if len(sentence.strip()) >= MIN_SENTENCE_LENGTH
+    ]
+
+class ExtractiveAnswerer:
+    """
+    Réponse sans génération : les meilleures phrases des chunks retrouvés
+    
+    Toutes les phrases candidates sont encodées en un seul lot (celles
+    déjà vues viennent d'un cache mémoire) puis notées par un unique
+    produit matrice-vecteur avec l'embedding de la question déjà calculé
+    pour la recherche.
+    """
+    
+    def __init__(self, embedding_model, max_sentences: int = 4, cache_size: int = 20000):
+        self.embedding_model = embedding_model
+        self.max_sentences = max_sentences
+        self.cache_size = cache_size
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _sentence_embeddings(self, sentences: List[str]) -> np.ndarray:
+        """Embeddings normalisés des phrases, en n'encodant que les nouvelles"""
+        with self._lock:
+            cached = {s: self._cache[s] for s in sentences if s in self._cache}
+            for s in cached:
+                self._cache.move_to_end(s)
+        missing = [s for s in dict.fromkeys(sentences) if s not in cached]
+        record_cache_lookup('sentences', not missing)
+        
+        if missing:
+            encoded = np.asarray(self.embedding_model.encode(missing), dtype='float32')
+            encoded /= np.maximum(np.linalg.norm(encoded, axis=1, keepdims=True), 1e-12)
+            with self._lock:
+                for sentence, vector in zip(missing, encoded):
+                    self._cache[sentence] = vector
+                    cached[sentence] = vector
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return np.vstack([cached[s] for s in sentences])
+    
+    def select(self, query_embedding: np.ndarray, chunks: List[Dict]) -> List[Tuple[str, int, float]]:
+        """
+        Meilleures phrases pour la question
+        
+        Returns:
+            Liste de (phrase, numéro de source à partir de 1, score), dans
+            l'ordre des sources puis du texte
+        """
+        candidates = [
+            (sentence, source, position)
+            for source, chunk in enumerate(chunks, 1)
+            for position, sentence in enumerate(split_sentences(chunk.get('content', '')))
+        ]
+        if not candidates:
+            return []
+            
+        embeddings = self._sentence_embeddings([c[0] for c in candidates])
+        query = np.asarray(query_embedding, dtype='float32').reshape(-1)
+        query = query / max(np.linalg.norm(query), 1e-12)
+        scores = embeddings @ query
+        
+        selected = []
+        for i in np.argsort(-scores):
+            if len(selected) >= self.max_sentences:
+                break
+            # Écarter les phrases quasi identiques (chunks qui se chevauchent)
+            if any(float(embeddings[i] @ embeddings[j]) > REDUNDANCY_THRESHOLD for j in selected):
+                continue
+            selected.append(i)
+            
+        selected.sort(key=lambda i: (candidates[i][1], candidates[i][2]))
+        return [(candidates[i][0], candidates[i][1], float(scores[i])) for i in selected]
+    
+    def answer(self, query_embedding: np.ndarray, chunks: List[Dict]) -> str:
+        """
+        Assemble les phrases retenues avec leurs citations
+        
+        Args:
+            query_embedding: Embedding de la question
+            chunks: Chunks retrouvés (numérotés comme les sources)
+            
+        Returns:
+            Réponse extractive, chaque phrase suivie de [n° de source]
+        """
+        with stage('extractive'):
+            sentences = self.select(query_embedding, chunks)
+        if not sentences:
+            return "Les informations demandées ne sont pas disponibles dans le cours."
+        return "D'après le cours :\n\n" + "\n".join(
+            f"- {sentence} [{source}]" for sentence, source, _ in sentences
+        )
@@ -1,7 +1,7 @@
 import PyPDF2
 import docx
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -52,7 +52,8 @@ class DocumentIngestion:
             file_path: Chemin vers le document
             
         Returns:
-            Dict avec 'filename', 'extension', 'content'
+            Dict avec 'filename', 'extension', 'content', 'num_characters'
+            et 'num_pages' (PDF uniquement, None sinon)
         """
         extension = file_path.suffix.lower()
         
@@ -74,5 +75,16 @@ class DocumentIngestion:
             'filename': file_path.name,
             'extension': extension,
             'content': content,
-            'num_characters': len(content)
-        }
\ No newline at end of file
+            'num_characters': len(content),
+            'num_pages': self.count_pages(file_path) if extension == '.pdf' else None
+        }
+    
+    @staticmethod
+    def count_pages(file_path: Path) -> Optional[int]:
+        """Nombre de pages d'un PDF (lecture de la table des pages seulement)"""
+        try:
+            with open(file_path, 'rb') as file:
+                return len(PyPDF2.PdfReader(file).pages)
+        except Exception as e:
+            logger.warning(f"Nombre de pages inconnu pour {file_path.name} : {e}")
+            return None
\ No newline at end of file
@@ -2,6 +2,8 @@
 Configuration spécifique pour le Learning Assistant RAG
 """
 from typing import Dict, List
+import re
+from .question_classifier import QuestionClassifier, normalize_text
 
 class LearningAssistantConfig:
     """Configuration dédiée à l'assistant pédagogique"""
@@ -16,6 +18,87 @@ class LearningAssistantConfig:
         'application': ['utiliser', 'appliquer', 'pratiquer', 'exercice']
     }
     
+    # Priorité quand plusieurs types sont reconnus dans une même question
+    # (ex : "comment faire" → procédure plutôt qu'explication)
+    QUESTION_TYPE_PRIORITIES = {
+        'procedure': 6,
+        'comparison': 5,
+        'example': 4,
+        'definition': 3,
+        'application': 2,
+        'explanation': 1
+    }
+    
+    # Questions d'exemple par type, pour le repli par embeddings quand
+    # aucun mot-clé n'est reconnu
+    QUESTION_TYPE_EXAMPLES = {
+        'definition': ["Que signifie ce terme ?", "Que veut dire overfitting ?", "Qu'appelle-t-on un neurone ?"],
+        'explanation': ["Pour quelle raison ce modèle converge-t-il ?", "Que se passe-t-il lors de l'entraînement ?"],
+        'example': ["Tu peux me montrer un cas concret ?", "As-tu une illustration de ce concept ?"],
+        'comparison': ["Lequel est le meilleur entre les deux ?", "Quels sont les points communs entre ces modèles ?"],
+        'procedure': ["Par quoi dois-je commencer pour entraîner un modèle ?", "Quel est l'ordre des opérations ?"],
+        'application': ["Dans quel cas s'en servir ?", "Comment le mettre en œuvre sur mes données ?"]
+    }
+    
+    # Questions hors sujet pour tout cours : leurs scores contre le corpus
+    # donnent la distribution de référence du seuil de pertinence
+    OFF_TOPIC_QUESTIONS = [
+        "Quelle est la recette de la tarte aux pommes ?",
+        "Qui a gagné la coupe du monde de football ?",
+        "Quel temps fera-t-il demain à Paris ?",
+        "Combien coûte un billet de train pour Lyon ?",
+        "Quel est le meilleur film de l'année ?",
+        "Comment réparer une fuite d'eau sous l'évier ?",
+        "Quelle est la capitale de l'Australie ?",
+        "Où partir en vacances cet été ?",
+        "Quels sont les horaires de la piscine municipale ?",
+        "Comment entretenir un jardin potager ?",
+        "Qui est le chanteur le plus populaire du moment ?",
+        "Quel est le prix de l'essence aujourd'hui ?"
+    ]
+    
+    # Questions proposées par l'interface (libellé du bouton, question)
+    SUGGESTED_QUESTIONS = [
+        ("💡 C'est quoi ... ?", "C'est quoi le machine learning ?"),
+        ("🔍 Comment ... ?", "Comment fonctionne un réseau de neurones ?"),
+        ("📋 Exemple de ... ?", "Donne-moi un exemple d'algorithme supervisé")
+    ]
+    
+    # Décomposition des questions de comparaison en sous-requêtes
+    # (un concept par sous-requête), de la plus précise à la plus large
+    COMPARISON_PATTERNS = [
+        re.compile(
+            r"(?:différences?|distinctions?|comparaison)\s+(?:entre\s+)?(?P<a>.+?)\s+(?:et|ou|vs\.?|versus)\s+(?P<b>.+)",
+            re.IGNORECASE
+        ),
+        re.compile(r"compar\w*\s+(?P<a>.+?)\s+(?:et|avec|à)\s+(?P<b>.+)", re.IGNORECASE),
+        re.compile(r"(?P<a>.+?)\s+(?:vs\.?|versus|ou)\s+(?P<b>.+)", re.IGNORECASE)
+    ]
+    
+    # Budget de génération (nouveaux tokens) par niveau, modulé par type
+    # de question : une définition est plus courte qu'une procédure
+    GENERATION_BUDGETS = {
+        'beginner': 300,
+        'intermediate': 250,
+        'advanced': 350
+    }
+    QUESTION_TYPE_BUDGET_FACTORS = {
+        'definition': 0.6,
+        'explanation': 1.0,
+        'example': 1.0,
+        'comparison': 1.2,
+        'procedure': 1.2,
+        'application': 1.0
+    }
+    
+    # Le modèle recopie parfois la structure du prompt : on s'arrête là
+    STOP_SEQUENCES = [
+        "\nQuestion de l'étudiant",
+        "\nContexte du cours",
+        "\n[Source ",
+        "\nTu es un assistant"
+    ]
+    
     # Formats de réponse selon le type de question
     RESPONSE_FORMATS = {
         'definition': {
@@ -122,16 +205,86 @@ Réponds avec rigueur académique :"""
         ]
     }
     
+    # Suggestions de suivi normalisées, reconnues comme relances
+    FOLLOW_UP_TEXTS = frozenset(
+        normalize_text(suggestion).strip(' ?!.')
+        for suggestions in FOLLOW_UP_SUGGESTIONS.values()
+        for suggestion in suggestions
+    )
+    
+    # Relances qui renvoient au sujet précédent sans le nommer
+    # ("un exemple ?", "tu peux détailler ça ?") ; textes sans accents
+    FOLLOW_UP_PATTERN = re.compile(
+        r"(?<!\w)(?:ca|cela|ceci|celui-ci|celle-ci|ce concept|cette notion|la-dessus|"
+        r"un exemple|d'autres exemples|un cas|une etape|detaill\w*|plus simplement|"
+        r"en pratique|pourquoi c'est|et si|et pour)(?!\w)"
+    )
+    
+    # Au-delà, une question est assez explicite pour une nouvelle recherche
+    FOLLOW_UP_MAX_WORDS = 8
+    
+    @staticmethod
+    def is_follow_up_question(question: str) -> bool:
+        """
+        Vrai pour une relance sans sujet propre : une des suggestions de
+        suivi proposées, ou une question courte qui renvoie au sujet précédent
+        """
+        text = normalize_text(question).strip(' ?!.')
+        if text in LearningAssistantConfig.FOLLOW_UP_TEXTS:
+            return True
+        return (
+            len(text.split()) <= LearningAssistantConfig.FOLLOW_UP_MAX_WORDS
+            and LearningAssistantConfig.FOLLOW_UP_PATTERN.search(text) is not None
+        )
+    
     @staticmethod
     def detect_question_type(question: str) -> str:
         """Détecte le type de question posée"""
-        question_lower = question.lower()
+        return question_classifier.classify(question)
+    
+    @staticmethod
+    def expand_question(question: str, question_type: str = None) -> List[str]:
+        """
+        Décompose une question en sous-requêtes de recherche
         
-        for qtype, keywords in LearningAssistantConfig.QUESTION_TYPES.items():
-            if any(keyword in question_lower for keyword in keywords):
-                return qtype
+        Une question de comparaison donne la question complète plus une
+        sous-requête par concept comparé ; les autres questions restent
+        une requête unique.
         
-        return 'general'
+        Args:
+            question: Question de l'étudiant
+            question_type: Type déjà détecté (sinon détecté ici)
+            
+        Returns:
+            Liste de requêtes, la question d'origine en premier
+        """
+        question_type = question_type or LearningAssistantConfig.detect_question_type(question)
+        if question_type != 'comparison':
+            return [question]
+            
+        text = question.strip().rstrip(' ?!.')
+        for pattern in LearningAssistantConfig.COMPARISON_PATTERNS:
+            match = pattern.search(text)
+            if match:
+                concepts = [match.group('a'), match.group('b')]
+                break
+        else:
+            return [question]
+            
+        queries = [question]
+        for concept in concepts:
+            concept = concept.strip(" ,;:'\"")
+            if concept and concept.lower() not in (q.lower() for q in queries):
+                queries.append(concept)
+        return queries
+    
+    @staticmethod
+    def generation_budget(level: str, question_type: str) -> int:
+        """Nombre maximal de nouveaux tokens pour un niveau et un type de question"""
+        budgets = LearningAssistantConfig.GENERATION_BUDGETS
+        base = budgets.get(level, budgets['intermediate'])
+        factor = LearningAssistantConfig.QUESTION_TYPE_BUDGET_FACTORS.get(question_type, 1.0)
+        return int(base * factor)
     
     @staticmethod
     def get_learning_level(metadata: Dict) -> str:
@@ -140,4 +293,9 @@ Réponds avec rigueur académique :"""
             return metadata['difficulty_level']
         return 'intermediate'  # par défaut
 
-learning_config = LearningAssistantConfig()
\ No newline at end of file
+learning_config = LearningAssistantConfig()
+
+question_classifier = QuestionClassifier(
+    LearningAssistantConfig.QUESTION_TYPES,
+    LearningAssistantConfig.QUESTION_TYPE_PRIORITIES
+)
\ No newline at end of file
@@ -1,25 +1,166 @@
 """
 Générateur de réponses spécialisé pour l'assistant pédagogique
 """
-from typing import List, Dict
+from typing import List, Dict, Tuple
+from collections import OrderedDict
+from pathlib import Path
+import copy
 import logging
-from transformers import pipeline, AutoTokenizer, AutoModelForCausalLM
+import threading
+import time
+import torch
+from transformers import (
+    pipeline, AutoTokenizer,
+    StoppingCriteria, StoppingCriteriaList
+)
 from .config import config
 from .learning_config import learning_config
+from .metrics import stage, record_generation, record_cache_lookup
 
 logger = logging.getLogger(__name__)
 
+# Instructions ajoutées au prompt selon le type de question
+TYPE_INSTRUCTIONS = {
+    'definition': "\n- Commence par une définition claire\n- Donne les caractéristiques principales\n- Explique l'importance",
+    'explanation': "\n- Explique le principe de base\n- Décris le fonctionnement\n- Donne les raisons sous-jacentes",
+    'example': "\n- Fournis 2-3 exemples concrets\n- Illustre avec des cas pratiques\n- Montre l'application",
+    'comparison': "\n- Compare les concepts point par point\n- Souligne similitudes et différences\n- Indique quand utiliser chacun",
+    'procedure': "\n- Présente les étapes de manière ordonnée\n- Explique chaque étape\n- Donne des conseils pratiques"
+}
+
+# Nombre de préambules dont le cache KV est conservé (un par niveau suffit)
+PREFIX_CACHE_SIZE = 8
+
+# Contrôle du décodage local
+REPETITION_PENALTY = 1.2
+NO_REPEAT_NGRAM_SIZE = 3
+# Évite une réponse vide suivie d'un repli extractif après coup
+MIN_NEW_TOKENS = 20
+# Borne absolue, quel que soit le budget du niveau et du type
+MAX_NEW_TOKENS = 400
+
+class DecodingControl(StoppingCriteria):
+    """
+    Arrêt anticipé de la génération locale
+    
+    Stoppe dès qu'une séquence d'arrêt apparaît dans le texte généré ou
+    que l'échéance est dépassée ; la réponse partielle est alors gardée.
+    """
+    
+    def __init__(self, tokenizer, prompt_length: int, stop_sequences: List[str],
+                 deadline: float = None, window: int = 16):
+        self.tokenizer = tokenizer
+        self.prompt_length = prompt_length
+        self.stop_sequences = stop_sequences
+        self.deadline = deadline
+        self.window = window
+        self.reason = None
+    
+    def __call__(self, input_ids, scores, **kwargs) -> bool:
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.reason = 'deadline'
+            return True
+            
+        # Seuls les derniers tokens générés peuvent compléter une séquence
+        generated = input_ids[0, self.prompt_length:]
+        tail = self.tokenizer.decode(generated[-self.window:], skip_special_tokens=True)
+        if any(stop in tail for stop in self.stop_sequences):
+            self.reason = 'stop_sequence'
+            return True
+        return False
+
+def trim_answer(text: str, stop_sequences: List[str], partial: bool = False) -> str:
+    """
+    Coupe la réponse à la première séquence d'arrêt
+    
+    Une réponse partielle (échéance, budget atteint) est ramenée à sa
+    dernière phrase complète quand cela garde l'essentiel du texte.
+    """
+    for stop in stop_sequences:
+        position = text.find(stop)
+        if position != -1:
+            text = text[:position]
+    text = text.strip()
+    
+    if partial:
+        end = max(text.rfind(mark) for mark in ('.', '!', '?', '\n'))
+        if end >= len(text) // 2:
+            text = text[:end + 1].strip()
+    return text
+
+class PromptTemplate:
+    """
+    Template pédagogique découpé autour de {context} et {question}
+    
+    Les parties fixes sont préparées une fois (et tokenisées pour le
+    modèle local) ; seule l'insertion du contexte et de la question
+    reste à faire par requête.
+    """
+    
+    __slots__ = ('prefix', 'between', 'suffix', 'prefix_ids', 'between_ids', 'suffix_ids')
+    
+    def __init__(self, template: str, instructions: str = ""):
+        self.prefix, rest = template.split('{context}')
+        self.between, tail = rest.split('{question}')
+        self.suffix = tail + instructions
+        self.prefix_ids = self.between_ids = self.suffix_ids = None
+    
+    def render(self, context: str, question: str) -> str:
+        """Prompt complet (identique à template.format(...) + instructions)"""
+        return f"{self.prefix}{context}{self.between}{question}{self.suffix}"
+    
+    def tokenize(self, tokenizer):
+        """Pré-tokenise les parties fixes"""
+        self.prefix_ids = tokenizer.encode(self.prefix)
+        self.between_ids = tokenizer.encode(self.between, add_special_tokens=False)
+        self.suffix_ids = tokenizer.encode(self.suffix, add_special_tokens=False)
+
 class LearningResponseGenerator:
     """Générateur de réponses pédagogiques adaptatif"""
     
-    def __init__(self, model_name: str = None, use_openai: bool = False):
-        self.model_name = model_name or config.LLM_MODEL
+    def __init__(self, model_name: str = None, use_openai: bool = False, use_prefix_cache: bool = True,
+                 max_generation_seconds: float = None, stub_latency: float = None,
+                 precision: str = 'fp32', gguf_path: str = None, numa: bool = False):
+        # Avec stub_latency (secondes), aucun modèle n'est chargé : chaque
+        # génération attend ce délai (tests de charge sans GPU ni LLM)
+        self.stub_latency = stub_latency
+        self.model_name = 'stub' if stub_latency is not None else (model_name or config.LLM_MODEL)
         self.use_openai = use_openai
+        self.use_prefix_cache = use_prefix_cache
+        # Précision du modèle local (fp32, bf16, int8 ou gguf, voir cpu_inference)
+        self.precision = precision
+        self.gguf_path = gguf_path
+        self.numa = numa
+        # Durée maximale d'une génération (réponse partielle au-delà)
+        self.max_generation_seconds = max_generation_seconds
+        # Cache KV du préambule de chaque template (modèle local)
+        self._prefix_cache: OrderedDict = OrderedDict()
+        self._prefix_lock = threading.Lock()
         
-        if use_openai and config.OPENAI_API_KEY:
+        if stub_latency is not None:
+            logger.info(f"LLM simulé : {stub_latency * 1000:.0f} ms par génération")
+        elif use_openai and config.OPENAI_API_KEY:
             self._init_openai()
         else:
             self._init_local_model()
+            
+        self.templates = self._compile_templates()
+    
+    def _compile_templates(self) -> Dict[tuple, PromptTemplate]:
+        """Prépare un template par (niveau, type de question)"""
+        templates = {}
+        for level, template in learning_config.LEARNING_PROMPTS.items():
+            for question_type in list(learning_config.QUESTION_TYPES) + ['general']:
+                compiled = PromptTemplate(template, TYPE_INSTRUCTIONS.get(question_type, ""))
+                if hasattr(self, 'tokenizer'):
+                    compiled.tokenize(self.tokenizer)
+                templates[(level, question_type)] = compiled
+        return templates
+    
+    def _get_template(self, level: str, question_type: str) -> PromptTemplate:
+        if level not in learning_config.LEARNING_PROMPTS:
+            level = 'intermediate'
+        return self.templates.get((level, question_type)) or self.templates[(level, 'general')]
     
     def _init_openai(self):
         """Initialise OpenAI"""
@@ -34,16 +175,31 @@ class LearningResponseGenerator:
     
     def _init_local_model(self):
         """Initialise un modèle local"""
-        logger.info(f"Chargement du modèle : {self.model_name}")
+        from .cpu_inference import PRECISIONS, load_causal_lm, load_gguf
+        
+        if self.precision not in PRECISIONS:
+            raise ValueError(f"Précision inconnue : {self.precision} (attendu : {', '.join(PRECISIONS)})")
+        if self.precision == 'gguf':
+            if not self.gguf_path:
+                raise ValueError("Le chemin du modèle GGUF est requis avec la précision 'gguf'")
+            logger.info(f"Chargement du modèle GGUF : {self.gguf_path}")
+            self.model_name = Path(self.gguf_path).name
+            # Mêmes threads que torch (configure_torch_threads) ; un contexte
+            # llama.cpp ne sert qu'une génération à la fois
+            self.llama = load_gguf(self.gguf_path, torch.get_num_threads(), self.numa)
+            self._llama_lock = threading.Lock()
+            logger.info("✅ Modèle GGUF chargé")
+            return
+            
+        logger.info(f"Chargement du modèle : {self.model_name} ({self.precision})")
         
         try:
             self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-            self.model = AutoModelForCausalLM.from_pretrained(self.model_name)
+            self.model = load_causal_lm(self.model_name, self.precision)
             self.generator = pipeline(
                 "text-generation",
                 model=self.model,
                 tokenizer=self.tokenizer,
-                max_new_tokens=300,
                 temperature=0.7
             )
             logger.info("✅ Modèle local chargé")
@@ -56,7 +212,9 @@ class LearningResponseGenerator:
         question: str,
         context_chunks: List[Dict],
         learning_level: str = 'intermediate',
-        max_chunks: int = 5
+        max_chunks: int = 5,
+        question_type: str = None,
+        deadline: float = None
     ) -> Dict[str, any]:
         """
         Génère une réponse pédagogique adaptée au niveau
@@ -66,6 +224,8 @@ class LearningResponseGenerator:
             context_chunks: Chunks récupérés
             learning_level: Niveau (beginner/intermediate/advanced)
             max_chunks: Nombre max de chunks
+            question_type: Type déjà détecté (sinon détecté ici)
+            deadline: Échéance absolue (time.monotonic()) de la génération
             
         Returns:
             Dict avec answer, sources, question_type, suggestions
@@ -76,7 +236,7 @@ class LearningResponseGenerator:
             return self._handle_no_context(question)
         
         # Détecter le type de question
-        question_type = learning_config.detect_question_type(question)
+        question_type = question_type or learning_config.detect_question_type(question)
         logger.info(f"Type de question détecté : {question_type}")
         
         # Limiter et formater le contexte
@@ -84,18 +244,30 @@ class LearningResponseGenerator:
         context = self._format_educational_context(limited_chunks)
         
         # Construire le prompt pédagogique
-        prompt = self._build_pedagogical_prompt(
-            question, 
-            context, 
-            learning_level,
-            question_type
-        )
+        with stage('prompt'):
+            template = self._get_template(learning_level, question_type)
+            prompt = template.render(context, question)
         
+        # Budget et échéance de la génération
+        max_new_tokens = min(learning_config.generation_budget(learning_level, question_type), MAX_NEW_TOKENS)
+        if self.max_generation_seconds is not None:
+            own_deadline = time.monotonic() + self.max_generation_seconds
+            deadline = own_deadline if deadline is None else min(deadline, own_deadline)
+            
         # Générer la réponse
-        if self.use_openai and hasattr(self, 'client'):
-            answer = self._generate_with_openai_pedagogical(prompt, learning_level)
-        else:
-            answer = self._generate_with_local(prompt)
+        with stage('generation'):
+            if self.stub_latency is not None:
+                answer, truncated = self._generate_with_stub(prompt, max_new_tokens, deadline)
+            elif self.use_openai and hasattr(self, 'client'):
+                answer, truncated = self._generate_with_openai_pedagogical(
+                    prompt, learning_level, max_new_tokens, deadline
+                )
+            elif hasattr(self, 'llama'):
+                answer, truncated = self._generate_with_gguf(prompt, max_new_tokens, deadline)
+            else:
+                answer, truncated = self._generate_with_local(
+                    prompt, template, context, question, max_new_tokens, deadline
+                )
         
         # Ajouter des suggestions de suivi
         suggestions = self._get_follow_up_suggestions(question_type)
@@ -106,7 +278,49 @@ class LearningResponseGenerator:
             'context_used': len(limited_chunks),
             'question_type': question_type,
             'learning_level': learning_level,
-            'follow_up_suggestions': suggestions
+            'follow_up_suggestions': suggestions,
+            'truncated': truncated
+        }
+    
+    def generate_extractive_answer(
+        self,
+        question: str,
+        context_chunks: List[Dict],
+        answerer,
+        query_embedding,
+        learning_level: str = 'intermediate',
+        max_chunks: int = 5,
+        question_type: str = None
+    ) -> Dict[str, any]:
+        """
+        Réponse rapide sans génération (phrases extraites et citées)
+        
+        Args:
+            question: Question de l'étudiant
+            context_chunks: Chunks récupérés
+            answerer: ExtractiveAnswerer
+            query_embedding: Embedding de la question (celui de la recherche)
+            learning_level: Niveau (beginner/intermediate/advanced)
+            max_chunks: Nombre max de chunks
+            question_type: Type déjà détecté (sinon détecté ici)
+            
+        Returns:
+            Même structure que generate_pedagogical_answer
+        """
+        if not context_chunks:
+            return self._handle_no_context(question)
+            
+        question_type = question_type or learning_config.detect_question_type(question)
+        limited_chunks = context_chunks[:max_chunks]
+        
+        return {
+            'answer': answerer.answer(query_embedding, limited_chunks),
+            'sources': self._format_sources(limited_chunks),
+            'context_used': len(limited_chunks),
+            'question_type': question_type,
+            'learning_level': learning_level,
+            'follow_up_suggestions': self._get_follow_up_suggestions(question_type),
+            'truncated': False
         }
     
     def _format_educational_context(self, chunks: List[Dict]) -> str:
@@ -133,34 +347,16 @@ class LearningResponseGenerator:
         question_type: str
     ) -> str:
         """Construit un prompt pédagogique adapté"""
-        
-        # Obtenir le template du niveau
-        base_prompt = learning_config.LEARNING_PROMPTS.get(
-            level, 
-            learning_config.LEARNING_PROMPTS['intermediate']
-        )
-        
-        # Ajouter des instructions spécifiques selon le type
-        type_instructions = {
-            'definition': "\n- Commence par une définition claire\n- Donne les caractéristiques principales\n- Explique l'importance",
-            'explanation': "\n- Explique le principe de base\n- Décris le fonctionnement\n- Donne les raisons sous-jacentes",
-            'example': "\n- Fournis 2-3 exemples concrets\n- Illustre avec des cas pratiques\n- Montre l'application",
-            'comparison': "\n- Compare les concepts point par point\n- Souligne similitudes et différences\n- Indique quand utiliser chacun",
-            'procedure': "\n- Présente les étapes de manière ordonnée\n- Explique chaque étape\n- Donne des conseils pratiques"
-        }
-        
-        specific_instructions = type_instructions.get(question_type, "")
-        
-        # Assembler le prompt complet
-        full_prompt = base_prompt.format(
-            context=context,
-            question=question
-        ) + specific_instructions
-        
-        return full_prompt
+        return self._get_template(level, question_type).render(context, question)
     
-    def _generate_with_openai_pedagogical(self, prompt: str, level: str) -> str:
-        """Génère avec OpenAI en mode pédagogique"""
+    def _generate_with_openai_pedagogical(self, prompt: str, level: str, max_new_tokens: int = 400,
+                                          deadline: float = None) -> Tuple[str, bool]:
+        """
+        Génère avec OpenAI en mode pédagogique
+        
+        Returns:
+            (réponse, True si elle a été coupée par le budget)
+        """
         try:
             system_messages = {
                 'beginner': "Tu es un professeur patient qui explique simplement aux débutants.",
@@ -168,38 +364,230 @@ class LearningResponseGenerator:
                 'advanced': "Tu es un expert académique qui partage des connaissances avancées."
             }
             
+            timeout = None
+            if deadline is not None:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    raise TimeoutError("Échéance dépassée avant la génération")
+                    
+            start = time.perf_counter()
             response = self.client.chat.completions.create(
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": system_messages.get(level, system_messages['intermediate'])},
                     {"role": "user", "content": prompt}
                 ],
-                max_tokens=400,
-                temperature=0.7
+                max_tokens=max_new_tokens,
+                temperature=0.7,
+                frequency_penalty=0.3,
+                # L'API accepte au plus 4 séquences d'arrêt
+                stop=learning_config.STOP_SEQUENCES[:4],
+                timeout=timeout
             )
-            return response.choices[0].message.content.strip()
+            if response.usage is not None:
+                record_generation('openai', response.usage.completion_tokens, time.perf_counter() - start)
+            choice = response.choices[0]
+            truncated = choice.finish_reason == 'length'
+            return trim_answer(choice.message.content, learning_config.STOP_SEQUENCES, truncated), truncated
         except Exception as e:
             logger.error(f"Erreur OpenAI : {e}")
-            return self._create_extractive_answer_educational(prompt)
+            return self._create_extractive_answer_educational(prompt), False
     
-    def _generate_with_local(self, prompt: str) -> str:
-        """Génère avec modèle local"""
+    def _generate_with_local(self, prompt: str, template: PromptTemplate = None,
+                             context: str = None, question: str = None,
+                             max_new_tokens: int = MAX_NEW_TOKENS, deadline: float = None) -> Tuple[str, bool]:
+        """
+        Génère avec modèle local
+        
+        Returns:
+            (réponse, True si elle a été coupée par l'échéance ou le budget)
+        """
         try:
-            result = self.generator(prompt, max_length=500)[0]['generated_text']
-            # Extraire seulement la réponse générée
-            answer = result.replace(prompt, "").strip()
+            start = time.perf_counter()
+            if self.use_prefix_cache and template is not None and template.prefix_ids is not None:
+                prompt_ids = template.prefix_ids + self._request_ids(template, context, question)
+            else:
+                prompt_ids = self.tokenizer.encode(prompt)
+                
+            control = DecodingControl(
+                self.tokenizer, len(prompt_ids), learning_config.STOP_SEQUENCES, deadline
+            )
+            decoding = {
+                'max_new_tokens': max_new_tokens,
+                'min_new_tokens': min(MIN_NEW_TOKENS, max_new_tokens),
+                'repetition_penalty': REPETITION_PENALTY,
+                'no_repeat_ngram_size': NO_REPEAT_NGRAM_SIZE,
+                'stopping_criteria': StoppingCriteriaList([control]),
+                'do_sample': True,
+                'temperature': 0.7,
+                'pad_token_id': self.tokenizer.eos_token_id
+            }
+            
+            if self.use_prefix_cache and template is not None and template.prefix_ids is not None:
+                answer, num_tokens = self._generate_with_prefix_cache(template, prompt_ids, decoding)
+            else:
+                # return_full_text=False : seule la suite est renvoyée, plus
+                # besoin de retirer le prompt du texte généré
+                answer = self.generator(prompt, return_full_text=False, **decoding)[0]['generated_text']
+                num_tokens = len(self.tokenizer.encode(answer))
+            record_generation('local', num_tokens, time.perf_counter() - start)
+            
+            truncated = control.reason == 'deadline' or num_tokens >= max_new_tokens
+            if control.reason == 'deadline':
+                logger.warning(f"Échéance atteinte : réponse partielle ({num_tokens} tokens)")
+            answer = trim_answer(answer, learning_config.STOP_SEQUENCES, truncated)
             
             if len(answer) < 30:
-                return self._create_extractive_answer_educational(prompt)
+                return self._create_extractive_answer_educational(prompt), False
             
-            return answer
+            return answer, truncated
         except Exception as e:
             logger.error(f"Erreur génération : {e}")
-            return self._create_extractive_answer_educational(prompt)
+            return self._create_extractive_answer_educational(prompt), False
     
-    def _create_extractive_answer_educational(self, context: str) -> str:
+    def _generate_with_gguf(self, prompt: str, max_new_tokens: int = MAX_NEW_TOKENS,
+                            deadline: float = None) -> Tuple[str, bool]:
+        """
+        Génère avec un modèle GGUF (llama.cpp)
+        
+        Le texte arrive token par token : la génération s'arrête à
+        l'échéance avec la réponse partielle, comme DecodingControl.
+        """
+        try:
+            start = time.perf_counter()
+            pieces, num_tokens, reason = [], 0, None
+            with self._llama_lock:
+                stream = self.llama.create_completion(
+                    prompt,
+                    max_tokens=max_new_tokens,
+                    temperature=0.7,
+                    repeat_penalty=REPETITION_PENALTY,
+                    stop=learning_config.STOP_SEQUENCES,
+                    stream=True
+                )
+                for chunk in stream:
+                    choice = chunk['choices'][0]
+                    pieces.append(choice['text'])
+                    num_tokens += 1
+                    reason = choice.get('finish_reason') or reason
+                    if deadline is not None and time.monotonic() >= deadline:
+                        reason = 'deadline'
+                        stream.close()
+                        break
+            record_generation('gguf', num_tokens, time.perf_counter() - start)
+            
+            truncated = reason in ('deadline', 'length')
+            if reason == 'deadline':
+                logger.warning(f"Échéance atteinte : réponse partielle ({num_tokens} tokens)")
+            answer = trim_answer("".join(pieces), learning_config.STOP_SEQUENCES, truncated)
+            
+            if len(answer) < 30:
+                return self._create_extractive_answer_educational(prompt), False
+                
+            return answer, truncated
+        except Exception as e:
+            logger.error(f"Erreur génération GGUF : {e}")
+            return self._create_extractive_answer_educational(prompt), False
+    
+    def _generate_with_stub(self, prompt: str, max_new_tokens: int, deadline: float = None) -> Tuple[str, bool]:
+        """
+        LLM simulé : attend stub_latency (ou l'échéance) puis renvoie le
+        début du contexte, comme la réponse extractive de secours
+        """
+        start = time.perf_counter()
+        delay = self.stub_latency
+        if deadline is not None:
+            delay = min(delay, max(0.0, deadline - time.monotonic()))
+        time.sleep(delay)
+        truncated = delay < self.stub_latency
+        # Tokens « produits » au rythme de max_new_tokens par stub_latency :
+        # une génération coupée par l'échéance n'en compte qu'une partie
+        produced = max_new_tokens if not truncated else int(max_new_tokens * delay / self.stub_latency)
+        record_generation('stub', produced, time.perf_counter() - start)
+        return self._create_extractive_answer_educational(prompt), truncated
+    
+    def _request_ids(self, template: PromptTemplate, context: str, question: str) -> List[int]:
+        """Tokens propres à la requête (tout le prompt sauf le préambule)"""
+        return (
+            self.tokenizer.encode(context, add_special_tokens=False)
+            + template.between_ids
+            + self.tokenizer.encode(question, add_special_tokens=False)
+            + template.suffix_ids
+        )
+    
+    def _prefix_past(self, template: PromptTemplate):
+        """
+        Cache KV du préambule d'un template, copié pour la requête
+        
+        Le préambule (consignes du niveau) est identique d'une requête à
+        l'autre : il n'est passé dans le modèle qu'une fois, puis ses
+        clés/valeurs d'attention sont réutilisées. Chaque requête reçoit
+        sa propre copie : les caches objets de transformers (DynamicCache)
+        sont étendus en place par le modèle et generate(), le cache
+        conservé doit rester limité au préambule.
+        """
+        with self._prefix_lock:
+            past = self._prefix_cache.get(template.prefix)
+            if past is not None:
+                self._prefix_cache.move_to_end(template.prefix)
+        record_cache_lookup('prompt_prefix', past is not None)
+        if past is not None:
+            return copy.deepcopy(past)
+            
+        with torch.no_grad():
+            prefix_ids = torch.tensor([template.prefix_ids])
+            past = self.model(prefix_ids, use_cache=True).past_key_values
+            
+        with self._prefix_lock:
+            self._prefix_cache[template.prefix] = past
+            if len(self._prefix_cache) > PREFIX_CACHE_SIZE:
+                self._prefix_cache.popitem(last=False)
+        return copy.deepcopy(past)
+    
+    def _generate_with_prefix_cache(self, template: PromptTemplate, prompt_ids: List[int],
+                                    decoding: Dict) -> Tuple[str, int]:
+        """
+        Génère en ne calculant que les tokens propres à la requête
+        
+        Le préambule vient du cache KV ; seuls le contexte, la question
+        et la fin du template sont passés dans le modèle avant la
+        génération.
+        
+        Returns:
+            (réponse, nombre de tokens générés)
+        """
+        request_ids = prompt_ids[len(template.prefix_ids):]
+        input_ids = torch.tensor([prompt_ids])
+        
+        with torch.no_grad():
+            past = self._prefix_past(template)
+            # Remplissage de tous les tokens sauf le dernier : generate()
+            # repart du dernier token avec un cache couvrant le reste
+            if len(request_ids) > 1:
+                past = self.model(
+                    torch.tensor([request_ids[:-1]]),
+                    past_key_values=past,
+                    use_cache=True
+                ).past_key_values
+                
+            output = self.model.generate(
+                input_ids,
+                attention_mask=torch.ones_like(input_ids),
+                past_key_values=past,
+                **decoding
+            )
+            
+        generated = output[0, input_ids.shape[1]:]
+        answer = self.tokenizer.decode(generated, skip_special_tokens=True)
+        return answer, len(generated)
+    
+    def _create_extractive_answer_educational(self, prompt: str) -> str:
         """Crée une réponse extractive éducative"""
-        # Extraire les phrases les plus pertinentes
+        # Ne garder que le contexte du cours, sans les consignes du prompt
+        start = prompt.find('[Source ')
+        end = prompt.find("\nQuestion de l'étudiant", max(start, 0))
+        context = prompt[start:end] if start != -1 and end != -1 else ""
+        
         lines = context.split('\n')
         relevant_lines = [l for l in lines if l.strip() and not l.startswith('[')]
         
@@ -215,7 +603,9 @@ class LearningResponseGenerator:
                 'chunk_id': chunk.get('chunk_id', ''),
                 'score': chunk.get('score', 0),
                 'page': chunk.get('page_number', 'N/A'),
-                'topic': chunk.get('topic', 'Général')
+                'topic': chunk.get('topic', 'Général'),
+                # Autres documents contenant le même passage (quasi-doublons fusionnés)
+                'also_in': sorted({d['document_name'] for d in chunk.get('duplicates', ())} - {chunk.get('document_name')})
             }
             for chunk in chunks
         ]
@@ -247,5 +637,6 @@ class LearningResponseGenerator:
                 "Reformulez votre question",
                 "Vérifiez l'orthographe",
                 "Précisez le sujet"
-            ]
+            ],
+            'truncated': False
         }
\ No newline at end of file
@@ -0,0 +1,128 @@
+"""
+Instrumentation des latences du pipeline RAG et métriques Prometheus
+"""
+from typing import Dict, Optional
+from contextlib import contextmanager
+import contextvars
+import time
+import logging
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+
+logger = logging.getLogger(__name__)
+
+# Bornes adaptées à des étapes allant de la sous-milliseconde (FAISS)
+# à plusieurs secondes (génération sur CPU)
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+STAGE_LATENCY = Histogram(
+    'rag_stage_latency_seconds',
+    "Durée de chaque étape du pipeline (embedding, search, prompt, generation)",
+    ['stage'],
+    buckets=LATENCY_BUCKETS
+)
+REQUEST_LATENCY = Histogram(
+    'rag_request_latency_seconds',
+    "Durée totale des requêtes HTTP",
+    ['method', 'endpoint', 'status'],
+    buckets=LATENCY_BUCKETS
+)
+GENERATED_TOKENS = Counter(
+    'rag_generated_tokens_total',
+    "Nombre de tokens générés par le LLM",
+    ['backend']
+)
+GENERATION_TOKENS_PER_SECOND = Histogram(
+    'rag_generation_tokens_per_second',
+    "Débit de génération du LLM",
+    ['backend'],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500)
+)
+QUEUE_DEPTH = Gauge(
+    'rag_queue_depth',
+    "Requêtes en attente ou en cours de traitement",
+    ['queue']
+)
+CACHE_LOOKUPS = Counter(
+    'rag_cache_lookups_total',
+    "Accès aux caches (hit/miss)",
+    ['cache', 'result']
+)
+RELEVANCE_GATE = Counter(
+    'rag_relevance_gate_total',
+    "Questions avec au moins un chunk au-dessus du seuil de pertinence (passed) ou aucun (rejected)",
+    ['result']
+)
+SHARD_SEARCHES = Counter(
+    'rag_shard_searches_total',
+    "Recherches envoyées aux nœuds : réponse à temps (ok), hors délai (timeout) ou erreur",
+    ['shard', 'result']
+)
+SHARD_LATENCY = Histogram(
+    'rag_shard_latency_seconds',
+    "Durée des recherches sur chaque nœud (réponses reçues)",
+    ['shard'],
+    buckets=LATENCY_BUCKETS
+)
+INDEX_VECTORS = Gauge(
+    'rag_index_vectors',
+    "Nombre de vecteurs dans l'index FAISS servi"
+)
+INDEX_VERSION = Gauge(
+    'rag_index_version',
+    "Version du snapshot d'index servi"
+)
+
+# Durées par étape de la requête en cours (partagées entre le middleware
+# et le thread qui exécute l'endpoint)
+_request_timings: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar(
+    'rag_request_timings', default=None
+)
+
+def start_request_timings() -> Dict[str, float]:
+    """Démarre la collecte des durées par étape pour la requête courante"""
+    timings = {}
+    _request_timings.set(timings)
+    return timings
+
+@contextmanager
+def stage(name: str):
+    """
+    Mesure la durée d'une étape du pipeline
+    
+    La durée est observée dans l'histogramme Prometheus et, si une
+    requête HTTP est en cours, ajoutée à son détail de timings.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_LATENCY.labels(stage=name).observe(elapsed)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + elapsed
+
+def record_generation(backend: str, num_tokens: int, elapsed: float):
+    """Enregistre le nombre de tokens générés et le débit"""
+    if num_tokens <= 0:
+        return
+    GENERATED_TOKENS.labels(backend=backend).inc(num_tokens)
+    if elapsed > 0:
+        GENERATION_TOKENS_PER_SECOND.labels(backend=backend).observe(num_tokens / elapsed)
+
+def record_cache_lookup(cache: str, hit: bool):
+    """Enregistre un accès à un cache"""
+    CACHE_LOOKUPS.labels(cache=cache, result='hit' if hit else 'miss').inc()
+
+def format_timings(timings: Dict[str, float]) -> str:
+    """Formate les durées pour l'en-tête X-Timing (ex: 'search=1.2ms, generation=850.0ms')"""
+    return ", ".join(f"{name}={elapsed * 1000:.1f}ms" for name, elapsed in timings.items())
+
+def export_metrics() -> bytes:
+    """Sérialise toutes les métriques au format texte Prometheus"""
+    return generate_latest()
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
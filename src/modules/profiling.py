@@ -0,0 +1,280 @@
+"""
+Profilage à la demande : cProfile par requête, fonctions chaudes
+agrégées, piles échantillonnées (flamegraph) et instantanés mémoire
+"""
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+import contextvars
+import cProfile
+import io
+import itertools
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Fonctions d'attente : un thread arrêté sur l'une d'elles est inactif
+IDLE_FUNCTIONS = {
+    ('threading.py', 'wait'), ('queue.py', 'get'), ('selectors.py', 'select'),
+    ('thread.py', '_worker'), ('socket.py', 'accept')
+}
+
+class ProfileCapture:
+    """Profil cProfile d'une requête"""
+    
+    __slots__ = ('id', 'label', 'started_at', 'duration', 'stats')
+    
+    def __init__(self, capture_id: int, label: str):
+        self.id = capture_id
+        self.label = label
+        self.started_at = time.time()
+        self.duration = None
+        self.stats = None
+    
+    def summary(self) -> Dict:
+        return {
+            'id': self.id,
+            'label': self.label,
+            'started_at': self.started_at,
+            'duration': round(self.duration, 4) if self.duration is not None else None
+        }
+
+# Capture demandée pour la requête en cours (None : pas de profilage)
+_current_capture: contextvars.ContextVar[Optional[ProfileCapture]] = contextvars.ContextVar(
+    'rag_profile_capture', default=None
+)
+
+@contextmanager
+def profiled():
+    """
+    Profile le bloc si la requête courante fait l'objet d'une capture
+    
+    À placer dans le code exécuté par le pool de threads : cProfile ne
+    suit que le thread qui l'active. Sans capture demandée, le seul coût
+    est la lecture d'une variable de contexte.
+    """
+    capture = _current_capture.get()
+    if capture is None:
+        yield
+        return
+        
+    profile = cProfile.Profile()
+    start = time.perf_counter()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        capture.duration = time.perf_counter() - start
+        capture.stats = pstats.Stats(profile)
+
+def _location(filename: str, package: str) -> Optional[str]:
+    """Chemin relatif au paquet (ex: 'modules/retrieval.py'), None hors du paquet"""
+    marker = f"{os.sep}{package}{os.sep}"
+    position = filename.rfind(marker)
+    return filename[position + 1:] if position >= 0 else None
+
+class Profiler:
+    """
+    Captures de profilage et agrégat des fonctions chaudes
+    
+    Une requête est profilée si elle le demande (en-tête X-Profile), si
+    des captures ont été armées par un administrateur, ou par tirage
+    selon sample_rate. Les profils s'additionnent dans un agrégat dont
+    on extrait les fonctions du paquet `package` les plus coûteuses ;
+    les dernières captures restent téléchargeables au format pstats.
+    """
+    
+    def __init__(self, sample_rate: float = 0.0, package: str = 'modules', max_captures: int = 20):
+        self.sample_rate = sample_rate
+        self.package = package
+        self._captures = deque(maxlen=max_captures)
+        self._aggregate: Optional[pstats.Stats] = None
+        self._aggregated = 0
+        self._armed = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+    
+    def arm(self, requests: int):
+        """Profile les `requests` prochaines requêtes"""
+        with self._lock:
+            self._armed = requests
+    
+    def start_capture(self, label: str, requested: bool = False) -> Optional[ProfileCapture]:
+        """Décide si la requête est profilée ; si oui, la capture suit son contexte"""
+        if not requested:
+            with self._lock:
+                requested = self._armed > 0
+                if requested:
+                    self._armed -= 1
+        if not requested and not (self.sample_rate and random.random() < self.sample_rate):
+            return None
+        capture = ProfileCapture(next(self._ids), label)
+        _current_capture.set(capture)
+        return capture
+    
+    def record(self, capture: ProfileCapture) -> bool:
+        """Conserve une capture terminée ; False si rien n'a été profilé"""
+        if capture.stats is None:
+            return False
+        with self._lock:
+            self._captures.append(capture)
+            if self._aggregate is None:
+                self._aggregate = pstats.Stats()
+            self._aggregate.add(capture.stats)
+            self._aggregated += 1
+        return True
+    
+    def captures(self) -> List[Dict]:
+        with self._lock:
+            return [capture.summary() for capture in self._captures]
+    
+    def capture_stats(self, capture_id: int) -> Optional[bytes]:
+        """Profil d'une capture au format pstats (snakeviz, flameprof, gprof2dot)"""
+        with self._lock:
+            capture = next((c for c in self._captures if c.id == capture_id), None)
+        if capture is None:
+            return None
+        return marshal.dumps(capture.stats.stats)
+    
+    def capture_text(self, capture_id: int, limit: int = 40) -> Optional[str]:
+        """Profil d'une capture en texte, trié par temps cumulé"""
+        with self._lock:
+            capture = next((c for c in self._captures if c.id == capture_id), None)
+        if capture is None:
+            return None
+        stream = io.StringIO()
+        stats = pstats.Stats(stream=stream)
+        stats.add(capture.stats)
+        stats.sort_stats('cumulative').print_stats(limit)
+        return stream.getvalue()
+    
+    def hot_functions(self, limit: int = 25, sort: str = 'cumulative') -> Dict:
+        """
+        Fonctions du paquet les plus coûteuses, sur toutes les captures
+        
+        Args:
+            limit: Nombre de fonctions
+            sort: 'cumulative' (avec les appels) ou 'total' (propre à la fonction)
+        """
+        with self._lock:
+            if self._aggregate is None:
+                return {'captures': 0, 'functions': []}
+            stats = dict(self._aggregate.stats)
+            captures = self._aggregated
+            
+        functions = []
+        for (filename, line, name), (_, calls, total, cumulative, _) in stats.items():
+            location = _location(filename, self.package)
+            if location is None:
+                continue
+            functions.append({
+                'function': f"{location}:{line}({name})",
+                'calls': calls,
+                'total_time': round(total, 6),
+                'cumulative_time': round(cumulative, 6),
+                'cumulative_per_capture': round(cumulative / captures, 6)
+            })
+        key = 'total_time' if sort == 'total' else 'cumulative_time'
+        functions.sort(key=lambda f: f[key], reverse=True)
+        return {'captures': captures, 'functions': functions[:limit]}
+    
+    def reset(self):
+        with self._lock:
+            self._captures.clear()
+            self._aggregate = None
+            self._aggregated = 0
+            self._armed = 0
+    
+    def memory_snapshot(self, limit: int = 20) -> Dict:
+        """
+        Allocations Python par fichier et évolution depuis l'instantané précédent
+        
+        tracemalloc doit avoir été démarré (start_memory_tracing) : son
+        suivi ralentit toutes les allocations. La mémoire des index FAISS,
+        allouée en C++, n'y apparaît pas.
+        """
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("Le suivi mémoire n'est pas démarré")
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")
+        ])
+        current, peak = tracemalloc.get_traced_memory()
+        
+        def entry(stat) -> Dict:
+            frame = stat.traceback[0]
+            return {
+                'file': _location(frame.filename, self.package) or frame.filename,
+                'size': stat.size,
+                'count': stat.count,
+                **({'size_diff': stat.size_diff, 'count_diff': stat.count_diff} if hasattr(stat, 'size_diff') else {})
+            }
+            
+        with self._lock:
+            previous, self._snapshot = self._snapshot, snapshot
+        report = {
+            'traced_bytes': current,
+            'peak_bytes': peak,
+            'top': [entry(stat) for stat in snapshot.statistics('filename')[:limit]]
+        }
+        if previous is not None:
+            report['growth'] = [entry(stat) for stat in snapshot.compare_to(previous, 'filename')[:limit]]
+        return report
+
+def process_rss() -> Optional[int]:
+    """Mémoire résidente du processus (octets), y compris les allocations C++ (FAISS, torch)"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+def start_memory_tracing(frames: int = 1):
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+        logger.info("Suivi mémoire (tracemalloc) démarré")
+
+def stop_memory_tracing():
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+        logger.info("Suivi mémoire (tracemalloc) arrêté")
+
+def sample_stacks(seconds: float, interval: float = 0.005, include_idle: bool = False) -> str:
+    """
+    Échantillonne les piles de tous les threads pendant `seconds`
+    
+    Contrairement à cProfile, couvre tous les threads (génération,
+    pool de l'API) sans les ralentir. Le résultat est au format « piles
+    repliées » (une ligne 'f1;f2;f3 nombre'), lu par flamegraph.pl et
+    speedscope.
+    """
+    own = threading.get_ident()
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    stacks = Counter()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+            code = frame.f_code
+            if not include_idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_FUNCTIONS:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)})")
+                frame = frame.f_back
+            stack.append(names.get(thread_id, str(thread_id)))
+            stacks[";".join(reversed(stack))] += 1
+        time.sleep(interval)
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
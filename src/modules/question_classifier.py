@@ -0,0 +1,117 @@
+"""
+Classification compilée du type de question pédagogique
+"""
+from typing import Dict, List, Optional
+import re
+import unicodedata
+import numpy as np
+
+def normalize_text(text: str) -> str:
+    """Minuscules, sans accents, apostrophes typographiques unifiées"""
+    text = text.lower().replace('’', "'").replace('ʼ', "'")
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+class QuestionClassifier:
+    """
+    Détection du type de question par une seule expression régulière
+    
+    Tous les mots-clés sont compilés en une alternance (les plus longs
+    d'abord : "comment faire" l'emporte sur "comment" à la même
+    position) ; la question est parcourue une seule fois, quel que soit
+    le nombre de mots-clés. Quand plusieurs types correspondent, la
+    priorité la plus haute gagne, puis la première occurrence.
+    
+    Sans mot-clé reconnu, un repli optionnel compare l'embedding de la
+    question (celui déjà calculé pour la recherche) aux centroïdes
+    d'exemples de chaque type.
+    """
+    
+    def __init__(self, question_types: Dict[str, List[str]], priorities: Dict[str, int] = None,
+                 fallback_threshold: float = 0.5):
+        self.priorities = priorities or {}
+        self.fallback_threshold = fallback_threshold
+        self._keywords: Dict[str, str] = {}
+        self._pattern = None
+        self._prototype_types: List[str] = []
+        self._prototypes: Optional[np.ndarray] = None
+        
+        for qtype, keywords in question_types.items():
+            self.add_keywords(qtype, keywords)
+    
+    def add_keywords(self, qtype: str, keywords: List[str]):
+        """Ajoute des mots-clés pour un type et recompile le motif"""
+        for keyword in keywords:
+            # Le premier type déclaré garde un mot-clé partagé
+            self._keywords.setdefault(normalize_text(keyword), qtype)
+        self._compile()
+    
+    def _compile(self):
+        alternatives = sorted(self._keywords, key=len, reverse=True)
+        # Début de mot uniquement : "vs" ne correspond pas dans "mvs",
+        # mais "méthode" reconnaît encore "méthodes"
+        self._pattern = re.compile(
+            r"(?<!\w)(?:" + "|".join(re.escape(k) for k in alternatives) + ")"
+        ) if alternatives else None
+    
+    def match(self, question: str) -> Optional[str]:
+        """Type reconnu par mots-clés, None si aucun"""
+        if self._pattern is None:
+            return None
+            
+        best_type, best_priority = None, None
+        for found in self._pattern.finditer(normalize_text(question)):
+            qtype = self._keywords[found.group(0)]
+            priority = self.priorities.get(qtype, 0)
+            if best_priority is None or priority > best_priority:
+                best_type, best_priority = qtype, priority
+        return best_type
+    
+    def fit_prototypes(self, embeddings_by_type: Dict[str, np.ndarray]):
+        """
+        Prépare le repli par embeddings
+        
+        Args:
+            embeddings_by_type: Embeddings de questions d'exemple par type
+        """
+        types, centroids = [], []
+        for qtype, embeddings in embeddings_by_type.items():
+            centroid = np.asarray(embeddings, dtype='float32').mean(axis=0)
+            norm = np.linalg.norm(centroid)
+            if norm > 0:
+                types.append(qtype)
+                centroids.append(centroid / norm)
+        self._prototype_types = types
+        self._prototypes = np.vstack(centroids) if centroids else None
+    
+    @property
+    def has_prototypes(self) -> bool:
+        return self._prototypes is not None
+    
+    def classify(self, question: str, query_embedding: np.ndarray = None) -> str:
+        """
+        Détecte le type de question
+        
+        Args:
+            question: Question de l'étudiant
+            query_embedding: Embedding de la question, s'il est déjà calculé
+            
+        Returns:
+            Type de question ('general' si rien n'est reconnu)
+        """
+        qtype = self.match(question)
+        if qtype is not None:
+            return qtype
+            
+        if self._prototypes is None or query_embedding is None:
+            return 'general'
+            
+        vector = np.asarray(query_embedding, dtype='float32').reshape(-1)
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return 'general'
+        similarities = self._prototypes @ (vector / norm)
+        best = int(np.argmax(similarities))
+        if similarities[best] >= self.fallback_threshold:
+            return self._prototype_types[best]
+        return 'general'
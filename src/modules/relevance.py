@@ -0,0 +1,85 @@
+"""
+Seuil de pertinence appris par corpus : sans chunk pertinent, pas de génération
+"""
+from typing import Dict, List, Optional
+import threading
+import logging
+import numpy as np
+from .learning_config import learning_config
+from .retrieval import distance_to_cosine
+
+logger = logging.getLogger(__name__)
+
+class RelevanceGate:
+    """
+    Filtre les chunks dont la similarité cosinus est trop faible
+    
+    Le seuil est appris pour chaque version de l'index : des questions
+    hors sujet (OFF_TOPIC_QUESTIONS) sont cherchées dans le corpus, et
+    leurs meilleurs scores forment la distribution des scores « sans
+    rapport » propre à ce corpus et à ce modèle. Le seuil est un quantile
+    haut de cette distribution plus une marge. Un seuil fixe peut aussi
+    être imposé.
+    """
+    
+    def __init__(self, retriever, quantile: float = 0.9, margin: float = 0.05,
+                 fixed_threshold: Optional[float] = None, probes: List[str] = None):
+        self.retriever = retriever
+        self.quantile = quantile
+        self.margin = margin
+        self.fixed_threshold = fixed_threshold
+        self.probes = probes or learning_config.OFF_TOPIC_QUESTIONS
+        self._probe_embeddings = None
+        self._calibration: Optional[Dict] = None
+        self._lock = threading.Lock()
+    
+    def _encode_probes(self) -> np.ndarray:
+        if self._probe_embeddings is None:
+            embeddings = np.asarray(self.retriever.embedding_model.encode(self.probes), dtype='float32')
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+            self._probe_embeddings = np.ascontiguousarray(embeddings)
+        return self._probe_embeddings
+    
+    def calibration(self) -> Optional[Dict]:
+        """Seuil et statistiques de la distribution de référence pour l'index courant"""
+        if self.fixed_threshold is not None:
+            return {'threshold': self.fixed_threshold, 'fixed': True}
+            
+        version = self.retriever.version
+        calibration = self._calibration
+        if calibration is not None and calibration['version'] == version:
+            return calibration
+            
+        with self._lock:
+            calibration = self._calibration
+            if calibration is not None and calibration['version'] == version:
+                return calibration
+            index = self.retriever.index
+            if index is None or index.ntotal == 0:
+                return None
+                
+            distances, _ = index.search(self._encode_probes(), 1)
+            scores = distance_to_cosine(distances[:, 0])
+            threshold = float(np.quantile(scores, self.quantile)) + self.margin
+            calibration = {
+                'threshold': round(threshold, 4),
+                'fixed': False,
+                'version': version,
+                'off_topic_mean': round(float(scores.mean()), 4),
+                'off_topic_max': round(float(scores.max()), 4),
+                'probes': len(self.probes)
+            }
+            self._calibration = calibration
+        logger.info(f"Seuil de pertinence {calibration['threshold']} (index version {version})")
+        return calibration
+    
+    def threshold(self) -> Optional[float]:
+        calibration = self.calibration()
+        return calibration['threshold'] if calibration else None
+    
+    def filter(self, chunks: List[Dict]) -> List[Dict]:
+        """Chunks dont le score atteint le seuil (liste vide : rien de pertinent)"""
+        threshold = self.threshold()
+        if threshold is None:
+            return chunks
+        return [chunk for chunk in chunks if chunk.get('score', 0.0) >= threshold]
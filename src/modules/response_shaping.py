@@ -0,0 +1,89 @@
+"""
+Mise en forme compacte des réponses : champs choisis, extraits surlignés
+"""
+from typing import Dict, Iterable, List, Optional
+import re
+
+# Mots de la question trop courts pour être surlignés (articles, "de", "le"...)
+MIN_TERM_LENGTH = 4
+
+def query_terms(question: str) -> List[str]:
+    """Mots significatifs de la question, sans doublons"""
+    words = re.findall(r"\w+", question.lower())
+    return list(dict.fromkeys(w for w in words if len(w) >= MIN_TERM_LENGTH))
+
+def compile_terms(terms: Iterable[str]) -> Optional[re.Pattern]:
+    """Motif reconnaissant les termes en début de mot ("gradient" → "gradients")"""
+    terms = sorted(set(terms), key=len, reverse=True)
+    if not terms:
+        return None
+    return re.compile(r"(?<!\w)(?:" + "|".join(re.escape(t) for t in terms) + r")\w*", re.IGNORECASE)
+
+def make_snippet(content: str, pattern: Optional[re.Pattern], max_chars: int = 200,
+                 highlight: str = "**") -> str:
+    """
+    Extrait du chunk centré sur la première occurrence d'un terme
+    
+    Args:
+        content: Texte complet du chunk
+        pattern: Termes à surligner (compile_terms), None pour le début du texte
+        max_chars: Longueur approximative de l'extrait
+        highlight: Marqueur placé autour des termes (Markdown par défaut)
+        
+    Returns:
+        Extrait, avec "…" aux coupures
+    """
+    text = " ".join(content.split())
+    found = pattern.search(text) if pattern is not None else None
+    
+    start = 0
+    if found and found.start() > max_chars // 3:
+        start = found.start() - max_chars // 3
+    end = min(len(text), start + max_chars)
+    start = max(0, min(start, end - max_chars))
+    
+    # Couper entre deux mots
+    if start > 0:
+        space = text.find(" ", start)
+        start = space + 1 if 0 <= space < end else start
+    if end < len(text):
+        space = text.rfind(" ", start, end)
+        end = space if space > start else end
+        
+    snippet = text[start:end]
+    if pattern is not None and highlight:
+        snippet = pattern.sub(lambda m: f"{highlight}{m.group(0)}{highlight}", snippet)
+    return ("…" if start > 0 else "") + snippet + ("…" if end < len(text) else "")
+
+def shape_chunks(chunks: List[Dict], include_content: bool = True, snippet_chars: int = 0,
+                 pattern: Optional[re.Pattern] = None) -> List[Dict]:
+    """
+    Copie allégée des chunks retrouvés
+    
+    Args:
+        chunks: Métadonnées des chunks (non modifiées)
+        include_content: Garder le texte complet ('content')
+        snippet_chars: Longueur de l'extrait ajouté ('snippet'), 0 pour aucun
+        pattern: Termes à surligner dans l'extrait
+    """
+    shaped = []
+    for chunk in chunks:
+        item = {k: v for k, v in chunk.items() if include_content or k != 'content'}
+        if snippet_chars > 0:
+            item['snippet'] = make_snippet(chunk.get('content', ''), pattern, snippet_chars)
+        shaped.append(item)
+    return shaped
+
+def select_fields(payload: Dict, fields: Optional[List[str]]) -> Dict:
+    """
+    Ne garde que les champs demandés
+    
+    Raises:
+        ValueError: si un champ demandé n'existe pas
+    """
+    if not fields:
+        return payload
+    unknown = [f for f in fields if f not in payload]
+    if unknown:
+        raise ValueError(f"Champs inconnus : {', '.join(unknown)}")
+    return {f: payload[f] for f in fields}
@@ -1,54 +1,443 @@
 import faiss
 import numpy as np
 import json
+import os
+import threading
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 import logging
 from .config import config
 from .embeddings import EmbeddingModel
+from .catalogue import DocumentCatalogue
+from .dedup import NearDuplicateIndex, source_reference
+from .topics import TopicIndex
+from .metrics import stage
 
 logger = logging.getLogger(__name__)
 
+# Types d'index FAISS supportés
+INDEX_TYPES = ('flat', 'ivf', 'hnsw')
+
+# Paramètres des index approximatifs
+IVF_NPROBE = 16
+IVF_MIN_POINTS_PER_LIST = 39
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 80
+HNSW_EF_SEARCH = 64
+# Recherche HNSW restreinte aux sections présélectionnées : le parcours du
+# graphe écarte les autres chunks, il faut explorer plus de candidats
+HNSW_FILTERED_EF_SEARCH = 256
+
+# Constante de la Reciprocal Rank Fusion (recherche multi-requêtes)
+RRF_K = 60
+
+def configure_search_threads(num_threads: int = 1):
+    """
+    Règle le nombre de threads OpenMP utilisés par FAISS
+    
+    L'API traite beaucoup de petites recherches (une requête à la fois)
+    en parallèle dans son pool de threads : laisser chaque recherche
+    lancer une équipe OpenMP sur tous les cœurs provoque une
+    sur-souscription. Un thread par recherche est le bon réglage pour
+    ce profil ; les constructions d'index en lot peuvent en utiliser plus.
+    """
+    num_threads = max(1, num_threads)
+    faiss.omp_set_num_threads(num_threads)
+    logger.info(f"FAISS OpenMP : {num_threads} thread(s) par recherche")
+
+def reciprocal_rank_fusion(rankings: List[List[Dict]], queries: List[str], top_k: int, key) -> List[Dict]:
+    """
+    Fusionne les classements de plusieurs sous-requêtes (Reciprocal Rank Fusion)
+    
+    Chaque chunk n'apparaît qu'une fois, avec son meilleur score et la
+    liste des sous-requêtes qui l'ont retrouvé.
+    
+    Args:
+        rankings: Résultats de chaque sous-requête, du meilleur au moins bon
+        queries: Sous-requêtes, dans le même ordre
+        top_k: Nombre de résultats fusionnés
+        key: Fonction (chunk) -> identifiant du chunk
+    """
+    fused = {}
+    for query, ranking in zip(queries, rankings):
+        for rank, chunk in enumerate(ranking):
+            entry = fused.setdefault(key(chunk), {'chunk': chunk, 'rrf': 0.0, 'score': -1.0, 'queries': []})
+            entry['rrf'] += 1.0 / (RRF_K + rank + 1)
+            entry['score'] = max(entry['score'], chunk['score'])
+            entry['queries'].append(query)
+            
+    ranked = sorted(fused.values(), key=lambda entry: entry['rrf'], reverse=True)[:top_k]
+    return [
+        {**entry['chunk'], 'score': entry['score'], 'matched_queries': entry['queries']}
+        for entry in ranked
+    ]
+
+def chunk_key(chunk: Dict) -> Tuple:
+    """Identifiant d'un chunk dans les résultats de recherche"""
+    return chunk.get('document_name'), chunk.get('chunk_id')
+
+def distance_to_cosine(distance):
+    """
+    Similarité cosinus à partir de la distance renvoyée par l'index
+    
+    Les vecteurs indexés et les requêtes sont normalisés et les index
+    renvoient le carré de la distance L2 : ||a - b||² = 2 - 2 cos(a, b).
+    Le score est donc un vrai cosinus, comparable d'un corpus à l'autre.
+    """
+    return 1.0 - distance / 2.0
+
+class IndexSnapshot:
+    """
+    Version immuable de l'index servie aux lecteurs.
+    
+    Un snapshot n'est jamais modifié après publication (hormis son
+    empreinte disque) : les écritures construisent un nouveau snapshot
+    (copy-on-write) puis remplacent la référence. Les lecteurs lisent la
+    référence une fois, sans verrou, et voient toujours un index et des
+    métadonnées cohérents entre eux.
+    """
+    
+    __slots__ = ('index', 'metadata', 'version', 'fingerprint', 'catalogue', 'topics')
+    
+    def __init__(self, index, metadata: List[Dict], version: int = 0, fingerprint: Tuple = None,
+                 catalogue: DocumentCatalogue = None, topics: TopicIndex = None):
+        self.index = index
+        self.metadata = metadata
+        self.version = version
+        self.fingerprint = fingerprint
+        self.catalogue = catalogue if catalogue is not None else DocumentCatalogue.from_metadata(metadata)
+        self.topics = topics if topics is not None else TopicIndex()
+
+class StoredVectors:
+    """Vecteurs d'un index chargé, reconstruits à la demande par lignes"""
+    
+    def __init__(self, index):
+        if isinstance(index, faiss.IndexIVF):
+            index.make_direct_map()
+        self.index = index
+    
+    def __getitem__(self, rows) -> np.ndarray:
+        return self.index.reconstruct_batch(np.asarray(rows, dtype='int64'))
+
 class FAISSRetriever:
     """Recherche sémantique avec FAISS"""
     
-    def __init__(self):
-        self.index = None
-        self.metadata = []
-        self.embedding_model = EmbeddingModel()
+    def __init__(self, index_type: str = 'flat', embedding_model: EmbeddingModel = None,
+                 deduplicator: NearDuplicateIndex = None, coarse_sections: int = 0):
+        if index_type not in INDEX_TYPES:
+            raise ValueError(
+                f"Type d'index non supporté : {index_type}. "
+                f"Types acceptés : {list(INDEX_TYPES)}"
+            )
+        self.index_type = index_type
+        self._snapshot = IndexSnapshot(None, [])
+        self._reload_lock = threading.Lock()
+        # Écrivain unique : toutes les modifications sont sérialisées
+        self._write_lock = threading.RLock()
+        self._watcher = None
+        # Fusion des quasi-doublons à l'ajout ; l'index LSH suit les
+        # positions des métadonnées d'une version donnée du snapshot
+        self.deduplicator = deduplicator
+        self._dedup_version = None
+        # Recherche en deux temps : sections présélectionnées par question
+        # (0 : tous les chunks sont candidats)
+        self.coarse_sections = coarse_sections
+        self.embedding_model = embedding_model or EmbeddingModel()
         self.dimension = self.embedding_model.get_embedding_dimension()
     
-    def create_index(self, embeddings: np.ndarray, metadata: List[Dict]):
+    @property
+    def index(self):
+        """Index FAISS du snapshot courant"""
+        return self._snapshot.index
+    
+    @property
+    def metadata(self) -> List[Dict]:
+        """Métadonnées du snapshot courant"""
+        return self._snapshot.metadata
+    
+    @property
+    def version(self) -> int:
+        """Numéro de version du snapshot courant"""
+        return self._snapshot.version
+    
+    @property
+    def catalogue(self) -> DocumentCatalogue:
+        """Catalogue des documents du snapshot courant"""
+        return self._snapshot.catalogue
+    
+    @property
+    def topics(self) -> TopicIndex:
+        """Index thématique (documents et sections) du snapshot courant"""
+        return self._snapshot.topics
+    
+    def _publish(self, index, metadata: List[Dict], fingerprint: Tuple = None,
+                 catalogue: DocumentCatalogue = None, topics: TopicIndex = None):
+        """
+        Publie un nouveau snapshot par simple échange de référence.
+        
+        L'affectation d'attribut est atomique : une recherche en cours
+        garde sa référence vers l'ancien snapshot et se termine dessus.
+        Doit être appelé avec le verrou d'écriture. Sans catalogue fourni
+        (mise à jour incrémentale), il est recalculé depuis les métadonnées.
+        """
+        self._snapshot = IndexSnapshot(
+            index,
+            metadata,
+            version=self._snapshot.version + 1,
+            fingerprint=fingerprint,
+            catalogue=catalogue,
+            topics=topics
+        )
+    
+    def _new_index(self, embeddings: np.ndarray):
+        """
+        Construit un index vide du type configuré
+        
+        Les embeddings servent à entraîner l'IVF ; en dessous d'un
+        nombre suffisant de vecteurs, on retombe sur un index exact.
+        """
+        num_vectors = len(embeddings)
+        
+        if self.index_type == 'ivf':
+            nlist = int(min(4 * np.sqrt(num_vectors), num_vectors // IVF_MIN_POINTS_PER_LIST))
+            if nlist >= 2:
+                quantizer = faiss.IndexFlatL2(self.dimension)
+                index = faiss.IndexIVFFlat(quantizer, self.dimension, nlist)
+                index.train(embeddings)
+                index.nprobe = min(IVF_NPROBE, nlist)
+                return index
+            logger.info("Trop peu de vecteurs pour un IVF, index exact utilisé")
+            
+        if self.index_type == 'hnsw':
+            index = faiss.IndexHNSWFlat(self.dimension, HNSW_M)
+            index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+            index.hnsw.efSearch = HNSW_EF_SEARCH
+            return index
+            
+        return faiss.IndexFlatL2(self.dimension)
+    
+    def create_index(self, embeddings: np.ndarray, metadata: List[Dict],
+                     catalogue: DocumentCatalogue = None, topics: TopicIndex = None):
         """
         Crée un nouvel index FAISS
         
         Args:
             embeddings: Embeddings des chunks
             metadata: Métadonnées des chunks
+            catalogue: Catalogue déjà à jour de ces métadonnées, s'il est connu
+            topics: Index thématique déjà à jour, s'il est connu
         """
-        logger.info(f"Création de l'index FAISS (dimension={self.dimension})")
-        
-        # Créer l'index (IndexFlatL2 pour similarité cosine)
-        self.index = faiss.IndexFlatL2(self.dimension)
+        logger.info(
+            f"Création de l'index FAISS {self.index_type} (dimension={self.dimension})"
+        )
         
         # Normaliser les embeddings pour cosine similarity
+        embeddings = np.ascontiguousarray(embeddings, dtype='float32')
         faiss.normalize_L2(embeddings)
         
+        # Créer l'index (distance L2 sur vecteurs normalisés pour similarité cosine)
+        index = self._new_index(embeddings)
+        
         # Ajouter à l'index
-        self.index.add(embeddings.astype('float32'))
-        self.metadata = metadata
+        index.add(embeddings)
         
-        logger.info(f"Index créé avec {self.index.ntotal} vecteurs")
+        if topics is None:
+            topics = TopicIndex.from_chunks(metadata, embeddings)
+            
+        with self._write_lock:
+            self._publish(index, list(metadata), catalogue=catalogue, topics=topics)
+        
+        logger.info(f"Index créé avec {index.ntotal} vecteurs (version {self.version})")
     
-    def add_to_index(self, embeddings: np.ndarray, metadata: List[Dict]):
-        """Ajoute des embeddings à l'index existant"""
-        if self.index is None:
-            self.create_index(embeddings, metadata)
-        else:
-            faiss.normalize_L2(embeddings)
-            self.index.add(embeddings.astype('float32'))
-            self.metadata.extend(metadata)
-            logger.info(f"Ajout de {len(metadata)} vecteurs. Total: {self.index.ntotal}")
+    def add_to_index(self, embeddings: np.ndarray, metadata: List[Dict]) -> int:
+        """
+        Ajoute des embeddings à l'index existant
+        
+        L'ajout se fait sur une copie de l'index courant, publiée avec
+        les métadonnées étendues en une seule étape : une recherche
+        concurrente ne voit jamais un index en avance sur ses métadonnées.
+        
+        Returns:
+            Nombre de chunks fusionnés avec un quasi-doublon déjà présent
+        """
+        with self._write_lock:
+            snapshot = self._snapshot
+            updated, references, collapsed = {}, [], 0
+            if self.deduplicator is not None:
+                embeddings, metadata, updated, references = self._collapse_duplicates(snapshot, embeddings, metadata)
+                collapsed = len(references)
+                
+            if snapshot.index is None:
+                self.create_index(embeddings, metadata)
+                self._dedup_version = self.version
+                return collapsed
+                
+            index, topics = snapshot.index, snapshot.topics
+            if len(metadata):
+                embeddings = np.ascontiguousarray(embeddings, dtype='float32')
+                faiss.normalize_L2(embeddings)
+                index = faiss.clone_index(snapshot.index)
+                index.add(embeddings)
+                topics = topics.with_chunks(metadata, embeddings, base=len(snapshot.metadata))
+                
+            new_metadata = snapshot.metadata + list(metadata)
+            for position, chunk in updated.items():
+                new_metadata[position] = chunk
+            # Les références vers un chunk du lot sont comptées avec lui
+            added = list(metadata) + [r for r in references if r['_canonical'] < len(snapshot.metadata)]
+            self._publish(
+                index,
+                new_metadata,
+                catalogue=snapshot.catalogue.with_chunks(added),
+                topics=topics
+            )
+            self._dedup_version = self.version
+            logger.info(f"Ajout de {len(metadata)} vecteurs ({collapsed} quasi-doublons fusionnés). Total: {index.ntotal}")
+            return collapsed
+    
+    def _collapse_duplicates(self, snapshot: IndexSnapshot, embeddings: np.ndarray,
+                             metadata: List[Dict]) -> Tuple:
+        """
+        Fusionne les nouveaux chunks quasi identiques à un chunk existant
+        (ou à un chunk précédent du même lot)
+        
+        Le chunk canonique garde son vecteur et reçoit une référence au
+        chunk fusionné dans 'duplicates' ; le chunk fusionné n'a pas de vecteur.
+        Doit être appelé avec le verrou d'écriture.
+        
+        Returns:
+            (embeddings gardés, métadonnées gardées, chunks existants
+            modifiés par position, références ajoutées)
+        """
+        dedup = self.deduplicator
+        if self._dedup_version != snapshot.version:
+            dedup.rebuild((i, m['content']) for i, m in enumerate(snapshot.metadata))
+            
+        base = len(snapshot.metadata)
+        kept_rows, kept, updated, references = [], [], {}, []
+        for row, chunk in enumerate(metadata):
+            signature = dedup.signature(chunk['content'])
+            match = dedup.query(signature)
+            if match is None:
+                dedup.add(base + len(kept), signature)
+                kept_rows.append(row)
+                kept.append(dict(chunk))
+                continue
+                
+            if match < base:
+                canonical = updated.get(match)
+                if canonical is None:
+                    # Copie : le snapshot publié n'est jamais modifié
+                    canonical = dict(snapshot.metadata[match])
+                    canonical['duplicates'] = list(canonical.get('duplicates', []))
+                    updated[match] = canonical
+            else:
+                canonical = kept[match - base]
+            reference = source_reference(chunk)
+            canonical.setdefault('duplicates', []).append(reference)
+            references.append({**reference, '_canonical': match})
+            
+        return embeddings[kept_rows], kept, updated, references
+    
+    def rebuild_index(self, embeddings: np.ndarray, index_type: str = None):
+        """
+        Reconstruit l'index courant à partir d'embeddings déjà calculés
+        
+        Aucun appel au modèle : avec les embeddings du stockage disque,
+        changer de type d'index n'est qu'une opération vectorielle.
+        
+        Args:
+            embeddings: Embeddings alignés sur les métadonnées courantes
+            index_type: Nouveau type d'index (inchangé si None)
+        """
+        if index_type is not None and index_type not in INDEX_TYPES:
+            raise ValueError(
+                f"Type d'index non supporté : {index_type}. "
+                f"Types acceptés : {list(INDEX_TYPES)}"
+            )
+            
+        with self._write_lock:
+            metadata = self._snapshot.metadata
+            if len(embeddings) != len(metadata):
+                raise ValueError(
+                    f"{len(embeddings)} embeddings pour {len(metadata)} chunks indexés"
+                )
+            if index_type is not None:
+                self.index_type = index_type
+            # Mêmes documents : le catalogue (et son ETag) et les sections sont conservés
+            self.create_index(
+                embeddings, metadata, catalogue=self._snapshot.catalogue, topics=self._snapshot.topics
+            )
+    
+    def remove_document(self, document_name: str, embeddings_for) -> int:
+        """
+        Retire tous les chunks d'un document
+        
+        Tous les types d'index ne savent pas supprimer des vecteurs (HNSW) :
+        l'index est reconstruit avec les chunks restants. Un chunk retiré
+        dont des quasi-doublons d'autres documents subsistent est remplacé
+        par le premier d'entre eux, qui reprend son texte (et son vecteur).
+        
+        Args:
+            document_name: Nom du document
+            embeddings_for: Fonction (métadonnées) -> embeddings alignés,
+                typiquement le stockage d'embeddings
+                
+        Returns:
+            Nombre de chunks retirés
+        """
+        with self._write_lock:
+            snapshot = self._snapshot
+            kept, removed = [], 0
+            for chunk in snapshot.metadata:
+                duplicates = chunk.get('duplicates', ())
+                survivors = [d for d in duplicates if d['document_name'] != document_name]
+                removed += len(duplicates) - len(survivors)
+                if chunk['document_name'] == document_name:
+                    removed += 1
+                    if not survivors:
+                        continue
+                    chunk = {**survivors[0], 'content': chunk['content']}
+                    survivors = survivors[1:]
+                elif len(survivors) == len(duplicates):
+                    kept.append(chunk)
+                    continue
+                if survivors:
+                    chunk = {**chunk, 'duplicates': survivors}
+                else:
+                    chunk = {k: v for k, v in chunk.items() if k != 'duplicates'}
+                kept.append(chunk)
+            if not removed:
+                return 0
+                
+            catalogue = snapshot.catalogue.without(document_name)
+            if kept:
+                embeddings = np.asarray(embeddings_for(kept), dtype='float32')
+                self.create_index(
+                    embeddings, kept, catalogue=catalogue, topics=snapshot.topics.relocated(kept, embeddings)
+                )
+            else:
+                # Pas d'index vide publié : le prochain ajout construit le type configuré
+                self._publish(None, [], catalogue=catalogue)
+        logger.info(f"Document retiré : {document_name} ({removed} chunks, version {self.version})")
+        return removed
+    
+    def clear_index(self):
+        """
+        Vide complètement l'index
+        
+        Aucun index n'est publié : le prochain ajout passe par
+        create_index et reconstruit un index du type configuré.
+        """
+        with self._write_lock:
+            self._publish(None, [])
+        logger.info(f"Index vidé (version {self.version})")
+    
+    def encode_query(self, query: str) -> np.ndarray:
+        """Embedding normalisé d'une question (1 x dimension)"""
+        query_embedding = np.ascontiguousarray(self.embedding_model.encode([query]), dtype='float32')
+        faiss.normalize_L2(query_embedding)
+        return query_embedding
     
     def search(self, query: str, top_k: int = None) -> List[Dict]:
         """
@@ -61,48 +450,188 @@ class FAISSRetriever:
         Returns:
             Liste de chunks avec scores
         """
-        if self.index is None:
-            raise ValueError("L'index n'est pas initialisé")
+        return self.search_by_vector(self.encode_query(query), top_k)
+    
+    def search_by_vector(self, query_embedding: np.ndarray, top_k: int = None) -> List[Dict]:
+        """
+        Recherche à partir d'un embedding déjà calculé (voir encode_query)
         
-        top_k = top_k or config.TOP_K_RESULTS
+        Args:
+            query_embedding: Embedding normalisé de la question
+            top_k: Nombre de résultats
+            
+        Returns:
+            Liste de chunks avec scores
+        """
+        return self.search_vectors(query_embedding.reshape(1, -1), top_k)[0]
+    
+    def search_vectors(self, query_embeddings: np.ndarray, top_k: int = None) -> List[List[Dict]]:
+        """
+        Recherche de plusieurs embeddings en un seul appel FAISS
         
-        # Encoder la query
-        query_embedding = self.embedding_model.encode([query])
-        faiss.normalize_L2(query_embedding)
+        Args:
+            query_embeddings: Embeddings normalisés (n x dimension)
+            top_k: Nombre de résultats par embedding
+            
+        Returns:
+            Pour chaque embedding, liste de chunks avec scores
+        """
+        # Lire la référence une seule fois : toute la recherche se fait
+        # sur ce snapshot, même si un rechargement le remplace entre-temps
+        snapshot = self._snapshot
+        if snapshot.index is None:
+            if snapshot.version == 0:
+                raise ValueError("L'index n'est pas initialisé")
+            # Index vidé (clear_index, dernier document retiré) : aucun résultat
+            return [[] for _ in range(len(query_embeddings))]
+            
+        top_k = top_k or config.TOP_K_RESULTS
+        query_embeddings = np.ascontiguousarray(query_embeddings, dtype='float32')
         
         # Recherche
-        distances, indices = self.index.search(
-            query_embedding.astype('float32'), 
-            top_k
-        )
+        if self.coarse_sections and len(snapshot.topics) > self.coarse_sections:
+            distances, indices = self._search_sections(snapshot, query_embeddings, top_k)
+        else:
+            with stage('search'):
+                distances, indices = snapshot.index.search(query_embeddings, top_k)
         
         # Préparer les résultats
         results = []
-        for dist, idx in zip(distances[0], indices[0]):
-            if idx < len(self.metadata):
-                result = self.metadata[idx].copy()
-                result['score'] = float(1 / (1 + dist))  # Convertir distance en score
-                results.append(result)
-        
+        for row_distances, row_indices in zip(distances, indices):
+            row = []
+            for dist, idx in zip(row_distances, row_indices):
+                if 0 <= idx < len(snapshot.metadata):
+                    result = snapshot.metadata[idx].copy()
+                    result['score'] = float(distance_to_cosine(dist))
+                    row.append(result)
+            results.append(row)
+            
         return results
     
+    def _search_sections(self, snapshot: IndexSnapshot, query_embeddings: np.ndarray,
+                         top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Recherche en deux temps : sections, puis chunks de ces sections
+        
+        Les centroïdes des sections (un petit index, en mémoire) désignent
+        les coarse_sections sections les plus proches de chaque question ;
+        FAISS ne calcule ensuite de distance que pour leurs chunks
+        (sélecteur d'identifiants), au lieu de parcourir tout le corpus.
+        """
+        distances = np.full((len(query_embeddings), top_k), np.inf, dtype='float32')
+        indices = np.full((len(query_embeddings), top_k), -1, dtype='int64')
+        for row, query in enumerate(query_embeddings):
+            with stage('coarse'):
+                candidates = snapshot.topics.candidates(query, self.coarse_sections)
+            with stage('search'):
+                # Le sélecteur doit vivre pendant toute la recherche
+                selector = faiss.IDSelectorBatch(len(candidates), faiss.swig_ptr(candidates))
+                found = snapshot.index.search(
+                    query.reshape(1, -1), top_k, params=self._search_parameters(snapshot.index, selector)
+                )
+            distances[row], indices[row] = found[0][0], found[1][0]
+        return distances, indices
+    
+    @staticmethod
+    def _search_parameters(index, selector):
+        """Paramètres de recherche restreinte propres au type d'index"""
+        if isinstance(index, faiss.IndexIVF):
+            return faiss.SearchParametersIVF(sel=selector, nprobe=index.nprobe)
+        if isinstance(index, faiss.IndexHNSW):
+            return faiss.SearchParametersHNSW(
+                sel=selector, efSearch=max(index.hnsw.efSearch, HNSW_FILTERED_EF_SEARCH)
+            )
+        return faiss.SearchParameters(sel=selector)
+    
+    def search_multi(self, queries: List[str], top_k: int = None,
+                     query_embedding: np.ndarray = None) -> List[Dict]:
+        """
+        Recherche avec plusieurs sous-requêtes fusionnées
+        
+        Les sous-requêtes sont encodées en un seul lot et cherchées en un
+        seul appel FAISS ; les résultats sont fusionnés par Reciprocal
+        Rank Fusion, sans doublon. Chaque chunk garde son meilleur score
+        et la liste des sous-requêtes qui l'ont retrouvé.
+        
+        Args:
+            queries: Sous-requêtes (la question complète en premier)
+            top_k: Nombre de résultats fusionnés
+            query_embedding: Embedding normalisé de queries[0] s'il est déjà calculé
+            
+        Returns:
+            Liste de chunks avec scores
+        """
+        if self.index is None:
+            raise ValueError("L'index n'est pas initialisé")
+            
+        top_k = top_k or config.TOP_K_RESULTS
+        query_embeddings = self.encode_queries(queries, query_embedding)
+        rankings = self.search_vectors(query_embeddings, top_k)
+        return reciprocal_rank_fusion(rankings, queries, top_k, chunk_key)
+    
+    def encode_queries(self, queries: List[str], query_embedding: np.ndarray = None) -> np.ndarray:
+        """Embeddings normalisés de sous-requêtes (celui de queries[0] peut être fourni)"""
+        to_encode = queries if query_embedding is None else queries[1:]
+        query_embeddings = np.ascontiguousarray(self.embedding_model.encode(to_encode), dtype='float32')
+        faiss.normalize_L2(query_embeddings)
+        if query_embedding is not None:
+            query_embeddings = np.vstack([query_embedding.reshape(1, -1), query_embeddings])
+        return query_embeddings
+    
+    @staticmethod
+    def _file_fingerprint(index_path: Path, metadata_path: Path) -> Optional[Tuple]:
+        """Empreinte (mtime, taille) des fichiers d'index, None s'ils sont absents"""
+        try:
+            index_stat = index_path.stat()
+            metadata_stat = metadata_path.stat()
+        except FileNotFoundError:
+            return None
+        return (
+            index_stat.st_mtime_ns, index_stat.st_size,
+            metadata_stat.st_mtime_ns, metadata_stat.st_size
+        )
+    
     def save_index(self, index_path: Path = None, metadata_path: Path = None):
         """Sauvegarde l'index et les métadonnées"""
-        if self.index is None:
-            raise ValueError("Aucun index à sauvegarder")
-        
         index_path = index_path or config.FAISS_INDEX_PATH
         metadata_path = metadata_path or config.METADATA_PATH
         
+        # Sérialisé avec les écritures : deux sauvegardes simultanées
+        # écriraient dans les mêmes fichiers temporaires
+        with self._write_lock:
+            self._save_snapshot(self._snapshot, index_path, metadata_path)
+            
+        logger.info(f"Index sauvegardé : {index_path}")
+        logger.info(f"Métadonnées sauvegardées : {metadata_path}")
+    
+    def _save_snapshot(self, snapshot: IndexSnapshot, index_path: Path, metadata_path: Path):
+        """Écrit un snapshot sur le disque de manière atomique"""
+        index = snapshot.index
+        if index is None:
+            if snapshot.metadata:
+                raise ValueError("Aucun index à sauvegarder")
+            # Index vidé : fichiers vides, rechargés comme un index absent
+            index = faiss.IndexFlatL2(self.dimension)
+            
+        # Écrire dans des fichiers temporaires puis les renommer, pour
+        # qu'un processus qui surveille ces chemins ne lise jamais un
+        # fichier à moitié écrit
+        tmp_index_path = index_path.with_name(index_path.name + '.tmp')
+        tmp_metadata_path = metadata_path.with_name(metadata_path.name + '.tmp')
+        
         # Sauvegarder l'index FAISS
-        faiss.write_index(self.index, str(index_path))
+        faiss.write_index(index, str(tmp_index_path))
         
         # Sauvegarder les métadonnées
-        with open(metadata_path, 'w', encoding='utf-8') as f:
-            json.dump(self.metadata, f, ensure_ascii=False, indent=2)
+        with open(tmp_metadata_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot.metadata, f, ensure_ascii=False, indent=2)
+            
+        os.replace(tmp_index_path, index_path)
+        os.replace(tmp_metadata_path, metadata_path)
         
-        logger.info(f"Index sauvegardé : {index_path}")
-        logger.info(f"Métadonnées sauvegardées : {metadata_path}")
+        # Les fichiers écrits correspondent au snapshot servi : la
+        # surveillance ne doit pas les recharger
+        snapshot.fingerprint = self._file_fingerprint(index_path, metadata_path)
     
     def load_index(self, index_path: Path = None, metadata_path: Path = None):
         """Charge l'index et les métadonnées"""
@@ -111,12 +640,99 @@ class FAISSRetriever:
         
         if not index_path.exists():
             raise FileNotFoundError(f"Index non trouvé : {index_path}")
+            
+        fingerprint = self._file_fingerprint(index_path, metadata_path)
         
         # Charger l'index
-        self.index = faiss.read_index(str(index_path))
+        index = faiss.read_index(str(index_path))
         
         # Charger les métadonnées
         with open(metadata_path, 'r', encoding='utf-8') as f:
-            self.metadata = json.load(f)
+            metadata = json.load(f)
+            
+        if index.ntotal != len(metadata):
+            raise ValueError(
+                f"Index et métadonnées incohérents : "
+                f"{index.ntotal} vecteurs pour {len(metadata)} entrées"
+            )
+            
+        # Sections décrites à partir des vecteurs de l'index, document par document
+        topics = TopicIndex.from_chunks(metadata, StoredVectors(index))
+        # Index vide sur le disque : le prochain ajout construit le type configuré
+        if index.ntotal == 0:
+            index = None
+            
+        # Le nouvel index est entièrement construit avant d'être publié
+        with self._write_lock:
+            self._publish(index, metadata, fingerprint, topics=topics)
+            
+        logger.info(f"Index chargé : {len(metadata)} vecteurs (version {self.version})")
+    
+    def reload_index(self, index_path: Path = None, metadata_path: Path = None, force: bool = True) -> bool:
+        """
+        Recharge l'index depuis le disque sans interrompre les recherches
         
-        logger.info(f"Index chargé : {self.index.ntotal} vecteurs")
\ No newline at end of file
+        Args:
+            index_path: Chemin de l'index FAISS
+            metadata_path: Chemin des métadonnées
+            force: Recharger même si les fichiers n'ont pas changé
+            
+        Returns:
+            True si une nouvelle version a été publiée
+        """
+        index_path = index_path or config.FAISS_INDEX_PATH
+        metadata_path = metadata_path or config.METADATA_PATH
+        
+        # Un seul rechargement à la fois ; les lecteurs ne prennent jamais ce verrou
+        if not self._reload_lock.acquire(blocking=False):
+            logger.info("Rechargement déjà en cours, demande ignorée")
+            return False
+            
+        try:
+            fingerprint = self._file_fingerprint(index_path, metadata_path)
+            if fingerprint is None:
+                return False
+            if not force and fingerprint == self._snapshot.fingerprint:
+                return False
+                
+            self.load_index(index_path, metadata_path)
+            return True
+        finally:
+            self._reload_lock.release()
+    
+    def start_watching(self, interval: float = 5.0, index_path: Path = None, metadata_path: Path = None):
+        """Démarre la surveillance des fichiers d'index en arrière-plan"""
+        if self._watcher is not None:
+            return
+        self._watcher = IndexWatcher(self, interval, index_path, metadata_path)
+        self._watcher.start()
+    
+    def stop_watching(self):
+        """Arrête la surveillance des fichiers d'index"""
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
+class IndexWatcher(threading.Thread):
+    """Thread qui recharge l'index quand ses fichiers changent sur le disque"""
+    
+    def __init__(self, retriever: FAISSRetriever, interval: float = 5.0,
+                 index_path: Path = None, metadata_path: Path = None):
+        super().__init__(name="faiss-index-watcher", daemon=True)
+        self.retriever = retriever
+        self.interval = interval
+        self.index_path = index_path
+        self.metadata_path = metadata_path
+        self._stop_event = threading.Event()
+    
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                if self.retriever.reload_index(self.index_path, self.metadata_path, force=False):
+                    logger.info(f"🔄 Nouvelle version d'index publiée : {self.retriever.version}")
+            except Exception as e:
+                # Fichiers en cours de réécriture : on réessaiera au prochain tour
+                logger.warning(f"Rechargement de l'index impossible : {e}")
+    
+    def stop(self):
+        self._stop_event.set()
\ No newline at end of file
@@ -0,0 +1,270 @@
+"""
+Descriptions des documents et de leurs sections (centroïde, mots-clés,
+résumé extractif) et index thématique de la recherche en deux temps
+"""
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import math
+import re
+import numpy as np
+from .extractive import split_sentences
+from .question_classifier import normalize_text
+
+# Chunks consécutifs regroupés en une section : le découpage ne garde pas
+# la structure des documents (titres), une section est une fenêtre du texte
+SECTION_CHUNKS = 8
+
+# Mots-clés retenus par document et par section
+NUM_KEYWORDS = 8
+
+# Phrases du résumé extractif
+SUMMARY_SENTENCES = 3
+
+MIN_KEYWORD_LENGTH = 4
+
+# Mots vides (sans accents) ignorés par les mots-clés
+STOP_WORDS = frozenset(normalize_text(word) for word in """
+    alors aussi autre autres avait avant avec avoir cela celle celles celui ceci cette ceux
+    chaque comme comment dans depuis donc dont elle elles encore entre était étaient être
+    fait faire faut leur leurs lors mais même mêmes moins nous notre nos ont où par parce
+    pendant peut peuvent plus pour pourquoi quand quel quelle quelles quels sans selon
+    sera seront sont sous suis tant tous tout toute toutes très vers votre vous ainsi
+    permet permettent exemple exemples également souvent toujours après
+    about also been each from have into more only other such than that their there these
+    they this those were what when which will with would
+""".split())
+
+WORD_PATTERN = re.compile(r"[^\W\d_]+")
+
+def section_of(chunk: Dict) -> int:
+    """Numéro de section d'un chunk"""
+    return chunk.get('chunk_index', 0) // SECTION_CHUNKS
+
+def word_counts(texts: List[str]) -> Counter:
+    """Occurrences des mots significatifs (en minuscules)"""
+    counts = Counter()
+    for text in texts:
+        counts.update(
+            word for word in WORD_PATTERN.findall(text.lower())
+            if len(word) >= MIN_KEYWORD_LENGTH and normalize_text(word) not in STOP_WORDS
+        )
+    return counts
+
+def top_keywords(counts: Counter, weights: Dict[str, float] = None, limit: int = NUM_KEYWORDS) -> List[str]:
+    """Mots les plus fréquents, éventuellement pondérés (idf)"""
+    if weights is None:
+        return [word for word, _ in counts.most_common(limit)]
+    scored = sorted(counts.items(), key=lambda item: (-item[1] * weights[item[0]], item[0]))
+    return [word for word, _ in scored[:limit]]
+
+def normalized(vector: np.ndarray) -> np.ndarray:
+    return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+def extractive_summary(contents: List[str], embeddings: np.ndarray, centroid: np.ndarray,
+                       num_sentences: int = SUMMARY_SENTENCES) -> str:
+    """
+    Résumé extractif : première phrase des chunks les plus proches du centroïde
+    
+    Les embeddings des chunks sont déjà calculés : aucun appel au modèle.
+    Les phrases sont remises dans l'ordre du document.
+    """
+    central = sorted(np.argsort(-(embeddings @ centroid))[:num_sentences])
+    sentences = []
+    for row in central:
+        first = next(iter(split_sentences(contents[row])), None)
+        if first and first not in sentences:
+            sentences.append(first)
+    return " ".join(sentences)
+
+class TopicIndex:
+    """
+    Index thématique : une entrée par document et par section
+    
+    Chaque section a un centroïde (moyenne normalisée des embeddings de
+    ses chunks), des mots-clés, un sous-sujet et un résumé extractif ; le
+    document a son sujet, ses mots-clés et son résumé. Comme le catalogue,
+    l'index est immuable : un ajout produit un nouvel index en ne décrivant
+    que les nouveaux chunks. Les positions des chunks de chaque section
+    dans l'index FAISS permettent de ne chercher que dans les sections
+    proches de la question.
+    """
+    
+    __slots__ = ('documents', 'sections', '_sums', '_positions', '_keys', '_centroids')
+    
+    def __init__(self, documents: Dict[str, Dict] = None, sections: Dict[Tuple[str, int], Dict] = None,
+                 sums: Dict[Tuple[str, int], np.ndarray] = None, positions: Dict[Tuple[str, int], List[int]] = None):
+        self.documents = documents or {}
+        self.sections = sections or {}
+        # Somme des embeddings de chaque section (ajouts ultérieurs exacts)
+        self._sums = sums or {}
+        self._positions = positions or {}
+        # Matrice des centroïdes, construite à la première recherche
+        self._keys = None
+        self._centroids = None
+    
+    @classmethod
+    def from_chunks(cls, metadata: List[Dict], embeddings) -> 'TopicIndex':
+        """Index complet à partir des chunks et de leurs embeddings normalisés"""
+        return cls().with_chunks(metadata, embeddings, base=0)
+    
+    def __len__(self) -> int:
+        return len(self.sections)
+    
+    def with_chunks(self, chunks: List[Dict], embeddings, base: int = 0,
+                    positions: List[int] = None) -> 'TopicIndex':
+        """
+        Nouvel index incluant des chunks ajoutés
+        
+        Args:
+            chunks: Chunks ajoutés (sans nom de document : ignorés)
+            embeddings: Leurs embeddings normalisés (indexables par liste de lignes)
+            base: Position du premier chunk ajouté dans l'index FAISS
+            positions: Position FAISS de chaque chunk, s'ils ne sont pas consécutifs
+        """
+        rows_by_document: Dict[str, List[int]] = {}
+        for row, chunk in enumerate(chunks):
+            if chunk.get('document_name') is not None:
+                rows_by_document.setdefault(chunk['document_name'], []).append(row)
+        if not rows_by_document:
+            return self
+            
+        documents, sections = dict(self.documents), dict(self.sections)
+        if positions is None:
+            positions = range(base, base + len(chunks))
+        faiss_positions = positions
+        sums, positions = dict(self._sums), dict(self._positions)
+        for name, rows in rows_by_document.items():
+            vectors = np.asarray(embeddings[rows], dtype='float32')
+            contents = [chunks[row].get('content', '') for row in rows]
+            by_section: Dict[int, List[int]] = {}
+            for i, row in enumerate(rows):
+                by_section.setdefault(section_of(chunks[row]), []).append(i)
+                
+            document = documents.get(name)
+            if document is None:
+                section_counts = {s: word_counts([contents[i] for i in members]) for s, members in by_section.items()}
+                counts = Counter()
+                for c in section_counts.values():
+                    counts.update(c)
+                keywords = top_keywords(counts)
+                document = {
+                    'document_name': name,
+                    'topic': keywords[0] if keywords else None,
+                    'keywords': keywords,
+                    'summary': extractive_summary(contents, vectors, normalized(vectors.sum(axis=0))),
+                    'num_sections': 0
+                }
+                # Mots-clés de section : fréquents dans la section, rares
+                # dans les autres sections du document
+                frequency = Counter(word for c in section_counts.values() for word in c)
+                idf = {word: math.log((1 + len(section_counts)) / (1 + df)) + 1 for word, df in frequency.items()}
+            else:
+                document, section_counts, idf = dict(document), {}, None
+                
+            for number, members in sorted(by_section.items()):
+                key = (name, number)
+                total = vectors[members].sum(axis=0)
+                new_positions = [faiss_positions[rows[i]] for i in members]
+                if key in sections:
+                    # Section déjà décrite : seuls le centroïde et les positions évoluent
+                    sums[key] = sums[key] + total
+                    positions[key] = positions[key] + new_positions
+                    sections[key] = {**sections[key], 'num_chunks': len(positions[key])}
+                    continue
+                counts = section_counts.get(number) or word_counts([contents[i] for i in members])
+                keywords = top_keywords(counts, idf and {w: idf[w] for w in counts})
+                subtopic = next((word for word in keywords if word != document['topic']), None)
+                sums[key] = total
+                positions[key] = new_positions
+                sections[key] = {
+                    'document_name': name,
+                    'section': number,
+                    'first_chunk': number * SECTION_CHUNKS,
+                    'topic': document['topic'],
+                    'subtopic': subtopic,
+                    'keywords': keywords,
+                    'summary': extractive_summary(
+                        [contents[i] for i in members], vectors[members], normalized(total)
+                    ),
+                    'num_chunks': len(members)
+                }
+                document['num_sections'] += 1
+            documents[name] = document
+        return TopicIndex(documents, sections, sums, positions)
+    
+    def relocated(self, metadata: List[Dict], embeddings) -> 'TopicIndex':
+        """
+        Nouvel index pour des métadonnées réordonnées (retrait d'un document)
+        
+        Les descriptions sont conservées ; les positions sont recalculées et
+        les documents qui n'ont plus de chunk disparaissent. Un quasi-doublon
+        promu à la place d'un chunk retiré peut appartenir à une section
+        jamais décrite (son document n'avait aucun chunk propre dans
+        l'index) : elle est décrite à partir de son embedding. Les
+        centroïdes des sections déjà décrites gardent les chunks retirés :
+        la présélection reste approximative, pas la recherche.
+        
+        Args:
+            metadata: Chunks restants, dans l'ordre du nouvel index
+            embeddings: Leurs embeddings (alignés sur metadata)
+        """
+        positions: Dict[Tuple[str, int], List[int]] = {}
+        unknown = []
+        for position, chunk in enumerate(metadata):
+            key = (chunk.get('document_name'), section_of(chunk))
+            if key in self.sections:
+                positions.setdefault(key, []).append(position)
+            elif key[0] is not None:
+                unknown.append(position)
+        sections = {key: entry for key, entry in self.sections.items() if key in positions}
+        names = {name for name, _ in sections}
+        documents = {name: entry for name, entry in self.documents.items() if name in names}
+        sums = {key: self._sums[key] for key in sections}
+        relocated = TopicIndex(documents, sections, sums, positions)
+        if not unknown:
+            return relocated
+            
+        vectors = np.asarray(embeddings[unknown], dtype='float32')
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return relocated.with_chunks([metadata[p] for p in unknown], vectors, positions=unknown)
+    
+    def _matrix(self) -> Tuple[List[Tuple[str, int]], np.ndarray]:
+        # Construction idempotente : deux recherches concurrentes peuvent
+        # la faire en double, sans incohérence
+        if self._centroids is None:
+            keys = list(self.sections)
+            centroids = np.vstack([self._sums[key] for key in keys]).astype('float32')
+            centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+            self._keys, self._centroids = keys, centroids
+        return self._keys, self._centroids
+    
+    def select(self, query_embedding: np.ndarray, num_sections: int) -> List[Tuple[Tuple[str, int], float]]:
+        """Sections les plus proches de la question, avec leur similarité"""
+        if not self.sections:
+            return []
+        keys, centroids = self._matrix()
+        scores = centroids @ query_embedding.reshape(-1)
+        num_sections = min(num_sections, len(keys))
+        best = np.argpartition(-scores, num_sections - 1)[:num_sections]
+        best = best[np.argsort(-scores[best])]
+        return [(keys[i], float(scores[i])) for i in best]
+    
+    def candidates(self, query_embedding: np.ndarray, num_sections: int) -> np.ndarray:
+        """Positions FAISS des chunks des sections présélectionnées"""
+        selected = self.select(query_embedding, num_sections)
+        if not selected:
+            return np.empty(0, dtype='int64')
+        return np.fromiter(
+            (p for key, _ in selected for p in self._positions[key]), dtype='int64'
+        )
+    
+    def describe(self, document_name: str) -> Optional[Dict]:
+        """Description d'un document et de ses sections, None s'il est inconnu"""
+        document = self.documents.get(document_name)
+        if document is None:
+            return None
+        sections = sorted(
+            (entry for (name, _), entry in self.sections.items() if name == document_name),
+            key=lambda entry: entry['section']
+        )
+        return {**document, 'sections': sections}
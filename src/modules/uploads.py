@@ -0,0 +1,304 @@
+"""
+Réception des documents en streaming : spool unique, hachage et reprise
+"""
+from typing import Dict, List, Optional
+from pathlib import Path
+import codecs
+import hashlib
+import threading
+import time
+import uuid
+import logging
+import numpy as np
+from .chunking import TextChunker
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.txt', '.docx')
+
+class UploadError(Exception):
+    """Erreur de réception d'un document"""
+
+class UploadNotFound(UploadError):
+    """Session d'upload inconnue ou expirée"""
+
+class UploadTooLarge(UploadError):
+    """Le document dépasse la taille maximale autorisée"""
+
+class UploadOffsetMismatch(UploadError):
+    """Le morceau reçu ne commence pas là où la session s'est arrêtée"""
+    
+    def __init__(self, expected: int, received: int):
+        super().__init__(f"Offset attendu {expected}, reçu {received}")
+        self.expected = expected
+
+class UploadSession:
+    """
+    Upload en cours : fichier spool unique, empreinte SHA-256 calculée au
+    fil de l'eau et, pour les TXT, découpage et embeddings anticipés
+    pendant que la suite du fichier arrive.
+    """
+    
+    def __init__(self, spool_dir: Path, filename: str, max_bytes: int,
+                 total_size: int = None, chunker: TextChunker = None,
+                 embedding_model=None, embed_batch_size: int = 64):
+        self.upload_id = uuid.uuid4().hex
+        self.filename = Path(filename).name
+        self.extension = Path(self.filename).suffix.lower()
+        self.path = spool_dir / f"{self.upload_id}{self.extension}"
+        self.max_bytes = max_bytes
+        self.total_size = total_size
+        self.offset = 0
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+        # Un seul flux d'écriture à la fois par session
+        self.writer = threading.Lock()
+        self._hasher = hashlib.sha256()
+        self._file = open(self.path, 'wb')
+        
+        # Extraction anticipée des TXT : décodage incrémental + chunking en flux
+        self.chunk_texts: List[str] = []
+        self._embeddings: List[np.ndarray] = []
+        self._embedded = 0
+        self._embedding_model = embedding_model
+        self._embed_batch_size = embed_batch_size
+        self.num_characters = 0
+        self._streaming_chunker = None
+        if self.extension == '.txt' and chunker is not None:
+            self._decoder = codecs.getincrementaldecoder('utf-8')()
+            self._streaming_chunker = chunker.stream()
+    
+    @property
+    def sha256(self) -> str:
+        return self._hasher.hexdigest()
+    
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+    
+    def write(self, data: bytes, offset: int = None):
+        """
+        Ajoute un morceau au fichier spool
+        
+        Args:
+            data: Octets reçus
+            offset: Position annoncée par le client (reprise), None si séquentiel
+        """
+        with self.lock:
+            if self.closed:
+                raise UploadError("Upload déjà terminé")
+            if offset is not None and offset != self.offset:
+                raise UploadOffsetMismatch(self.offset, offset)
+            if self.offset + len(data) > self.max_bytes:
+                raise UploadTooLarge(
+                    f"Taille maximale dépassée ({self.max_bytes} octets)"
+                )
+                
+            self._file.write(data)
+            self._hasher.update(data)
+            self.offset += len(data)
+            self.updated_at = time.monotonic()
+            
+            if self._streaming_chunker is not None:
+                try:
+                    self._extract(self._decoder.decode(data))
+                except UnicodeDecodeError:
+                    # Pas de l'UTF-8 valide : extraction classique à la fin
+                    logger.warning(f"Extraction en flux abandonnée pour {self.filename}")
+                    self._stop_streaming()
+    
+    def _stop_streaming(self):
+        self._streaming_chunker = None
+        self.chunk_texts = []
+        self._embeddings = []
+        self._embedded = 0
+    
+    def _extract(self, text: str, final: bool = False):
+        """Découpe le texte reçu et encode les lots de chunks complets"""
+        self.num_characters += len(text)
+        self.chunk_texts.extend(self._streaming_chunker.feed(text))
+        if final:
+            self.chunk_texts.extend(self._streaming_chunker.close())
+            
+        if self._embedding_model is None:
+            return
+        while len(self.chunk_texts) - self._embedded >= self._embed_batch_size or (
+            final and self._embedded < len(self.chunk_texts)
+        ):
+            batch = self.chunk_texts[self._embedded:self._embedded + self._embed_batch_size]
+            self._embeddings.append(self._embedding_model.encode(batch))
+            self._embedded += len(batch)
+    
+    def finish(self) -> Path:
+        """Ferme le fichier spool et termine l'extraction en flux"""
+        with self.lock:
+            if not self.closed:
+                self._file.close()
+                if self._streaming_chunker is not None:
+                    try:
+                        self._extract(self._decoder.decode(b'', final=True), final=True)
+                    except UnicodeDecodeError:
+                        self._stop_streaming()
+            return self.path
+    
+    @property
+    def streamed(self) -> bool:
+        """True si le texte a été découpé pendant l'upload"""
+        return self._streaming_chunker is not None
+    
+    def streamed_embeddings(self) -> Optional[np.ndarray]:
+        """Embeddings des chunk_texts calculés pendant l'upload (TXT uniquement)"""
+        if not self._embeddings or self._embedded != len(self.chunk_texts):
+            return None
+        return np.vstack(self._embeddings)
+    
+    def discard(self):
+        """Supprime le fichier spool"""
+        with self.lock:
+            if not self.closed:
+                self._file.close()
+            self.path.unlink(missing_ok=True)
+
+class MultipartFileStream:
+    """
+    Découpage en flux d'un corps multipart/form-data
+    
+    Les morceaux du corps sont passés au parseur de python-multipart à
+    mesure qu'ils arrivent : le contenu des fichiers peut être écrit dans
+    leur spool sans que le corps entier soit d'abord reçu et recopié.
+    feed() renvoie les événements produits par un morceau :
+    ('file', nom du fichier) au début d'une partie fichier, ('data',
+    octets) pour son contenu et ('end', None) à sa fin. Les champs sans
+    nom de fichier sont ignorés.
+    """
+    
+    def __init__(self, content_type: str):
+        try:
+            from python_multipart.multipart import MultipartParser, parse_options_header
+        except ImportError:
+            # python-multipart < 0.0.13 (module multipart)
+            from multipart.multipart import MultipartParser, parse_options_header
+            
+        media_type, options = parse_options_header(content_type or '')
+        boundary = options.get(b'boundary')
+        if media_type != b'multipart/form-data' or not boundary:
+            raise ValueError("Corps multipart/form-data attendu")
+        self._parse_options_header = parse_options_header
+        self._events = []
+        self._headers: Dict[bytes, bytes] = {}
+        self._field = self._value = b''
+        self._in_file = False
+        self.complete = False
+        self._parser = MultipartParser(boundary, {
+            'on_part_begin': self._on_part_begin,
+            'on_header_field': self._on_header_field,
+            'on_header_value': self._on_header_value,
+            'on_header_end': self._on_header_end,
+            'on_headers_finished': self._on_headers_finished,
+            'on_part_data': self._on_part_data,
+            'on_part_end': self._on_part_end,
+            'on_end': self._on_end
+        })
+    
+    def feed(self, data: bytes) -> List[tuple]:
+        """Analyse un morceau du corps et renvoie les événements produits"""
+        self._parser.write(data)
+        events, self._events = self._events, []
+        return events
+    
+    def _on_part_begin(self):
+        self._headers = {}
+    
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._field += data[start:end]
+    
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._value += data[start:end]
+    
+    def _on_header_end(self):
+        self._headers[self._field.lower()] = self._value
+        self._field = self._value = b''
+    
+    def _on_headers_finished(self):
+        _, options = self._parse_options_header(self._headers.get(b'content-disposition', b''))
+        filename = options.get(b'filename')
+        self._in_file = filename is not None
+        if self._in_file:
+            self._events.append(('file', filename.decode('utf-8', errors='replace')))
+    
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if not self._in_file:
+            return
+        # Morceaux consécutifs d'un même appel à feed() regroupés
+        if self._events and self._events[-1][0] == 'data':
+            self._events[-1] = ('data', self._events[-1][1] + data[start:end])
+        else:
+            self._events.append(('data', data[start:end]))
+    
+    def _on_part_end(self):
+        if self._in_file:
+            self._events.append(('end', None))
+        self._in_file = False
+    
+    def _on_end(self):
+        self.complete = True
+
+class UploadManager:
+    """Registre des uploads en cours"""
+    
+    def __init__(self, spool_dir: Path, max_bytes: int, session_ttl: float = 3600,
+                 chunker: TextChunker = None, embedding_model=None):
+        self.spool_dir = Path(spool_dir)
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.session_ttl = session_ttl
+        self.chunker = chunker
+        self.embedding_model = embedding_model
+        self._sessions: Dict[str, UploadSession] = {}
+        self._lock = threading.Lock()
+    
+    def create(self, filename: str, total_size: int = None, stream_extraction: bool = True) -> UploadSession:
+        """Ouvre une session d'upload"""
+        extension = Path(filename).suffix.lower()
+        if extension not in SUPPORTED_EXTENSIONS:
+            raise ValueError(f"Format non supporté: {extension}")
+        if total_size is not None and total_size > self.max_bytes:
+            raise UploadTooLarge(f"Taille maximale dépassée ({self.max_bytes} octets)")
+            
+        self.cleanup_expired()
+        session = UploadSession(
+            self.spool_dir,
+            filename,
+            self.max_bytes,
+            total_size=total_size,
+            chunker=self.chunker if stream_extraction else None,
+            embedding_model=self.embedding_model if stream_extraction else None
+        )
+        with self._lock:
+            self._sessions[session.upload_id] = session
+        logger.info(f"📥 Upload ouvert : {session.filename} ({session.upload_id})")
+        return session
+    
+    def get(self, upload_id: str) -> UploadSession:
+        session = self._sessions.get(upload_id)
+        if session is None:
+            raise UploadNotFound(f"Upload inconnu ou expiré : {upload_id}")
+        return session
+    
+    def release(self, upload_id: str, keep_file: bool = False):
+        """Retire une session du registre (et son fichier spool sauf keep_file)"""
+        with self._lock:
+            session = self._sessions.pop(upload_id, None)
+        if session is not None and not keep_file:
+            session.discard()
+    
+    def cleanup_expired(self):
+        """Supprime les uploads abandonnés depuis plus de session_ttl secondes"""
+        now = time.monotonic()
+        expired = [
+            upload_id for upload_id, session in list(self._sessions.items())
+            if now - session.updated_at > self.session_ttl
+        ]
+        for upload_id in expired:
+            logger.info(f"Upload expiré : {upload_id}")
+            self.release(upload_id)
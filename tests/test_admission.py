@@ -0,0 +1,125 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+import asyncio
+import pytest
+from modules.admission import AdmissionController, AdmissionRejected
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+class TestAdmissionController:
+    """Tests du contrôle d'admission"""
+    
+    def test_immediate_admission(self):
+        async def scenario():
+            controller = AdmissionController(max_concurrency=2)
+            ticket = await controller.acquire('a')
+            assert not ticket.degraded
+            assert controller.active == 1
+            controller.release(ticket)
+            assert controller.active == 0
+        run(scenario())
+    
+    def test_full_queue_rejected(self):
+        async def scenario():
+            controller = AdmissionController(max_concurrency=1, max_queue=1)
+            first = await controller.acquire('a')
+            waiter = asyncio.ensure_future(controller.acquire('b'))
+            await asyncio.sleep(0)
+            with pytest.raises(AdmissionRejected) as error:
+                await controller.acquire('c')
+            assert error.value.status_code == 503
+            assert error.value.retry_after >= 1
+            controller.release(first)
+            controller.release(await waiter)
+        run(scenario())
+    
+    def test_per_client_limit(self):
+        async def scenario():
+            controller = AdmissionController(max_concurrency=4, per_client_limit=2)
+            tickets = [await controller.acquire('a'), await controller.acquire('a')]
+            with pytest.raises(AdmissionRejected) as error:
+                await controller.acquire('a')
+            assert error.value.status_code == 429
+            # Les autres clients ne sont pas concernés
+            controller.release(await controller.acquire('b'))
+            for ticket in tickets:
+                controller.release(ticket)
+        run(scenario())
+    
+    def test_priority_and_fairness_order(self):
+        async def scenario():
+            controller = AdmissionController(max_concurrency=1)
+            running = await controller.acquire('x')
+            order = []
+            
+            async def request(client_id, priority='interactive'):
+                ticket = await controller.acquire(client_id, priority)
+                order.append(client_id)
+                controller.release(ticket)
+                
+            tasks = [
+                asyncio.ensure_future(request('batch', 'batch')),
+                asyncio.ensure_future(request('a')),
+                asyncio.ensure_future(request('a')),
+                asyncio.ensure_future(request('b'))
+            ]
+            await asyncio.sleep(0)
+            assert controller.waiting == 4
+            controller.release(running)
+            await asyncio.gather(*tasks)
+            # 'b' passe avant la deuxième requête de 'a', le lot en dernier
+            assert order == ['a', 'b', 'a', 'batch']
+            assert controller.active == 0 and controller.waiting == 0
+        run(scenario())
+    
+    def test_degraded_after_queue_timeout(self):
+        async def scenario():
+            controller = AdmissionController(max_concurrency=1, queue_timeout=0.05)
+            running = await controller.acquire('a')
+            ticket = await controller.acquire('b')
+            assert ticket.degraded
+            assert controller.waiting == 0
+            assert controller.active == 1
+            controller.release(ticket)
+            controller.release(running)
+            assert controller.active == 0
+        run(scenario())
+    
+    def test_degraded_slots_are_bounded(self):
+        async def scenario():
+            controller = AdmissionController(max_concurrency=1, queue_timeout=0.05, max_degraded=1)
+            running = await controller.acquire('a')
+            degraded = await controller.acquire('b')
+            assert degraded.degraded
+            assert controller.degraded_active == 1
+            with pytest.raises(AdmissionRejected) as excinfo:
+                await controller.acquire('c')
+            assert excinfo.value.status_code == 503
+            assert excinfo.value.retry_after >= 1
+            assert controller.waiting == 0
+            assert 'c' not in controller._per_client
+            controller.release(degraded)
+            assert controller.degraded_active == 0
+            ticket = await controller.acquire('c')
+            assert ticket.degraded
+            controller.release(ticket)
+            controller.release(running)
+            assert controller.active == 0
+        run(scenario())
+    
+    def test_cancelled_waiter_is_skipped(self):
+        async def scenario():
+            controller = AdmissionController(max_concurrency=1)
+            running = await controller.acquire('a')
+            waiter = asyncio.ensure_future(controller.acquire('b'))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+            assert controller.waiting == 0
+            controller.release(running)
+            assert controller.active == 0
+        run(scenario())
@@ -0,0 +1,123 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+sys.path.append(str(Path(__file__).parent.parent / "src" / "api"))
+
+import io
+import pytest
+from fastapi.testclient import TestClient
+import main
+from modules.admission import AdmissionController
+
+@pytest.fixture
+def client():
+    main.retriever.clear_index()
+    return TestClient(main.app)
+
+def course(subject: str) -> bytes:
+    return " ".join(
+        f"{subject} : la notion numéro {i} du chapitre est expliquée avec un exemple." for i in range(40)
+    ).encode('utf-8')
+
+class TestBulkUpload:
+    """Tests de l'upload de plusieurs documents en une requête"""
+    
+    @pytest.fixture
+    def saves(self, monkeypatch):
+        calls = []
+        save_index = main.retriever.save_index
+        monkeypatch.setattr(main.retriever, 'save_index', lambda *args: calls.append(args) or save_index(*args))
+        monkeypatch.setattr(main.uploads, 'max_bytes', 10_000)
+        return calls
+    
+    def test_per_file_results_and_single_save(self, client, saves):
+        files = [
+            ("files", ("gradient.txt", course("La descente de gradient"), "text/plain")),
+            ("files", ("image.png", b"\x89PNG", "image/png")),
+            ("files", ("gros.txt", b"a" * 20_000, "text/plain")),
+            ("files", ("vide.txt", b"", "text/plain")),
+            ("files", ("arbres.txt", course("Les arbres de décision"), "text/plain"))
+        ]
+        response = client.post("/upload_documents", files=files)
+        assert response.status_code == 200
+        data = response.json()
+        
+        statuses = {d["filename"]: d["status"] for d in data["documents"]}
+        assert statuses == {
+            "gradient.txt": "indexed", "image.png": "error", "gros.txt": "error",
+            "vide.txt": "error", "arbres.txt": "indexed"
+        }
+        errors = {d["filename"]: d.get("error", "") for d in data["documents"]}
+        assert "Format non supporté" in errors["image.png"]
+        assert "Taille maximale" in errors["gros.txt"]
+        assert "Aucun texte extrait" in errors["vide.txt"]
+        assert data["num_indexed"] == 2
+        assert len(saves) == 1
+        
+        # Extraction échouée : ni indexé ni archivé, les autres le sont
+        assert set(main.retriever.catalogue.documents) == {"gradient.txt", "arbres.txt"}
+        archived = {path.name.split("_", 1)[1] for path in main.config.DOCUMENTS_DIR.glob("*_*.txt")}
+        assert {"gradient.txt", "arbres.txt"} <= archived
+        assert not archived & {"vide.txt", "gros.txt"}
+        assert data["total_vectors"] == main.retriever.index.ntotal
+    
+    def test_nothing_to_index_does_not_save(self, client, saves):
+        files = [("files", ("image.png", b"\x89PNG", "image/png")), ("files", ("vide.txt", b"", "text/plain"))]
+        data = client.post("/upload_documents", files=files).json()
+        assert [d["status"] for d in data["documents"]] == ["error", "error"]
+        assert data["num_indexed"] == 0
+        assert saves == []
+
+class TestDistributedCoordinator:
+    """Tests du coordinateur de recherche distribuée"""
+    
+    @pytest.fixture
+    def coordinator(self, client, monkeypatch):
+        # Un searcher distinct de l'index local : mode RETRIEVAL_NODES
+        monkeypatch.setattr(main, 'searcher', object())
+        return client
+    
+    def test_index_writes_are_refused(self, coordinator):
+        response = coordinator.post(
+            "/upload_document", files={"file": ("cours.txt", io.BytesIO(b"Un cours."), "text/plain")}
+        )
+        assert response.status_code == 409
+        assert "node.py split" in response.json()["detail"]
+        assert coordinator.post("/uploads", json={"filename": "cours.txt"}).status_code == 409
+        assert coordinator.delete("/documents/cours.txt").status_code == 409
+        assert coordinator.delete("/clear_index").status_code == 409
+        assert main.retriever.metadata == []
+
+class TestQueryAdmission:
+    """Tests des refus d'admission de /query"""
+    
+    def ask(self, client):
+        return client.post("/query", json={"question": "Qu'est-ce qu'un gradient ?"}, headers={"X-Client-Id": "a"})
+    
+    def test_per_client_limit_returns_429(self, client, monkeypatch):
+        monkeypatch.setattr(main, 'admission', AdmissionController(per_client_limit=0))
+        response = self.ask(client)
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+    
+    def test_full_queue_returns_503(self, client, monkeypatch):
+        controller = AdmissionController(max_concurrency=1, max_queue=0)
+        controller.active = 1
+        monkeypatch.setattr(main, 'admission', controller)
+        response = self.ask(client)
+        assert response.status_code == 503
+        assert int(response.headers["Retry-After"]) >= 1
+    
+    def test_no_degraded_slot_returns_503(self, client, monkeypatch):
+        controller = AdmissionController(max_concurrency=1, queue_timeout=0.05, max_degraded=1)
+        controller.active = 1
+        controller.degraded_active = 1
+        monkeypatch.setattr(main, 'admission', controller)
+        response = self.ask(client)
+        assert response.status_code == 503
+        assert int(response.headers["Retry-After"]) >= 1
+        assert controller.waiting == 0
+        assert controller.degraded_active == 1
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
\ No newline at end of file
@@ -0,0 +1,63 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from modules.catalogue import DocumentCatalogue
+
+def chunks_for(name, count, characters=100, **extra):
+    return [
+        {'document_name': name, 'chunk_index': i, 'num_characters': characters, **extra}
+        for i in range(count)
+    ]
+
+class TestDocumentCatalogue:
+    """Tests du catalogue des documents"""
+    
+    def test_incremental_matches_full_rebuild(self):
+        first = chunks_for('cours.pdf', 3, num_pages=12, ingested_at='2024-01-01T00:00:00+00:00')
+        second = chunks_for('notes.txt', 2, characters=50)
+        incremental = DocumentCatalogue().with_chunks(first).with_chunks(second)
+        full = DocumentCatalogue.from_metadata(first + second)
+        
+        assert incremental.documents == full.documents
+        assert incremental.total_chunks == 5
+        assert incremental.documents['cours.pdf'] == {
+            'filename': 'cours.pdf',
+            'num_chunks': 3,
+            'total_characters': 300,
+            'num_pages': 12,
+            'ingested_at': '2024-01-01T00:00:00+00:00'
+        }
+    
+    def test_updates_do_not_modify_previous_catalogue(self):
+        catalogue = DocumentCatalogue.from_metadata(chunks_for('cours.pdf', 3))
+        updated = catalogue.with_chunks(chunks_for('cours.pdf', 1))
+        
+        assert catalogue.documents['cours.pdf']['num_chunks'] == 3
+        assert updated.documents['cours.pdf']['num_chunks'] == 4
+        assert updated.etag != catalogue.etag
+        assert 'cours.pdf' not in updated.without('cours.pdf').documents
+    
+    def test_page_and_search(self):
+        names = ['Réseaux de neurones.pdf', 'Python.txt', 'Régression.docx', 'Arbres.pdf']
+        catalogue = DocumentCatalogue.from_metadata([c for n in names for c in chunks_for(n, 1)])
+        
+        documents, total = catalogue.page(offset=1, limit=2)
+        assert [d['filename'] for d in documents] == ['Python.txt', 'Régression.docx']
+        assert total == 4
+        
+        documents, total = catalogue.page(search='RESEAUX')
+        assert [d['filename'] for d in documents] == ['Réseaux de neurones.pdf']
+        assert total == 1
+        
+        documents, total = catalogue.page(search='.pdf', offset=1)
+        assert [d['filename'] for d in documents] == ['Arbres.pdf']
+        assert total == 2
+    
+    def test_chunks_without_document_name_are_ignored(self):
+        # Index construits hors ingestion (benchmarks) : pas de nom de document
+        catalogue = DocumentCatalogue.from_metadata(
+            [{'chunk_id': '0'}, {'chunk_id': '1'}] + chunks_for('cours.pdf', 2)
+        )
+        assert list(catalogue.documents) == ['cours.pdf']
+        assert catalogue.total_chunks == 2
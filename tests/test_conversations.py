@@ -0,0 +1,65 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+import numpy as np
+from modules.conversations import ConversationStore, is_follow_up
+
+TOPIC = np.array([1.0, 0.0, 0.0], dtype='float32')
+
+class TestConversationStore:
+    """Tests des sessions de conversation"""
+    
+    def add(self, store, session_id, question, follow_up=False):
+        store.add_turn(session_id, question, "réponse", 'definition', follow_up,
+                       "Qu'est-ce que le gradient ?", TOPIC, [{'chunk_id': 'c_0', 'score': 0.9}])
+    
+    def test_last_turn_round_trip(self, tmp_path):
+        store = ConversationStore(tmp_path / "conversations.sqlite3")
+        assert store.last_turn('s1') is None
+        
+        self.add(store, 's1', "Qu'est-ce que le gradient ?")
+        self.add(store, 's1', "Un exemple ?", follow_up=True)
+        turn = store.last_turn('s1')
+        
+        assert turn.turn == 2
+        assert turn.follow_up
+        assert turn.topic_question == "Qu'est-ce que le gradient ?"
+        assert np.array_equal(turn.topic_embedding, TOPIC)
+        assert turn.chunks == [{'chunk_id': 'c_0', 'score': 0.9}]
+        assert [t['turn'] for t in store.history('s1')] == [1, 2]
+        assert store.last_turn('s2') is None
+    
+    def test_persistence_and_limits(self, tmp_path):
+        path = tmp_path / "conversations.sqlite3"
+        store = ConversationStore(path, max_turns=2)
+        for i in range(4):
+            self.add(store, 's1', f"Question {i}")
+        store.close()
+        
+        reopened = ConversationStore(path, max_turns=2)
+        assert [t['question'] for t in reopened.history('s1')] == ["Question 2", "Question 3"]
+        assert reopened.delete('s1')
+        assert not reopened.delete('s1')
+    
+    def test_expired_sessions(self, tmp_path):
+        store = ConversationStore(tmp_path / "conversations.sqlite3", ttl=0)
+        self.add(store, 's1', "Question")
+        assert store.last_turn('s1') is None
+        store.cleanup_expired()
+        assert store.history('s1') == []
+    
+    def test_is_follow_up(self, tmp_path):
+        store = ConversationStore(tmp_path / "conversations.sqlite3")
+        self.add(store, 's1', "Qu'est-ce que le gradient ?")
+        previous = store.last_turn('s1')
+        unrelated = np.array([0.0, 1.0, 0.0], dtype='float32')
+        close = np.array([0.9, 0.1, 0.0], dtype='float32')
+        
+        # Relance explicite, quel que soit l'embedding
+        assert is_follow_up("Voulez-vous un exemple pratique ?", unrelated, previous)
+        # Même sujet
+        assert is_follow_up("Et le gradient stochastique ?", close, previous)
+        # Sujet différent : nouvelle recherche
+        assert not is_follow_up("Qu'est-ce que Python ?", unrelated, previous)
+        assert not is_follow_up("Un exemple ?", close, None)
@@ -0,0 +1,74 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+import os
+import pytest
+from modules.cpu_inference import parse_cpulist, numa_nodes, pin_to_numa_node, configure_torch_threads
+
+def make_nodes(root, cpulists):
+    for node, cpulist in cpulists.items():
+        (root / f"node{node}").mkdir()
+        (root / f"node{node}" / "cpulist").write_text(cpulist + "\n")
+
+class TestNumaPlacement:
+    """Tests du placement sur un nœud NUMA"""
+    
+    @pytest.fixture
+    def affinity(self):
+        original = os.sched_getaffinity(0)
+        yield original
+        os.sched_setaffinity(0, original)
+    
+    def test_parse_cpulist(self):
+        assert parse_cpulist("0-3,8-9,12\n") == [0, 1, 2, 3, 8, 9, 12]
+        assert parse_cpulist("") == []
+    
+    def test_numa_nodes_from_sysfs(self, tmp_path):
+        make_nodes(tmp_path, {0: "0-3", 1: "4-7", 2: ""})
+        assert numa_nodes(str(tmp_path)) == {0: [0, 1, 2, 3], 1: [4, 5, 6, 7]}
+    
+    def test_pin_restricts_affinity(self, tmp_path, affinity):
+        cpu = min(affinity)
+        make_nodes(tmp_path, {0: str(cpu), 1: "4096"})
+        assert pin_to_numa_node(0, str(tmp_path)) == [cpu]
+        assert os.sched_getaffinity(0) == {cpu}
+    
+    def test_pin_rejects_unknown_or_forbidden_node(self, tmp_path, affinity):
+        make_nodes(tmp_path, {0: "4096"})
+        with pytest.raises(ValueError):
+            pin_to_numa_node(3, str(tmp_path))
+        with pytest.raises(ValueError):
+            pin_to_numa_node(0, str(tmp_path))
+        assert os.sched_getaffinity(0) == affinity
+    
+    def test_default_threads_follow_affinity(self, affinity):
+        threads = configure_torch_threads()
+        assert threads['intra_op'] == len(affinity)
+
+class TestQuantization:
+    """Tests de la quantification int8 (nécessite torch et transformers)"""
+    
+    def test_int8_gpt2_shrinks_weights_and_still_generates(self):
+        pytest.importorskip("torch.ao.quantization")
+        import torch
+        from transformers import GPT2Config, GPT2LMHeadModel
+        from modules.cpu_inference import quantize_int8, model_size_bytes
+        
+        torch.manual_seed(0)
+        model = GPT2LMHeadModel(GPT2Config(n_layer=2, n_embd=64, n_head=4, vocab_size=500)).eval()
+        input_ids = torch.tensor([[1, 2, 3, 4]])
+        with torch.no_grad():
+            expected = model(input_ids).logits
+        size = model_size_bytes(model)
+        
+        quantized = quantize_int8(model)
+        assert model_size_bytes(quantized) < size
+        with torch.no_grad():
+            logits = quantized(input_ids).logits
+        assert logits.shape == expected.shape
+        assert torch.nn.functional.cosine_similarity(logits.flatten(), expected.flatten(), dim=0) > 0.95
+        assert quantized.generate(input_ids, max_new_tokens=3, do_sample=False).shape[1] == 7
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,79 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+import pytest
+import numpy as np
+from modules.dedup import NearDuplicateIndex, shingles, source_reference, dedup_report
+
+PASSAGE = (
+    "La descente de gradient met à jour les poids du modèle dans la direction "
+    "opposée au gradient de la fonction de perte, avec un pas fixé par le taux "
+    "d'apprentissage, jusqu'à convergence vers un minimum local."
+)
+
+class TestShingles:
+    """Tests des shingles de mots"""
+    
+    def test_ignores_case_accents_and_punctuation(self):
+        assert shingles("Réseau de neurones, couches cachées !") == shingles("reseau de NEURONES couches cachees")
+    
+    def test_short_text_gives_one_shingle(self):
+        assert len(shingles("Deux mots")) == 1
+        assert shingles("") == set()
+
+class TestNearDuplicateIndex:
+    """Tests de l'index MinHash LSH"""
+    
+    def test_signature_estimates_jaccard(self):
+        dedup = NearDuplicateIndex()
+        same = dedup.signature(PASSAGE.upper())
+        assert np.array_equal(dedup.signature(PASSAGE), same)
+        
+        other = dedup.signature("Python est un langage de programmation interprété et polyvalent utilisé en data science")
+        assert np.mean(dedup.signature(PASSAGE) == other) < 0.2
+    
+    def test_query_finds_near_duplicate(self):
+        dedup = NearDuplicateIndex(threshold=0.7)
+        dedup.add(0, dedup.signature(PASSAGE))
+        dedup.add(1, dedup.signature("Un réseau de neurones est composé de couches de neurones reliées par des poids"))
+        
+        # Même passage, en-tête de page différent
+        variant = PASSAGE + " Page 12"
+        assert dedup.query(dedup.signature(variant)) == 0
+        assert dedup.query(dedup.signature("Les arbres de décision découpent l'espace des variables")) is None
+    
+    def test_rebuild_replaces_content(self):
+        dedup = NearDuplicateIndex()
+        dedup.add(0, dedup.signature("texte oublié après reconstruction de l'index"))
+        dedup.rebuild([(5, PASSAGE)])
+        assert len(dedup) == 1
+        assert dedup.query(dedup.signature(PASSAGE)) == 5
+    
+    def test_bands_must_divide_permutations(self):
+        with pytest.raises(ValueError):
+            NearDuplicateIndex(num_perm=100, bands=16)
+
+class TestDedupReport:
+    """Tests du rapport de place économisée"""
+    
+    def test_report_counts_references(self):
+        metadata = [
+            {'content': PASSAGE, 'document_name': 'a.pdf', 'duplicates': [
+                source_reference({'content': PASSAGE, 'document_name': 'b.pdf', 'chunk_id': 'b_0'}),
+                {'document_name': 'c.pdf', 'chunk_id': 'c_3'}
+            ]},
+            {'content': "Autre passage", 'document_name': 'a.pdf'}
+        ]
+        assert 'content' not in metadata[0]['duplicates'][0]
+        
+        report = dedup_report(metadata, dimension=384)
+        assert report['indexed_vectors'] == 2
+        assert report['source_chunks'] == 4
+        assert report['collapsed_chunks'] == 2
+        assert report['collapsed_ratio'] == 0.5
+        assert report['vector_bytes_saved'] == 2 * 384 * 4
+        assert report['collapsed_by_document'] == {'b.pdf': 1, 'c.pdf': 1}
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
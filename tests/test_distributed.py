@@ -0,0 +1,166 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+import os
+import socket
+import subprocess
+import time
+import pytest
+from modules.retrieval import FAISSRetriever
+from modules.distributed import ScatterGatherRetriever, ShardUnavailable, HttpShard, split_by_document
+
+TEXTS = [
+    ("ml.txt", "Le machine learning est une branche de l'intelligence artificielle"),
+    ("ml.txt", "La descente de gradient minimise la fonction de perte"),
+    ("dl.txt", "Le deep learning utilise des réseaux de neurones profonds"),
+    ("dl.txt", "Un réseau de neurones est composé de couches"),
+    ("py.txt", "Python est un langage de programmation"),
+    ("ds.txt", "La data science analyse les données")
+]
+
+class LocalShard:
+    """Shard dans le processus, avec latence ou panne simulées"""
+    
+    def __init__(self, name, retriever, delay=0.0, fail=False):
+        self.name = name
+        self.retriever = retriever
+        self.delay = delay
+        self.fail = fail
+    
+    def search(self, query_embeddings, top_k, timeout):
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("nœud arrêté")
+        return self.retriever.search_vectors(query_embeddings, top_k)
+
+def build_shards(model, num_shards):
+    metadata = [
+        {'chunk_id': f'{name}_{i}', 'content': text, 'document_name': name, 'chunk_index': i}
+        for i, (name, text) in enumerate(TEXTS)
+    ]
+    embeddings = model.encode([m['content'] for m in metadata])
+    shards = []
+    for positions in split_by_document(metadata, num_shards):
+        shard = FAISSRetriever(embedding_model=model)
+        shard.create_index(embeddings[positions], [metadata[p] for p in positions])
+        shards.append(shard)
+    return metadata, embeddings, shards
+
+class TestScatterGather:
+    """Tests du coordinateur de recherche distribuée"""
+    
+    @pytest.fixture
+    def single(self):
+        retriever = FAISSRetriever()
+        metadata = [
+            {'chunk_id': f'{name}_{i}', 'content': text, 'document_name': name, 'chunk_index': i}
+            for i, (name, text) in enumerate(TEXTS)
+        ]
+        retriever.create_index(retriever.embedding_model.encode([m['content'] for m in metadata]), metadata)
+        return retriever
+    
+    def test_split_keeps_documents_whole(self):
+        metadata = [{'document_name': name} for name, _ in TEXTS]
+        shards = split_by_document(metadata, 3)
+        assert sorted(p for shard in shards for p in shard) == list(range(len(TEXTS)))
+        for shard in shards:
+            names = {metadata[p]['document_name'] for p in shard}
+            assert all(metadata[p]['document_name'] not in names for other in shards if other is not shard for p in other)
+        assert max(map(len, shards)) - min(map(len, shards)) <= 1
+    
+    def test_merged_results_match_single_index(self, single):
+        _, _, shards = build_shards(single.embedding_model, 3)
+        coordinator = ScatterGatherRetriever(
+            [LocalShard(f's{i}', shard) for i, shard in enumerate(shards)], single.embedding_model
+        )
+        query = single.encode_query("réseaux de neurones et deep learning")
+        expected = single.search_by_vector(query, top_k=4)
+        results = coordinator.search_by_vector(query, top_k=4)
+        assert [r['chunk_id'] for r in results] == [r['chunk_id'] for r in expected]
+        assert [r['score'] for r in results] == pytest.approx([r['score'] for r in expected])
+        assert all(r['shard'] in {'s0', 's1', 's2'} for r in results)
+    
+    def test_search_multi_fuses_across_shards(self, single):
+        _, _, shards = build_shards(single.embedding_model, 2)
+        coordinator = ScatterGatherRetriever(
+            [LocalShard(f's{i}', shard) for i, shard in enumerate(shards)], single.embedding_model
+        )
+        queries = ["descente de gradient", "réseau de neurones"]
+        results = coordinator.search_multi(queries, top_k=3)
+        keys = [(r['document_name'], r['chunk_id']) for r in results]
+        assert len(keys) == len(set(keys)) == 3
+        assert all(r['matched_queries'] for r in results)
+    
+    def test_straggler_gives_partial_results(self, single):
+        _, _, shards = build_shards(single.embedding_model, 2)
+        coordinator = ScatterGatherRetriever(
+            [LocalShard('fast', shards[0]), LocalShard('slow', shards[1], delay=1.0)],
+            single.embedding_model,
+            deadline=0.2
+        )
+        start = time.perf_counter()
+        rows, missing = coordinator.gather(single.encode_query("Python"), top_k=3)
+        assert time.perf_counter() - start < 0.8
+        assert missing == ['slow']
+        assert rows[0] and all(r['shard'] == 'fast' for r in rows[0])
+    
+    def test_all_shards_down(self, single):
+        _, _, shards = build_shards(single.embedding_model, 2)
+        coordinator = ScatterGatherRetriever(
+            [LocalShard(f's{i}', shard, fail=True) for i, shard in enumerate(shards)], single.embedding_model
+        )
+        with pytest.raises(ShardUnavailable):
+            coordinator.search_by_vector(single.encode_query("Python"))
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+class TestNodeProcesses:
+    """Coordinateur et nœuds dans des processus locaux distincts"""
+    
+    def test_scatter_gather_over_http(self, tmp_path):
+        pytest.importorskip("uvicorn")
+        model = FAISSRetriever().embedding_model
+        _, _, shards = build_shards(model, 2)
+        
+        processes, urls = [], []
+        try:
+            for i, shard in enumerate(shards):
+                shard.save_index(tmp_path / f"{i}.index", tmp_path / f"{i}.json")
+                port = _free_port()
+                env = dict(os.environ, NODE_INDEX_PATH=str(tmp_path / f"{i}.index"),
+                           NODE_METADATA_PATH=str(tmp_path / f"{i}.json"), INDEX_WATCH_INTERVAL="0")
+                processes.append(subprocess.Popen(
+                    [sys.executable, "-m", "uvicorn", "node:app", "--port", str(port), "--log-level", "warning"],
+                    cwd=Path(__file__).parent.parent / "src" / "api", env=env
+                ))
+                urls.append(f"http://127.0.0.1:{port}")
+                
+            coordinator = ScatterGatherRetriever.from_urls(urls, model, deadline=5.0)
+            for _ in range(100):
+                if all(status['available'] for status in coordinator.status(timeout=0.5)):
+                    break
+                time.sleep(0.1)
+            assert sum(status['num_vectors'] for status in coordinator.status()) == len(TEXTS)
+            
+            query = shards[0].encode_query(TEXTS[4][1])
+            rows, missing = coordinator.gather(query, top_k=3)
+            assert missing == []
+            assert rows[0][0]['content'] == TEXTS[4][1]
+            
+            # Un nœud arrêté : réponse partielle du nœud restant
+            processes[1].terminate()
+            processes[1].wait()
+            rows, missing = coordinator.gather(query, top_k=3)
+            assert missing == [HttpShard(urls[1]).name]
+            assert rows[0]
+        finally:
+            for process in processes:
+                process.terminate()
+                process.wait()
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,59 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+import pytest
+import numpy as np
+from modules.embedding_store import EmbeddingStore, content_hash
+
+class CountingModel:
+    """Modèle factice qui compte les textes encodés"""
+    
+    model_name = 'test-model'
+    
+    def __init__(self):
+        self.encoded = 0
+    
+    def encode(self, texts, batch_size=32):
+        self.encoded += len(texts)
+        return np.array([[len(t), t.count('e'), 1.0] for t in texts], dtype='float32')
+
+class TestEmbeddingStore:
+    """Tests du stockage disque des embeddings"""
+    
+    def test_only_unknown_texts_are_encoded(self, tmp_path):
+        model = CountingModel()
+        store = EmbeddingStore(tmp_path, model.model_name, 3)
+        
+        first = store.encode(model, ["le gradient", "la descente"])
+        second = store.encode(model, ["la descente", "le gradient", "un réseau"])
+        
+        assert model.encoded == 3
+        np.testing.assert_array_equal(second[:2], first[::-1])
+        assert len(store) == 3
+    
+    def test_persisted_across_instances(self, tmp_path):
+        model = CountingModel()
+        EmbeddingStore(tmp_path, model.model_name, 3).encode(model, ["le gradient"])
+        
+        reopened = EmbeddingStore(tmp_path, model.model_name, 3)
+        vectors, missing = reopened.lookup([content_hash("le gradient"), content_hash("autre")])
+        assert missing == [1]
+        np.testing.assert_array_equal(vectors[0], [11, 2, 1])
+    
+    def test_interrupted_write_is_ignored(self, tmp_path):
+        """Des vecteurs sans clé (écriture interrompue) sont tronqués au chargement"""
+        model = CountingModel()
+        store = EmbeddingStore(tmp_path, model.model_name, 3)
+        store.encode(model, ["le gradient"])
+        with open(store.vectors_path, 'ab') as f:
+            f.write(np.ones(3, dtype='float32').tobytes())
+            
+        reopened = EmbeddingStore(tmp_path, model.model_name, 3)
+        assert len(reopened) == 1
+        assert reopened.vectors_path.stat().st_size == 3 * 4
+    
+    def test_dimension_mismatch(self, tmp_path):
+        EmbeddingStore(tmp_path, 'test-model', 3)
+        with pytest.raises(ValueError):
+            EmbeddingStore(tmp_path, 'test-model', 4)
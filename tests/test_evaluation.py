@@ -0,0 +1,79 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+import json
+import pytest
+from modules.evaluation import (
+    load_golden_set, relevance_labels, recall_at_k, reciprocal_rank,
+    ndcg_at_k, evaluate_search, pareto_frontier
+)
+
+class TestEvaluation:
+    """Tests pour les métriques d'évaluation du retrieval"""
+    
+    @pytest.fixture
+    def chunks(self):
+        return [
+            {'chunk_id': 'cours_0', 'content': "Python est un langage de programmation"},
+            {'chunk_id': 'cours_1', 'content': "Le gradient indique la direction de plus forte pente"},
+            {'chunk_id': 'cours_2', 'content': "Le  gradient indique la direction, suite du cours"}
+        ]
+    
+    def test_relevance_labels_by_passage(self, chunks):
+        """Test la pertinence par extrait, comptée une seule fois"""
+        item = {'question': "?", 'expected_passages': ["le gradient indique la direction"]}
+        assert relevance_labels(chunks, item) == [0, 1, 0]
+    
+    def test_relevance_labels_by_chunk_id(self, chunks):
+        """Test la pertinence par identifiant de chunk"""
+        item = {'question': "?", 'expected_chunk_ids': ['cours_0', 'cours_2']}
+        assert relevance_labels(chunks, item) == [1, 0, 1]
+    
+    def test_ranking_metrics(self):
+        """Test recall@k, MRR et nDCG"""
+        labels = [0, 1, 0, 1]
+        
+        assert recall_at_k(labels, 2, 2) == 0.5
+        assert recall_at_k(labels, 2, 4) == 1.0
+        assert reciprocal_rank(labels) == 0.5
+        assert reciprocal_rank([0, 0]) == 0.0
+        assert ndcg_at_k([1, 1], 2, 2) == pytest.approx(1.0)
+        assert 0 < ndcg_at_k(labels, 2, 4) < 1
+    
+    def test_evaluate_search(self, chunks):
+        """Test l'évaluation d'une fonction de recherche"""
+        golden = [{'question': "gradient", 'expected_chunk_ids': ['cours_1']}]
+        
+        def search(question, top_k):
+            return chunks[:top_k]
+            
+        result = evaluate_search(search, golden, top_k=2)
+        
+        assert result['recall_at_k'] == 1.0
+        assert result['mrr'] == 0.5
+        assert result['latency_p50_ms'] >= 0
+    
+    def test_pareto_frontier(self):
+        """Test que seules les configurations non dominées sont gardées"""
+        results = [
+            {'name': 'rapide', 'ndcg_at_k': 0.5, 'latency_p50_ms': 1.0},
+            {'name': 'domine', 'ndcg_at_k': 0.4, 'latency_p50_ms': 2.0},
+            {'name': 'precis', 'ndcg_at_k': 0.9, 'latency_p50_ms': 5.0},
+            {'name': 'lent', 'ndcg_at_k': 0.9, 'latency_p50_ms': 8.0}
+        ]
+        
+        frontier = pareto_frontier(results)
+        
+        assert [r['name'] for r in frontier] == ['rapide', 'precis']
+    
+    def test_load_golden_set_rejects_missing_expectations(self, tmp_path):
+        """Test qu'une question sans résultat attendu est refusée"""
+        path = tmp_path / "golden.jsonl"
+        path.write_text(json.dumps({'question': "Sans réponse ?"}), encoding='utf-8')
+        
+        with pytest.raises(ValueError):
+            load_golden_set(path)
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,51 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+import numpy as np
+from modules.extractive import ExtractiveAnswerer, split_sentences
+
+class KeywordModel:
+    """Modèle factice : une dimension par mot-clé"""
+    
+    KEYWORDS = ['gradient', 'neurone', 'python']
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def encode(self, texts):
+        self.calls += 1
+        return np.array([[t.lower().count(k) + 0.01 for k in self.KEYWORDS] for t in texts], dtype='float32')
+
+class TestExtractiveAnswerer:
+    """Tests des réponses extractives"""
+    
+    chunks = [
+        {'content': "Python est un langage de programmation. Le gradient indique la direction de la pente."},
+        {'content': "Un neurone calcule une somme pondérée. Le neurone apprend grâce au gradient."}
+    ]
+    
+    def test_split_sentences(self):
+        assert split_sentences("Première phrase assez longue. Court.\nDeuxième phrase assez longue !") == [
+            "Première phrase assez longue.", "Deuxième phrase assez longue !"
+        ]
+    
+    def test_best_sentences_with_citations(self):
+        answerer = ExtractiveAnswerer(KeywordModel(), max_sentences=2)
+        answer = answerer.answer(np.array([1.0, 0.0, 0.0]), self.chunks)
+        
+        assert "Le gradient indique la direction de la pente. [1]" in answer
+        assert "Le neurone apprend grâce au gradient. [2]" in answer
+        assert "Python" not in answer
+    
+    def test_redundant_sentences_dropped(self):
+        chunks = [{'content': "Le gradient indique la pente. Le gradient donne la direction de la pente."}]
+        answerer = ExtractiveAnswerer(KeywordModel(), max_sentences=2)
+        assert len(answerer.select(np.array([1.0, 0.0, 0.0]), chunks)) == 1
+    
+    def test_sentences_encoded_once(self):
+        model = KeywordModel()
+        answerer = ExtractiveAnswerer(model)
+        answerer.answer(np.array([1.0, 0.0, 0.0]), self.chunks)
+        answerer.answer(np.array([0.0, 1.0, 0.0]), self.chunks)
+        assert model.calls == 1
@@ -0,0 +1,119 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+import time
+import pytest
+from modules import learning_generator
+from modules.learning_generator import trim_answer, LearningResponseGenerator, PromptTemplate
+
+STOPS = ["\nQuestion de l'étudiant", "\n[Source "]
+
+class TestTrimAnswer:
+    """Tests du nettoyage des réponses générées"""
+    
+    def test_cut_at_stop_sequence(self):
+        text = "Le gradient indique la pente.\nQuestion de l'étudiant : et ensuite ?"
+        assert trim_answer(text, STOPS) == "Le gradient indique la pente."
+    
+    def test_partial_answer_ends_on_sentence(self):
+        text = "Le gradient indique la pente. Il sert à minimiser la perte. Ensuite on met à"
+        assert trim_answer(text, STOPS, partial=True) == "Le gradient indique la pente. Il sert à minimiser la perte."
+    
+    def test_partial_answer_kept_when_no_sentence_end(self):
+        text = "Le gradient indique la pente et il sert"
+        assert trim_answer(text, STOPS, partial=True) == text
+
+class ByteTokenizer:
+    """Tokenizer minimal (un token par octet UTF-8), sans téléchargement"""
+    
+    eos_token_id = 0
+    
+    def encode(self, text, add_special_tokens=True):
+        return list(text.encode('utf-8'))
+    
+    def decode(self, ids, skip_special_tokens=True):
+        return bytes(int(i) for i in ids if int(i)).decode('utf-8', errors='ignore')
+
+class TestPromptTemplate:
+    """Tests des templates précompilés"""
+    
+    TEMPLATE = "Consignes du niveau.\n\nContexte :\n{context}\n\nQuestion : {question}\nRéponse :"
+    
+    def test_render_matches_format(self):
+        template = PromptTemplate(self.TEMPLATE, "\n- Sois bref")
+        expected = self.TEMPLATE.format(context="Le cours.", question="Pourquoi ?") + "\n- Sois bref"
+        assert template.render("Le cours.", "Pourquoi ?") == expected
+    
+    def test_tokenized_parts_rebuild_prompt(self):
+        tokenizer = ByteTokenizer()
+        template = PromptTemplate(self.TEMPLATE)
+        template.tokenize(tokenizer)
+        generator = LearningResponseGenerator(stub_latency=0.0)
+        generator.tokenizer = tokenizer
+        prompt_ids = template.prefix_ids + generator._request_ids(template, "Le cours.", "Pourquoi ?")
+        assert prompt_ids == tokenizer.encode(template.render("Le cours.", "Pourquoi ?"))
+
+class TestPrefixCache:
+    """Tests du cache KV du préambule (nécessite torch et transformers)"""
+    
+    def test_cached_prefix_matches_full_prompt_over_requests(self):
+        pytest.importorskip("transformers.models.gpt2")
+        import torch
+        from transformers import GPT2Config, GPT2LMHeadModel
+        
+        torch.manual_seed(0)
+        tokenizer = ByteTokenizer()
+        generator = LearningResponseGenerator(stub_latency=0.0)
+        generator.tokenizer = tokenizer
+        generator.model = GPT2LMHeadModel(GPT2Config(n_layer=2, n_embd=64, n_head=4, vocab_size=256, bos_token_id=0, eos_token_id=0)).eval()
+        template = PromptTemplate(TestPromptTemplate.TEMPLATE)
+        template.tokenize(tokenizer)
+        decoding = {'max_new_tokens': 12, 'min_new_tokens': 12, 'do_sample': False, 'pad_token_id': 0}
+        
+        # Requêtes successives sur le même préambule : le cache conservé
+        # ne doit pas grandir d'une requête à l'autre
+        for context, question in [("Le gradient.", "Quoi ?"), ("La perte diminue.", "Pourquoi ?"),
+                                  ("Les poids changent.", "Comment ?")]:
+            prompt_ids = template.prefix_ids + generator._request_ids(template, context, question)
+            answer, num_tokens = generator._generate_with_prefix_cache(template, prompt_ids, decoding)
+            with torch.no_grad():
+                output = generator.model.generate(torch.tensor([prompt_ids]), **decoding)
+            assert num_tokens == 12
+            assert answer == tokenizer.decode(output[0, len(prompt_ids):])
+        assert len(generator._prefix_cache) == 1
+
+class TestStubGenerator:
+    """Tests du LLM simulé (tests de charge)"""
+    
+    CHUNKS = [{'content': "La descente de gradient ajuste les poids du modèle.",
+               'document_name': 'cours.txt', 'chunk_id': 'cours_0', 'score': 0.9}]
+    
+    def test_stub_waits_and_answers_from_context(self):
+        generator = LearningResponseGenerator(stub_latency=0.05)
+        assert generator.model_name == 'stub'
+        start = time.perf_counter()
+        result = generator.generate_pedagogical_answer("C'est quoi la descente de gradient ?", self.CHUNKS)
+        assert time.perf_counter() - start >= 0.05
+        assert "descente de gradient" in result['answer']
+        assert not result['truncated']
+    
+    def test_stub_respects_deadline(self):
+        generator = LearningResponseGenerator(stub_latency=5.0, max_generation_seconds=0.05)
+        start = time.perf_counter()
+        result = generator.generate_pedagogical_answer("C'est quoi la descente de gradient ?", self.CHUNKS)
+        assert time.perf_counter() - start < 1.0
+        assert result['truncated']
+    
+    def test_stub_records_tokens_produced_before_deadline(self, monkeypatch):
+        recorded = []
+        monkeypatch.setattr(learning_generator, 'record_generation', lambda *args: recorded.append(args))
+        generator = LearningResponseGenerator(stub_latency=0.2)
+        generator._generate_with_stub("", max_new_tokens=100)
+        generator._generate_with_stub("", max_new_tokens=100, deadline=time.monotonic() + 0.05)
+        
+        (_, complete, _), (_, partial, elapsed) = recorded
+        assert complete == 100
+        # Environ un quart du budget en 50 ms sur 200 ms
+        assert 10 <= partial <= 40
+        assert elapsed < 0.2
\ No newline at end of file
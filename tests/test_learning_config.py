@@ -0,0 +1,83 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+import pytest
+import numpy as np
+from modules.learning_config import LearningAssistantConfig
+from modules.question_classifier import QuestionClassifier
+
+class TestExpandQuestion:
+    """Tests de la décomposition en sous-requêtes"""
+    
+    @pytest.mark.parametrize("question, concepts", [
+        ("Quelle est la différence entre le machine learning et le deep learning ?",
+         ["le machine learning", "le deep learning"]),
+        ("Comparer Python avec Java", ["Python", "Java"]),
+        ("CNN vs RNN ?", ["CNN", "RNN"])
+    ])
+    def test_comparison_is_split(self, question, concepts):
+        assert LearningAssistantConfig.expand_question(question) == [question] + concepts
+    
+    def test_other_questions_unchanged(self):
+        question = "C'est quoi un gradient ?"
+        assert LearningAssistantConfig.expand_question(question) == [question]
+
+class TestQuestionClassifier:
+    """Tests de la détection compilée du type de question"""
+    
+    @pytest.mark.parametrize("question, expected", [
+        ("C'est quoi un gradient ?", 'definition'),
+        ("Comment faire une régression ?", 'procedure'),
+        ("Comment fonctionne un réseau ?", 'explanation'),
+        ("Donne un EXEMPLE de clustering", 'example'),
+        ("Quelle différence entre L1 et L2 ?", 'comparison'),
+        ("Qu’est-ce que l'overfitting ?", 'definition'),
+        ("Definition du biais", 'definition'),
+        ("Bonjour", 'general')
+    ])
+    def test_detect_question_type(self, question, expected):
+        assert LearningAssistantConfig.detect_question_type(question) == expected
+    
+    def test_keyword_at_word_start_only(self):
+        classifier = QuestionClassifier({'comparison': ['vs']})
+        assert classifier.classify("modèle mvs") == 'general'
+        assert classifier.classify("CNN vs RNN") == 'comparison'
+    
+    def test_embedding_fallback(self):
+        classifier = QuestionClassifier({'definition': ['définir']}, fallback_threshold=0.8)
+        classifier.fit_prototypes({
+            'example': np.array([[1.0, 0.0], [0.9, 0.1]]),
+            'procedure': np.array([[0.0, 1.0]])
+        })
+        
+        assert classifier.classify("Définir le biais", np.array([0.0, 1.0])) == 'definition'
+        assert classifier.classify("Un cas concret ?", np.array([[2.0, 0.1]])) == 'example'
+        assert classifier.classify("Un cas concret ?", np.array([1.0, 1.0])) == 'general'
+        assert classifier.classify("Un cas concret ?") == 'general'
+
+class TestGenerationBudget:
+    """Tests des budgets de génération"""
+    
+    def test_budget_by_level_and_type(self):
+        budgets = LearningAssistantConfig.GENERATION_BUDGETS
+        assert LearningAssistantConfig.generation_budget('advanced', 'general') == budgets['advanced']
+        assert (
+            LearningAssistantConfig.generation_budget('beginner', 'definition')
+            < LearningAssistantConfig.generation_budget('beginner', 'procedure')
+        )
+        assert LearningAssistantConfig.generation_budget('inconnu', 'general') == budgets['intermediate']
+
+class TestFollowUpQuestions:
+    """Tests de la détection des relances"""
+    
+    def test_suggestions_and_short_references(self):
+        assert LearningAssistantConfig.is_follow_up_question("Voulez-vous d'autres exemples ?")
+        assert LearningAssistantConfig.is_follow_up_question("Tu peux détailler ça ?")
+        assert LearningAssistantConfig.is_follow_up_question("Un exemple ?")
+    
+    def test_explicit_questions_are_not_follow_ups(self):
+        assert not LearningAssistantConfig.is_follow_up_question("Qu'est-ce que la descente de gradient ?")
+        assert not LearningAssistantConfig.is_follow_up_question(
+            "Peux-tu donner un exemple de réseau de neurones convolutif appliqué à la vision ?"
+        )
@@ -0,0 +1,82 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+sys.path.append(str(Path(__file__).parent.parent / "benchmarks"))
+
+import json
+import threading
+import pytest
+import load_test
+
+class FakeResponse:
+    def __init__(self, status_code=200, payload=None, headers=None):
+        self.status_code = status_code
+        self._payload = payload or {}
+        self.headers = headers or {}
+    
+    def json(self):
+        return self._payload
+    
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise load_test.requests.HTTPError(f"HTTP {self.status_code}")
+
+class FakeSession:
+    """Session HTTP simulée : répond sans réseau et garde les appels"""
+    
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+    
+    def mount(self, prefix, adapter):
+        pass
+    
+    def get(self, url, **kwargs):
+        with self._lock:
+            self.calls.append(('GET', url))
+        if url.endswith('/health'):
+            return FakeResponse(payload={'status': 'healthy'})
+        return FakeResponse(payload={'documents': []}, headers={'ETag': '"1"'})
+    
+    def post(self, url, **kwargs):
+        with self._lock:
+            self.calls.append(('POST', url))
+        if url.endswith('/query'):
+            return FakeResponse(payload={
+                'answer': "Réponse", 'follow_up_suggestions': ["Un exemple ?"], 'answer_mode': 'generate'
+            })
+        return FakeResponse(payload={'filename': 'cours.txt', 'num_chunks': 3})
+
+class TestLoadTest:
+    """Test de fumée du harnais de charge (sans serveur)"""
+    
+    @pytest.fixture
+    def session(self, monkeypatch):
+        session = FakeSession()
+        monkeypatch.setattr(load_test.requests, 'Session', lambda: session)
+        return session
+    
+    def test_main_runs_every_step(self, session, monkeypatch, tmp_path):
+        output = tmp_path / "load.json"
+        monkeypatch.setattr(sys, 'argv', [
+            'load_test.py', '--rates', '50', '100', '--duration', '0.2',
+            '--warmup-documents', '2', '--output', str(output)
+        ])
+        load_test.main()
+        
+        uploads = [url for method, url in session.calls if url.endswith('/upload_document')]
+        assert len(uploads) >= 2
+        result = json.loads(output.read_text(encoding='utf-8'))
+        assert [step['offered_rate'] for step in result['steps']] == [50, 100]
+        assert all(step['error_rate'] == 0 for step in result['steps'])
+        assert result['steps'][0]['answer_modes'].get('generate', 0) > 0
+    
+    def test_failed_warmup_upload_stops_the_run(self, session, monkeypatch, tmp_path):
+        monkeypatch.setattr(session, 'post', lambda url, **kwargs: FakeResponse(status_code=500))
+        monkeypatch.setattr(sys, 'argv', ['load_test.py', '--output', str(tmp_path / "load.json")])
+        with pytest.raises(load_test.requests.HTTPError):
+            load_test.main()
+        assert not (tmp_path / "load.json").exists()
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
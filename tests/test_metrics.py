@@ -0,0 +1,54 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+import time
+import pytest
+from modules import metrics
+
+class TestMetrics:
+    """Tests pour l'instrumentation des latences"""
+    
+    def test_stage_records_request_timings(self):
+        """Test que les étapes sont ajoutées au détail de la requête"""
+        timings = metrics.start_request_timings()
+        
+        with metrics.stage('search'):
+            time.sleep(0.01)
+        with metrics.stage('search'):
+            pass
+            
+        assert set(timings) == {'search'}
+        assert timings['search'] >= 0.01
+    
+    def test_stage_observes_histogram(self):
+        """Test que chaque étape alimente l'histogramme Prometheus"""
+        before = metrics.STAGE_LATENCY.labels(stage='prompt')._sum.get()
+        
+        with metrics.stage('prompt'):
+            time.sleep(0.005)
+            
+        assert metrics.STAGE_LATENCY.labels(stage='prompt')._sum.get() > before
+    
+    def test_stage_records_on_exception(self):
+        """Test qu'une étape en erreur est quand même mesurée"""
+        timings = metrics.start_request_timings()
+        
+        with pytest.raises(RuntimeError):
+            with metrics.stage('generation'):
+                raise RuntimeError("échec")
+                
+        assert 'generation' in timings
+    
+    def test_format_timings(self):
+        """Test le format de l'en-tête X-Timing"""
+        header = metrics.format_timings({'search': 0.0012, 'generation': 0.85})
+        assert header == "search=1.2ms, generation=850.0ms"
+    
+    def test_export_metrics(self):
+        """Test l'export au format Prometheus"""
+        output = metrics.export_metrics().decode()
+        assert 'rag_stage_latency_seconds' in output
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
\ No newline at end of file
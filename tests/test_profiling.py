@@ -0,0 +1,105 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+import contextvars
+import marshal
+import threading
+import pytest
+from modules import profiling
+from modules.profiling import Profiler, profiled, sample_stacks
+
+def busy_work(n=20000):
+    return sum(i * i for i in range(n))
+
+class TestProfiler:
+    """Tests du profilage à la demande"""
+    
+    def run_request(self, profiler, requested=False):
+        """Simule une requête : capture décidée dans le contexte, travail profilé"""
+        def request():
+            capture = profiler.start_capture("POST /query", requested=requested)
+            with profiled():
+                busy_work()
+            return capture
+        capture = contextvars.copy_context().run(request)
+        if capture is not None:
+            profiler.record(capture)
+        return capture
+    
+    def test_no_capture_without_request(self):
+        profiler = Profiler()
+        assert self.run_request(profiler) is None
+        assert profiler.hot_functions()['captures'] == 0
+    
+    def test_requested_capture_is_recorded(self):
+        profiler = Profiler()
+        capture = self.run_request(profiler, requested=True)
+        assert capture.duration > 0
+        assert profiler.captures()[0]['id'] == capture.id
+        
+        stats = marshal.loads(profiler.capture_stats(capture.id))
+        assert any(name == 'busy_work' for (_, _, name) in stats)
+        assert 'busy_work' in profiler.capture_text(capture.id)
+        assert profiler.capture_stats(capture.id + 1) is None
+    
+    def test_armed_captures_are_counted_down(self):
+        profiler = Profiler()
+        profiler.arm(2)
+        captures = [self.run_request(profiler) for _ in range(3)]
+        assert [c is not None for c in captures] == [True, True, False]
+    
+    def test_hot_functions_keep_package_only(self):
+        profiler = Profiler(package='tests')
+        for _ in range(2):
+            self.run_request(profiler, requested=True)
+        hot = profiler.hot_functions()
+        assert hot['captures'] == 2
+        assert hot['functions']
+        assert all(f['function'].startswith('tests/') for f in hot['functions'])
+        assert any('busy_work' in f['function'] for f in hot['functions'])
+        
+        profiler.reset()
+        assert profiler.hot_functions() == {'captures': 0, 'functions': []}
+    
+    def test_memory_snapshot_reports_growth(self):
+        profiler = Profiler(package='tests')
+        with pytest.raises(RuntimeError):
+            profiler.memory_snapshot()
+        profiling.start_memory_tracing()
+        try:
+            profiler.memory_snapshot()
+            kept = [bytearray(1024) for _ in range(200)]
+            report = profiler.memory_snapshot()
+        finally:
+            profiling.stop_memory_tracing()
+        assert report['traced_bytes'] > 0
+        assert any(entry['file'] == 'tests/test_profiling.py' and entry['size_diff'] >= 200 * 1024
+                   for entry in report['growth'])
+        assert len(kept) == 200
+
+class TestStackSampling:
+    """Tests de l'échantillonnage des piles"""
+    
+    def test_collapsed_stacks_cover_other_threads(self):
+        stop = threading.Event()
+        
+        def spin():
+            while not stop.is_set():
+                busy_work(1000)
+                
+        worker = threading.Thread(target=spin, name="worker")
+        worker.start()
+        try:
+            stacks = sample_stacks(0.2, interval=0.002)
+        finally:
+            stop.set()
+            worker.join()
+            
+        lines = stacks.splitlines()
+        assert lines
+        assert any(line.startswith("worker;") and "busy_work (test_profiling.py)" in line for line in lines)
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
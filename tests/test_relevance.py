@@ -0,0 +1,55 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+import pytest
+from modules.retrieval import FAISSRetriever
+from modules.relevance import RelevanceGate
+
+class TestRelevanceGate:
+    """Tests du seuil de pertinence"""
+    
+    @pytest.fixture
+    def retriever(self):
+        texts = [
+            "La descente de gradient minimise la fonction de perte",
+            "Le taux d'apprentissage règle la taille des pas du gradient",
+            "Un réseau de neurones est composé de couches"
+        ]
+        retriever = FAISSRetriever()
+        retriever.create_index(retriever.embedding_model.encode(texts), [
+            {'chunk_id': f'c_{i}', 'content': t, 'document_name': 'cours.txt', 'chunk_index': i}
+            for i, t in enumerate(texts)
+        ])
+        return retriever
+    
+    def test_scores_are_cosine(self, retriever):
+        results = retriever.search("La descente de gradient minimise la fonction de perte", top_k=3)
+        assert results[0]['score'] == pytest.approx(1.0, abs=1e-4)
+        assert all(-1.0 <= r['score'] <= 1.0 for r in results)
+    
+    def test_threshold_learned_per_index_version(self, retriever):
+        gate = RelevanceGate(retriever)
+        calibration = gate.calibration()
+        assert calibration['version'] == retriever.version
+        assert calibration['threshold'] > calibration['off_topic_mean']
+        
+        # Recalibré seulement quand l'index change
+        assert gate.calibration() is calibration
+        retriever.add_to_index(retriever.embedding_model.encode(["Nouveau chapitre"]), [
+            {'chunk_id': 'c_3', 'content': "Nouveau chapitre", 'document_name': 'cours.txt', 'chunk_index': 3}
+        ])
+        assert gate.calibration()['version'] == retriever.version
+    
+    def test_off_topic_question_is_rejected(self, retriever):
+        gate = RelevanceGate(retriever)
+        on_topic = retriever.search("Comment la descente de gradient minimise la perte ?", top_k=3)
+        off_topic = retriever.search("Quelle est la recette de la pâte à crêpes ?", top_k=3)
+        
+        assert gate.filter(on_topic)
+        assert gate.filter(off_topic) == []
+    
+    def test_fixed_threshold(self, retriever):
+        gate = RelevanceGate(retriever, fixed_threshold=0.99)
+        results = retriever.search("La descente de gradient minimise la fonction de perte", top_k=3)
+        assert [r['chunk_id'] for r in gate.filter(results)] == ['c_0']
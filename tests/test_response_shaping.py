@@ -0,0 +1,42 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+import pytest
+from modules.response_shaping import query_terms, compile_terms, make_snippet, shape_chunks, select_fields
+
+class TestResponseShaping:
+    """Tests de la mise en forme des réponses"""
+    
+    content = ("Introduction générale au cours. " * 10) + "La descente de gradient minimise la perte. " + ("Suite du cours. " * 10)
+    
+    def test_query_terms(self):
+        assert query_terms("Qu'est-ce que le gradient ? Le gradient !") == ['gradient']
+    
+    def test_snippet_centred_and_highlighted(self):
+        pattern = compile_terms(query_terms("Explique le gradient"))
+        snippet = make_snippet(self.content, pattern, max_chars=80)
+        assert "**gradient**" in snippet
+        assert snippet.startswith("…") and snippet.endswith("…")
+        assert len(snippet) <= 80 + 2 + 4
+    
+    def test_snippet_without_match(self):
+        snippet = make_snippet(self.content, compile_terms(['python']), max_chars=40)
+        assert snippet.startswith("Introduction")
+        assert "**" not in snippet
+    
+    def test_shape_chunks(self):
+        chunks = [{'chunk_id': 'c_0', 'content': self.content, 'score': 0.9}]
+        shaped = shape_chunks(chunks, include_content=False, snippet_chars=60, pattern=compile_terms(['gradient']))
+        assert 'content' not in shaped[0]
+        assert shaped[0]['chunk_id'] == 'c_0'
+        assert '**gradient**' in shaped[0]['snippet']
+        # L'original n'est pas modifié
+        assert 'content' in chunks[0]
+    
+    def test_select_fields(self):
+        payload = {'answer': 'a', 'sources': [], 'retrieved_chunks': []}
+        assert select_fields(payload, ['answer']) == {'answer': 'a'}
+        assert select_fields(payload, None) is payload
+        with pytest.raises(ValueError):
+            select_fields(payload, ['inconnu'])
@@ -2,9 +2,11 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent / "src"))
 
+import threading
 import pytest
 import numpy as np
 from modules.retrieval import FAISSRetriever
+from modules.dedup import NearDuplicateIndex
 
 class TestFAISSRetriever:
     """Tests pour le système de retrieval FAISS"""
@@ -129,5 +131,200 @@ class TestFAISSRetriever:
         assert new_retriever.index.ntotal == retriever_with_data.index.ntotal
         assert len(new_retriever.metadata) == len(retriever_with_data.metadata)
 
+    def test_reload_index_publishes_new_version(self, retriever_with_data, tmp_path):
+        """Test le rechargement à chaud d'un index modifié sur le disque"""
+        index_path = tmp_path / "test_index.bin"
+        metadata_path = tmp_path / "test_metadata.json"
+        retriever_with_data.save_index(index_path, metadata_path)
+        
+        serving = FAISSRetriever()
+        assert serving.reload_index(index_path, metadata_path)
+        version = serving.version
+        old_snapshot = serving._snapshot
+        
+        # Fichiers inchangés : pas de nouvelle version
+        assert not serving.reload_index(index_path, metadata_path, force=False)
+        assert serving.version == version
+        
+        # Réindexation hors ligne puis rechargement
+        new_embedding = retriever_with_data.embedding_model.encode(["Nouveau cours"])
+        retriever_with_data.add_to_index(new_embedding, [{
+            'chunk_id': 'new_chunk',
+            'content': "Nouveau cours",
+            'document_name': 'new.txt',
+            'chunk_index': 0
+        }])
+        retriever_with_data.save_index(index_path, metadata_path)
+        
+        assert serving.reload_index(index_path, metadata_path, force=False)
+        assert serving.version == version + 1
+        assert serving.index.ntotal == retriever_with_data.index.ntotal
+        # L'ancien snapshot reste intact pour les recherches en cours
+        assert old_snapshot.index.ntotal == len(old_snapshot.metadata)
+
+    def test_clear_index(self, retriever_with_data):
+        """Test la réinitialisation de l'index"""
+        retriever_with_data.clear_index()
+        
+        assert retriever_with_data.index is None
+        assert retriever_with_data.metadata == []
+        assert retriever_with_data.search("apprentissage", top_k=3) == []
+    
+    @pytest.mark.parametrize('index_type', ['hnsw', 'ivf'])
+    def test_cleared_index_keeps_configured_type(self, tmp_path, index_type):
+        """Après un vidage (même sauvegardé puis rechargé), l'index garde son type"""
+        retriever = FAISSRetriever(index_type)
+        # Assez de vecteurs pour entraîner un IVF
+        embeddings = np.random.default_rng(0).standard_normal((2000, retriever.dimension)).astype('float32')
+        metadata = [{'chunk_id': str(i), 'content': f"Passage {i}"} for i in range(len(embeddings))]
+        retriever.create_index(embeddings, metadata)
+        expected = type(retriever.index)
+        
+        retriever.clear_index()
+        retriever.save_index(tmp_path / "faiss.index", tmp_path / "metadata.json")
+        retriever.add_to_index(embeddings, metadata)
+        assert type(retriever.index) is expected
+        
+        loaded = FAISSRetriever(index_type, embedding_model=retriever.embedding_model)
+        loaded.load_index(tmp_path / "faiss.index", tmp_path / "metadata.json")
+        assert loaded.index is None
+        loaded.add_to_index(embeddings, metadata)
+        assert type(loaded.index) is expected
+    
+    def test_concurrent_searches_during_writes(self, sample_data):
+        """Stress test : recherches concurrentes pendant des ajouts"""
+        texts, metadata = sample_data
+        retriever = FAISSRetriever()
+        retriever.create_index(retriever.embedding_model.encode(texts), metadata)
+        
+        new_texts = [f"Chapitre {i} : notion numéro {i} du cours" for i in range(40)]
+        new_embeddings = retriever.embedding_model.encode(new_texts)
+        errors = []
+        done = threading.Event()
+        
+        def reader():
+            while not done.is_set():
+                snapshot = retriever._snapshot
+                if snapshot.index.ntotal != len(snapshot.metadata):
+                    errors.append("snapshot incohérent")
+                try:
+                    for result in retriever.search(texts[0], top_k=10):
+                        if result['chunk_id'] not in {m['chunk_id'] for m in snapshot.metadata} | {
+                            f'new_{i}' for i in range(len(new_texts))
+                        }:
+                            errors.append(result['chunk_id'])
+                except Exception as e:
+                    errors.append(repr(e))
+                    
+        readers = [threading.Thread(target=reader) for _ in range(8)]
+        for t in readers:
+            t.start()
+            
+        for i, text in enumerate(new_texts):
+            retriever.add_to_index(new_embeddings[i:i + 1].copy(), [{
+                'chunk_id': f'new_{i}',
+                'content': text,
+                'document_name': 'new.txt',
+                'chunk_index': i
+            }])
+            
+        done.set()
+        for t in readers:
+            t.join()
+            
+        assert errors == []
+        assert retriever.index.ntotal == len(texts) + len(new_texts)
+        assert len(retriever.metadata) == retriever.index.ntotal
+        
+        # Chaque vecteur correspond toujours à ses métadonnées
+        results = retriever.search(new_texts[-1], top_k=1)
+        assert results[0]['content'] == new_texts[-1]
+    
+    def test_search_multi_fuses_without_duplicates(self, retriever_with_data):
+        """Les sous-requêtes sont fusionnées sans doublon"""
+        queries = [
+            "machine learning ou deep learning",
+            "Le machine learning est une branche de l'IA",
+            "Le deep learning utilise des réseaux de neurones"
+        ]
+        results = retriever_with_data.search_multi(queries, top_k=3)
+        
+        chunk_ids = [r['chunk_id'] for r in results]
+        assert len(chunk_ids) == len(set(chunk_ids)) == 3
+        assert {'chunk_0', 'chunk_1'} <= set(chunk_ids)
+        assert all(r['matched_queries'] for r in results)
+    
+    def test_catalogue_follows_index(self, retriever_with_data):
+        """Le catalogue est mis à jour à l'ajout et au retrait d'un document"""
+        catalogue = retriever_with_data.catalogue
+        assert catalogue.documents['test.txt']['num_chunks'] == 5
+        
+        texts = ["Premier chapitre", "Second chapitre"]
+        retriever_with_data.add_to_index(retriever_with_data.embedding_model.encode(texts), [
+            {'chunk_id': f'new_{i}', 'content': t, 'document_name': 'new.txt',
+             'chunk_index': i, 'num_characters': len(t), 'num_pages': 3}
+            for i, t in enumerate(texts)
+        ])
+        updated = retriever_with_data.catalogue
+        assert updated.etag != catalogue.etag
+        assert updated.documents['new.txt']['num_chunks'] == 2
+        assert updated.documents['new.txt']['num_pages'] == 3
+        assert updated.total_chunks == 7
+        
+        model = retriever_with_data.embedding_model
+        removed = retriever_with_data.remove_document(
+            'test.txt', lambda kept: model.encode([m['content'] for m in kept])
+        )
+        assert removed == 5
+        assert list(retriever_with_data.catalogue.documents) == ['new.txt']
+        assert retriever_with_data.index.ntotal == 2
+        assert retriever_with_data.search("Second chapitre", top_k=1)[0]['chunk_id'] == 'new_1'
+    
+    def test_index_without_document_names(self):
+        """Métadonnées minimales (benchmarks) : l'index se construit et répond"""
+        retriever = FAISSRetriever()
+        texts = ["Premier chapitre", "Second chapitre"]
+        retriever.create_index(retriever.embedding_model.encode(texts), [
+            {'chunk_id': str(i), 'content': t} for i, t in enumerate(texts)
+        ])
+        assert len(retriever.catalogue) == 0
+        assert retriever.search("Second chapitre", top_k=1)[0]['chunk_id'] == '1'
+    
+    def test_near_duplicates_collapse_to_one_vector(self):
+        """Un passage repris dans un autre document n'ajoute pas de vecteur"""
+        passage = (
+            "La régularisation L2 ajoute à la fonction de perte la somme des carrés "
+            "des poids multipliée par un coefficient lambda pour limiter le surapprentissage"
+        )
+        other = "Les arbres de décision découpent l'espace des variables en régions homogènes"
+        retriever = FAISSRetriever(deduplicator=NearDuplicateIndex(threshold=0.7))
+        model = retriever.embedding_model
+        
+        def add(document, texts):
+            return retriever.add_to_index(model.encode(texts), [
+                {'chunk_id': f'{document}_{i}', 'content': t, 'document_name': document,
+                 'chunk_index': i, 'num_characters': len(t)}
+                for i, t in enumerate(texts)
+            ])
+            
+        assert add('a.pdf', [passage, other]) == 0
+        assert add('b.pdf', [passage + " Chapitre 3", "Un passage propre au second cours sur le boosting"]) == 1
+        assert retriever.index.ntotal == 3
+        
+        canonical = retriever.search(passage, top_k=1)[0]
+        assert canonical['chunk_id'] == 'a.pdf_0'
+        assert [d['chunk_id'] for d in canonical['duplicates']] == ['b.pdf_0']
+        assert retriever.catalogue.documents['b.pdf']['num_chunks'] == 2
+        assert retriever.catalogue.total_chunks == 4
+        
+        # Le premier quasi-doublon survivant remplace le chunk retiré
+        removed = retriever.remove_document('a.pdf', lambda kept: model.encode([m['content'] for m in kept]))
+        assert removed == 2
+        promoted = retriever.search(passage, top_k=1)[0]
+        assert promoted['chunk_id'] == 'b.pdf_0'
+        assert promoted['content'] == passage
+        assert 'duplicates' not in promoted
+        assert retriever.catalogue.total_chunks == 2
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
\ No newline at end of file
@@ -0,0 +1,167 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+import pytest
+import numpy as np
+from modules.retrieval import FAISSRetriever
+from modules.dedup import NearDuplicateIndex
+from modules.topics import TopicIndex, SECTION_CHUNKS, word_counts
+
+# Deux sections par document : les SECTION_CHUNKS premiers chunks, puis la suite
+DOCUMENTS = {
+    'neurones.txt': (
+        "Un réseau de neurones empile des couches de neurones reliées par des poids entraînés.",
+        "La convolution applique des filtres aux images pour détecter des motifs visuels."
+    ),
+    'python.txt': (
+        "Python est un langage de programmation interprété avec une syntaxe lisible.",
+        "Les listes Python stockent des éléments ordonnés et modifiables."
+    ),
+    'histoire.txt': (
+        "La révolution industrielle transforme les usines et le travail ouvrier.",
+        "Les machines à vapeur accélèrent le transport ferroviaire des marchandises."
+    )
+}
+
+def make_chunks(name):
+    first, second = DOCUMENTS[name]
+    return [
+        {
+            'chunk_id': f'{name}_{i}',
+            'content': f"{first if i < SECTION_CHUNKS else second} Passage numéro {i}.",
+            'document_name': name,
+            'chunk_index': i
+        }
+        for i in range(SECTION_CHUNKS + 3)
+    ]
+
+@pytest.fixture
+def corpus():
+    retriever = FAISSRetriever()
+    metadata = [chunk for name in DOCUMENTS for chunk in make_chunks(name)]
+    embeddings = retriever.embedding_model.encode([m['content'] for m in metadata])
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return retriever, metadata, np.asarray(embeddings, dtype='float32')
+
+class TestTopicIndex:
+    """Tests des descriptions de documents et de sections"""
+    
+    def test_stop_words_are_not_keywords(self):
+        counts = word_counts(["Les réseaux de neurones sont utilisés avec des données pour apprendre."])
+        assert 'réseaux' in counts and 'neurones' in counts
+        assert 'avec' not in counts and 'pour' not in counts and 'sont' not in counts
+    
+    def test_describes_documents_and_sections(self, corpus):
+        _, metadata, embeddings = corpus
+        topics = TopicIndex.from_chunks(metadata, embeddings)
+        
+        assert len(topics) == 2 * len(DOCUMENTS)
+        description = topics.describe('neurones.txt')
+        assert description['topic'] == 'neurones'
+        assert description['num_sections'] == 2
+        assert "réseau de neurones" in description['summary']
+        
+        first, second = description['sections']
+        assert (first['first_chunk'], first['num_chunks']) == (0, SECTION_CHUNKS)
+        assert (second['first_chunk'], second['num_chunks']) == (SECTION_CHUNKS, 3)
+        assert second['subtopic'] in {'convolution', 'filtres', 'images', 'motifs', 'visuels', 'applique', 'détecter'}
+        assert second['summary'].startswith("La convolution")
+        assert topics.describe('absent.txt') is None
+    
+    def test_incremental_matches_full_build(self, corpus):
+        _, metadata, embeddings = corpus
+        split = 2 * (SECTION_CHUNKS + 3)
+        full = TopicIndex.from_chunks(metadata, embeddings)
+        incremental = TopicIndex.from_chunks(metadata[:split], embeddings[:split]).with_chunks(
+            metadata[split:], embeddings[split:], base=split
+        )
+        
+        assert incremental.sections == full.sections
+        query = embeddings[-1]
+        assert incremental.select(query, 3) == pytest.approx(full.select(query, 3))
+        assert list(incremental.candidates(query, 2)) == list(full.candidates(query, 2))
+    
+    def test_relocated_after_removal(self, corpus):
+        _, metadata, embeddings = corpus
+        topics = TopicIndex.from_chunks(metadata, embeddings)
+        kept = [m for m in metadata if m['document_name'] != 'neurones.txt']
+        relocated = topics.relocated(kept, embeddings[SECTION_CHUNKS + 3:])
+        
+        assert relocated.describe('neurones.txt') is None
+        assert len(relocated) == 4
+        python_first = relocated.candidates(embeddings[SECTION_CHUNKS + 3], 1)
+        assert [kept[p]['chunk_id'] for p in python_first] == [f'python.txt_{i}' for i in range(SECTION_CHUNKS)]
+
+class TestCoarseToFine:
+    """Tests de la recherche en deux temps"""
+    
+    @pytest.mark.parametrize('index_type', ['flat', 'hnsw'])
+    def test_search_restricted_to_selected_sections(self, corpus, index_type):
+        _, metadata, embeddings = corpus
+        exhaustive = FAISSRetriever(index_type)
+        exhaustive.create_index(embeddings, metadata)
+        coarse = FAISSRetriever(index_type, coarse_sections=1)
+        coarse.create_index(embeddings, metadata)
+        
+        query = coarse.encode_query("convolution des images avec des filtres")
+        results = coarse.search_by_vector(query, top_k=5)
+        assert {r['document_name'] for r in results} == {'neurones.txt'}
+        assert all(r['chunk_index'] >= SECTION_CHUNKS for r in results)
+        # Peu de chunks dans la section : moins de résultats que demandé
+        assert len(results) == 3
+        assert [r['chunk_id'] for r in results] == [r['chunk_id'] for r in exhaustive.search_by_vector(query, top_k=3)]
+    
+    def test_small_corpus_searches_every_chunk(self, corpus):
+        _, metadata, embeddings = corpus
+        retriever = FAISSRetriever(coarse_sections=len(DOCUMENTS) * 2)
+        retriever.create_index(embeddings, metadata)
+        results = retriever.search("convolution des images", top_k=10)
+        assert len(results) == 10
+    
+    def test_topics_follow_index_updates(self, corpus, tmp_path):
+        retriever, metadata, embeddings = corpus
+        retriever.coarse_sections = 2
+        split = SECTION_CHUNKS + 3
+        retriever.add_to_index(embeddings[:split], metadata[:split])
+        retriever.add_to_index(embeddings[split:], metadata[split:])
+        assert len(retriever.topics) == 6
+        
+        retriever.save_index(tmp_path / "faiss.index", tmp_path / "metadata.json")
+        loaded = FAISSRetriever(embedding_model=retriever.embedding_model)
+        loaded.load_index(tmp_path / "faiss.index", tmp_path / "metadata.json")
+        assert loaded.topics.sections == retriever.topics.sections
+        
+        by_content = {m['content']: e for m, e in zip(metadata, embeddings)}
+        retriever.remove_document('python.txt', lambda kept: np.vstack([by_content[m['content']] for m in kept]))
+        assert retriever.topics.describe('python.txt') is None
+        results = retriever.search("machines à vapeur et transport ferroviaire", top_k=3)
+        assert {r['document_name'] for r in results} == {'histoire.txt'}
+    
+    def test_promoted_duplicate_stays_searchable(self):
+        # Le seul chunk de copie.txt est un quasi-doublon du premier chunk
+        # de neurones.txt : il n'a aucune section avant le retrait
+        retriever = FAISSRetriever(deduplicator=NearDuplicateIndex(threshold=0.99), coarse_sections=1)
+        model = retriever.embedding_model
+        passage = DOCUMENTS['neurones.txt'][0]
+        
+        def add(document, texts):
+            retriever.add_to_index(model.encode(texts), [
+                {'chunk_id': f'{document}_{i}', 'content': t, 'document_name': document, 'chunk_index': i}
+                for i, t in enumerate(texts)
+            ])
+            
+        add('neurones.txt', list(DOCUMENTS['neurones.txt']))
+        add('histoire.txt', list(DOCUMENTS['histoire.txt']))
+        add('copie.txt', [passage])
+        assert retriever.topics.describe('copie.txt') is None
+        
+        retriever.remove_document('neurones.txt', lambda kept: model.encode([m['content'] for m in kept]))
+        assert len(retriever.topics) == 2
+        assert retriever.topics.describe('copie.txt')['num_sections'] == 1
+        results = retriever.search(passage, top_k=1)
+        assert [r['chunk_id'] for r in results] == ['copie.txt_0']
+        assert results[0]['score'] == pytest.approx(1.0, abs=1e-3)
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
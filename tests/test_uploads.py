@@ -0,0 +1,122 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+import hashlib
+import random
+import pytest
+from modules.chunking import TextChunker
+from modules.uploads import (
+    UploadManager, UploadTooLarge, UploadOffsetMismatch, UploadNotFound, MultipartFileStream
+)
+
+class TestStreamingChunker:
+    """Tests du découpage incrémental"""
+    
+    def test_same_chunks_as_full_text(self):
+        """Des coupures arbitraires donnent les mêmes chunks que le texte complet"""
+        chunker = TextChunker(chunk_size=7, chunk_overlap=2)
+        rng = random.Random(0)
+        text = ' '.join(rng.choice(['le', 'gradient', 'réseau', 'neurones', 'IA']) for _ in range(200))
+        
+        cuts = sorted(rng.sample(range(1, len(text)), 40))
+        pieces = [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+        
+        assert list(chunker.iter_chunks_from_stream(pieces)) == chunker.split_into_chunks(text)
+
+class TestUploadManager:
+    """Tests des uploads en plusieurs morceaux"""
+    
+    @pytest.fixture
+    def manager(self, tmp_path):
+        return UploadManager(tmp_path / "spool", max_bytes=1000, chunker=TextChunker(chunk_size=5, chunk_overlap=1))
+    
+    def test_resume_and_hash(self, manager):
+        """Reprise à l'offset reçu et empreinte calculée au fil de l'eau"""
+        data = "Le machine learning est une branche de l'intelligence artificielle. ".encode() * 3
+        session = manager.create("cours.txt", total_size=len(data))
+        
+        session.write(data[:50], offset=0)
+        with pytest.raises(UploadOffsetMismatch) as excinfo:
+            session.write(data[50:], offset=10)
+        assert excinfo.value.expected == 50
+        session.write(data[50:], offset=50)
+        
+        path = session.finish()
+        assert path.read_bytes() == data
+        assert session.sha256 == hashlib.sha256(data).hexdigest()
+        assert session.chunk_texts == manager.chunker.split_into_chunks(data.decode())
+    
+    def test_size_limit(self, manager):
+        """Un upload au-delà de max_bytes est refusé"""
+        with pytest.raises(UploadTooLarge):
+            manager.create("gros.pdf", total_size=5000)
+            
+        session = manager.create("gros.pdf")
+        with pytest.raises(UploadTooLarge):
+            session.write(b'x' * 1001)
+    
+    def test_release_removes_spool_file(self, manager):
+        """L'annulation supprime le fichier temporaire et la session"""
+        session = manager.create("notes.txt")
+        session.write(b"quelques mots")
+        manager.release(session.upload_id)
+        
+        assert not session.path.exists()
+        with pytest.raises(UploadNotFound):
+            manager.get(session.upload_id)
+    
+    def test_unsupported_extension(self, manager):
+        with pytest.raises(ValueError):
+            manager.create("image.png")
+
+class TestMultipartFileStream:
+    """Tests du découpage en flux des corps multipart"""
+    
+    BOUNDARY = "----limite7MA4YWxk"
+    
+    def body(self, parts):
+        lines = []
+        for name, filename, content in parts:
+            disposition = f'form-data; name="{name}"' + (f'; filename="{filename}"' if filename else '')
+            lines.append(
+                f"--{self.BOUNDARY}\r\nContent-Disposition: {disposition}\r\n"
+                f"Content-Type: application/octet-stream\r\n\r\n".encode() + content + b"\r\n"
+            )
+        return b"".join(lines) + f"--{self.BOUNDARY}--\r\n".encode()
+    
+    def test_files_rebuilt_from_small_pieces(self):
+        first = bytes(random.Random(0).randrange(256) for _ in range(5000))
+        body = self.body([
+            ('files', 'cours.pdf', first),
+            ('niveau', None, b'beginner'),
+            ('files', 'notes é.txt', b'Texte des notes')
+        ])
+        parts = MultipartFileStream(f"multipart/form-data; boundary={self.BOUNDARY}")
+        
+        files, current = {}, None
+        for start in range(0, len(body), 7):
+            for event, value in parts.feed(body[start:start + 7]):
+                if event == 'file':
+                    current = value
+                    files[current] = b''
+                elif event == 'data':
+                    files[current] += value
+                else:
+                    current = None
+        assert parts.complete
+        assert files == {'cours.pdf': first, 'notes é.txt': b'Texte des notes'}
+    
+    def test_truncated_body_is_incomplete(self):
+        body = self.body([('file', 'cours.txt', b'contenu')])
+        parts = MultipartFileStream(f'multipart/form-data; boundary="{self.BOUNDARY}"')
+        events = parts.feed(body[:-20])
+        assert events[0] == ('file', 'cours.txt')
+        assert ('end', None) not in events
+        assert not parts.complete
+    
+    def test_rejects_other_content_types(self):
+        with pytest.raises(ValueError):
+            MultipartFileStream("application/json")
+        with pytest.raises(ValueError):
+            MultipartFileStream("multipart/form-data")